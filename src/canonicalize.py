@@ -0,0 +1,198 @@
+"""
+Pre-fetch canonicalization of Spotify top tracks.
+
+Top-track lists repeat the same song in several forms: "Smooth Criminal - 2012 Remaster",
+"Who (Rock Remix)" next to "Who", "Save Your Tears (Remix) (with Ariana Grande) - Bonus Track",
+and collaborations listed under every credited artist ("Die With A Smile" under both
+Lady Gaga and Bruno Mars). Each of them used to cost a full Genius search and scrape.
+
+group_variants() runs between the Spotify fetch and enrichment. Titles are reduced to a
+canonical form (feature credits and variant tags removed), and tracks are grouped when
+they share a canonical title and a credited artist, or a Spotify track ID / ISRC when the
+records carry one. Each group is enriched once through its representative; the result is
+then fanned out to every member or the duplicates are dropped, depending on the policy.
+
+    python canonicalize.py --input top_tracks.json     # report the groups that would collapse
+"""
+import argparse
+import re
+
+from search_planner import normalize_text
+from track_io import iter_tracks
+
+# -------------------- Configuration --------------------
+
+# Policies for the non-representative members of a group
+FAN_OUT = 'fanout'   # Every member is kept and gets the representative's lyrics and songwriters
+DROP = 'drop'        # Only the representative is kept
+POLICIES = (FAN_OUT, DROP)
+DEFAULT_POLICY = FAN_OUT
+
+# Tags that mark a release variant or a feature credit rather than a different song.
+# Matched against a whole "(...)" / "[...]" group or a " - ..." suffix of the title.
+VARIANT_TAG_RE = re.compile(r"""^(?:
+    (?:feat\.?|ft\.?|featuring|with)\s.+
+  | from\s.+
+  | .*\b(?:re-?master(?:ed)?|remix|mix|edit|version|bonus\s+track|demo|sped\s+up|slowed(?:\s+down)?)(?:\s+\d{4})?
+  | live(?:\s.*)?
+  | acoustic | deluxe(?:\s.*)? | mono | stereo | extended | radio | single
+)$""", re.IGNORECASE | re.VERBOSE)
+
+# Record fields that identify a recording exactly, when present
+ID_FIELDS = ('spotify_track_id', 'isrc')
+
+# -------------------- Title Canonicalization --------------------
+
+def _bracket_groups(title):
+    """
+    Returns (start, end, content) of each top-level (...) or [...] group, allowing nesting
+    such as "(feat. YUQI ((G)I-DLE), JVKE)".
+    """
+    groups = []
+    depth, start = 0, None
+    for i, char in enumerate(title):
+        if char in '([':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char in ')]' and depth:
+            depth -= 1
+            if depth == 0:
+                groups.append((start, i + 1, title[start + 1:i]))
+    return groups
+
+
+def strip_variant_tags(title):
+    """
+    Removes feature credits and variant tags from a track title, keeping descriptive
+    parentheses such as "P.Y.T. (Pretty Young Thing)".
+    """
+    if not title:
+        return ''
+    head, *suffixes = title.split(' - ')
+    kept = [head] + [suffix for suffix in suffixes if not VARIANT_TAG_RE.match(suffix.strip())]
+    title = ' - '.join(kept)
+    for start, end, content in reversed(_bracket_groups(title)):
+        if VARIANT_TAG_RE.match(content.strip()):
+            title = title[:start] + title[end:]
+    return re.sub(r'\s+', ' ', title).strip()
+
+
+def canonical_title(title):
+    """
+    Returns the normalized title used to group variants; falls back to the whole title
+    when nothing but tags would remain.
+    """
+    return normalize_text(strip_variant_tags(title)) or normalize_text(title)
+
+
+def credited_artists(track):
+    """
+    Returns the normalized names of the artists credited on a track.
+
+    Before enrichment, 'songwriters' holds the Spotify artists of the track (see
+    extract_track_data), so a collaboration lists the same names under every artist.
+    """
+    names = [track.get('artist')] + list(track.get('songwriters') or [])
+    return {normalize_text(name) for name in names if name}
+
+# -------------------- Grouping --------------------
+
+class VariantGroup:
+    """
+    Tracks that are enriched once, through a single representative.
+    """
+
+    def __init__(self, canonical):
+        self.canonical = canonical
+        self.members = []
+
+    @property
+    def representative(self):
+        """
+        The member whose title carries no variant tags, most popular first; the original
+        is the best Genius query for the whole group.
+        """
+        return min(self.members, key=lambda track: (
+            strip_variant_tags(track.get('track_name')) != (track.get('track_name') or '').strip(),
+            -(track.get('popularity') or 0),
+        ))
+
+    @property
+    def duplicates(self):
+        representative = self.representative
+        return [track for track in self.members if track is not representative]
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def group_variants(tracks):
+    """
+    Groups tracks that are variants of the same song.
+
+    Two tracks are grouped when they share a canonical title and any credited artist (by
+    name or Spotify artist ID), or a value of one of ID_FIELDS. Grouping is transitive
+    (union-find over the shared keys), and runs in time linear in the number of tracks
+    and credits.
+
+    Parameters:
+    - tracks (list of dict): Track records with 'artist', 'track_name' and Spotify credits.
+
+    Returns:
+    - list of VariantGroup: Groups in order of their first member.
+    """
+    parents = list(range(len(tracks)))
+    owners = {}
+    titles = []
+    for i, track in enumerate(tracks):
+        title = canonical_title(track.get('track_name'))
+        titles.append(title)
+        keys = [('title', title, artist) for artist in credited_artists(track)]
+        keys += [('title_artist_id', title, artist_id) for artist_id in track.get('spotify_artist_ids') or []]
+        keys += [(field, track[field]) for field in ID_FIELDS if track.get(field)]
+        for key in keys:
+            owner = owners.setdefault(key, i)
+            root, other = _find(parents, i), _find(parents, owner)
+            if root != other:
+                parents[max(root, other)] = min(root, other)
+
+    groups = {}
+    for i, track in enumerate(tracks):
+        root = _find(parents, i)
+        if root not in groups:
+            groups[root] = VariantGroup(titles[root])
+        groups[root].members.append(track)
+    return list(groups.values())
+
+
+def collapse_summary(groups):
+    """
+    Returns (tracks, groups, enrichments saved) for logging.
+    """
+    tracks = sum(len(group.members) for group in groups)
+    return tracks, len(groups), tracks - len(groups)
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the variant groups in a top-tracks file.")
+    parser.add_argument('--input', default='top_tracks.json')
+    args = parser.parse_args()
+
+    groups = group_variants(list(iter_tracks(args.input)))
+    for group in groups:
+        if len(group.members) > 1:
+            representative = group.representative
+            print(f"{representative['artist']} - {representative['track_name']}")
+            for track in group.duplicates:
+                print(f"    {track['artist']} - {track['track_name']}")
+    tracks, count, saved = collapse_summary(groups)
+    print(f"{tracks} tracks in {count} groups; {saved} enrichments saved.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import json
 
+from track_io import iter_tracks
+
 def print_json_error_context(file_path, error_position, context_lines=5):
     with open(file_path, 'r') as file:
         lines = file.readlines()
@@ -15,12 +17,8 @@ def print_json_error_context(file_path, error_position, context_lines=5):
             print(" " * (len(str(i)) + 2 + error_position[1]) + "^")
 
 try:
-    # Load the JSON data
-    with open('pop_lyrics_dataset.json', 'r') as file:
-        data = json.load(file)
-
-    # Iterate through the data and print track names with null lyrics
-    for track in data:
+    # Stream the records and print track names with null lyrics
+    for track in iter_tracks('pop_lyrics_dataset.json', fields=['track_name', 'lyrics']):
         if track['lyrics'] is None:
             print(track['track_name'])
 
@@ -1,5 +1,11 @@
+import argparse
 import os
 
+from search_planner import normalize_text
+from track_io import iter_tracks, JSONL_EXTENSIONS, PARQUET_EXTENSIONS
+
+DATASET_EXTENSIONS = ('.json',) + JSONL_EXTENSIONS + PARQUET_EXTENSIONS
+
 def load_tracks(file_path, remove_dash=False):
     """
     Loads track names from a text file.
@@ -50,10 +56,54 @@ def compare_tracks(defective_file, test_file):
 
     return common_tracks, unique_defective_tracks
 
+def load_dataset_keys(file_path):
+    """
+    Indexes a dataset file by Spotify track ID and by normalized (artist, title).
+
+    Args:
+        file_path (str): JSON, JSON Lines or Parquet dataset.
+
+    Returns:
+        list: (spotify_track_id or None, natural key, "Artist - Title") per record.
+    """
+    entries = []
+    for record in iter_tracks(file_path, fields=['artist', 'track_name', 'spotify_track_id']):
+        artist, track_name = record.get('artist') or '', record.get('track_name') or ''
+        entries.append((record.get('spotify_track_id'),
+                        f"{normalize_text(artist)}\x1f{normalize_text(track_name)}",
+                        f"{artist} - {track_name}"))
+    return entries
+
+def compare_datasets(first_file, second_file):
+    """
+    Compares two dataset files record by record.
+
+    Records match on Spotify track ID when both carry one, and on normalized (artist, title)
+    otherwise. Both lookups are hash-set probes, so the comparison is linear in the sizes.
+
+    Returns:
+        tuple: Labels of records of first_file present in second_file, and of those missing from it.
+    """
+    second = load_dataset_keys(second_file)
+    second_ids = {track_id for track_id, _, _ in second if track_id}
+    second_keys = {key for _, key, _ in second}
+    unidentified_keys = {key for track_id, key, _ in second if not track_id}
+
+    common, missing = set(), set()
+    for track_id, key, label in load_dataset_keys(first_file):
+        if track_id:
+            found = track_id in second_ids or key in unidentified_keys
+        else:
+            found = key in second_keys
+        (common if found else missing).add(label)
+    return common, missing
+
 def main():
-    # Define file paths
-    defective_file = 'defective_tracks.txt'
-    test_file = 'test.txt'
+    parser = argparse.ArgumentParser(description="Compare two track lists or two dataset files.")
+    parser.add_argument('first', nargs='?', default='defective_tracks.txt')
+    parser.add_argument('second', nargs='?', default='test.txt')
+    args = parser.parse_args()
+    defective_file, test_file = args.first, args.second
 
     # Check if files exist
     if not os.path.isfile(defective_file):
@@ -63,23 +113,27 @@ def main():
         print(f"Error: {test_file} does not exist.")
         return
 
-    # Compare tracks
-    common, unique_defective = compare_tracks(defective_file, test_file)
+    # Compare tracks: datasets by ID, plain text lists by lowercased line
+    datasets = defective_file.lower().endswith(DATASET_EXTENSIONS) and test_file.lower().endswith(DATASET_EXTENSIONS)
+    if datasets:
+        common, unique_defective = compare_datasets(defective_file, test_file)
+    else:
+        common, unique_defective = compare_tracks(defective_file, test_file)
 
     # Display Results
     print("\n## Tracks Present in Both Files:")
     if common:
         for track in sorted(common):
-            print(f"- {track.title()}")
+            print(f"- {track if datasets else track.title()}")
     else:
         print("No common tracks found.")
 
-    print("\n## Tracks in `defective_tracks.txt` but Not in `test.txt`:")
+    print(f"\n## Tracks in `{defective_file}` but Not in `{test_file}`:")
     if unique_defective:
         for track in sorted(unique_defective):
-            print(f"- {track.title()}")
+            print(f"- {track if datasets else track.title()}")
     else:
-        print("All tracks in `defective_tracks.txt` are also in `test.txt`.")
+        print(f"All tracks in `{defective_file}` are also in `{test_file}`.")
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,12 @@
-import pandas as pd
+from dataset_store import write_parquet
+from track_io import iter_tracks
 
-# Step 1: Load JSON file (without 'lines=True' since it's not newline-delimited)
+# Step 1: Stream records from the JSON file (a JSON array, not newline-delimited)
 json_file = 'filtered_pop_lyrics_dataset.json'
-df = pd.read_json(json_file)
+records = iter_tracks(json_file)
 
-# Step 2: Convert to Parquet
+# Step 2: Write them to Parquet in row groups
 parquet_file = 'poplyric-1k.parquet'
-df.to_parquet(parquet_file)
+write_parquet(records, parquet_file)
 
 print("Conversion successful!")
@@ -0,0 +1,209 @@
+"""
+Browserless extraction of Genius song credits.
+
+Genius song pages embed their normalized page state as JSON:
+
+    window.__PRELOADED_STATE__ = JSON.parse('{"songPage":{"song":378195,...},"entities":{...}}');
+
+The writers, producers and other credits are in that state, whatever the page's CSS
+classes look like this week. Extraction is a str.find for the marker, one unescape of the
+JavaScript string literal and one json.loads, with no HTML parsing and no browser session.
+The song API payload (`writer_artists` in /songs/:id) is read the same way as a fallback.
+
+    python credits.py song_page.html [...]                      # credits from saved pages
+    python credits.py --url https://genius.com/... --save page.html
+
+Saved pages in tests/fixtures/credits/ (the JSON.parse and object-literal forms, with
+JavaScript escapes) and an API payload are checked by tests/test_credits.py.
+"""
+import argparse
+import json
+import re
+
+# -------------------- Configuration --------------------
+
+STATE_MARKER = 'window.__PRELOADED_STATE__'
+JSON_PARSE_PREFIX = 'JSON.parse('
+
+# Escapes of a JavaScript string literal
+_JS_ESCAPE_RE = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[0-7]{1,3}|\r\n|[\s\S])")
+_JS_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0',
+                      '\n': '', '\r\n': '', '\u2028': '', '\u2029': ''}
+
+_decoder = json.JSONDecoder()
+
+# -------------------- Page State --------------------
+
+def _unescape_js(literal):
+    """
+    Decodes the body of a JavaScript string literal.
+    """
+    def replace(match):
+        escape = match.group(1)
+        if escape in _JS_SIMPLE_ESCAPES:
+            return _JS_SIMPLE_ESCAPES[escape]
+        if escape[0] == 'u':
+            return chr(int(escape[2:-1] if escape[1] == '{' else escape[1:], 16))
+        if escape[0] == 'x':
+            return chr(int(escape[1:], 16))
+        if escape[0] in '01234567':
+            return chr(int(escape, 8))
+        return escape
+    text = _JS_ESCAPE_RE.sub(replace, literal)
+    # \uD83D\uDE00 pairs decode to lone surrogates; join them into one character
+    return text.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+
+def _literal_end(text, start, quote):
+    """
+    Returns the index of the quote closing the string literal whose body starts at `start`.
+    """
+    i = start
+    while True:
+        i = text.find(quote, i)
+        if i < 0:
+            raise ValueError("Unterminated string literal in page state")
+        backslashes = 0
+        while text[i - 1 - backslashes] == '\\':
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return i
+        i += 1
+
+
+def extract_preloaded_state(page_html):
+    """
+    Returns the embedded page state of a Genius page, or None if the page has none.
+
+    Parameters:
+    - page_html (str): Song page HTML.
+
+    Returns:
+    - dict or None: The decoded __PRELOADED_STATE__.
+
+    Raises:
+    - ValueError: If the marker is present but the state cannot be decoded.
+    """
+    marker = page_html.find(STATE_MARKER)
+    if marker < 0:
+        return None
+    i = page_html.find('=', marker + len(STATE_MARKER))
+    if i < 0:
+        return None
+    i += 1
+    while page_html[i].isspace():
+        i += 1
+
+    if page_html.startswith(JSON_PARSE_PREFIX, i):
+        i += len(JSON_PARSE_PREFIX)
+        quote = page_html[i]
+        if quote not in '\'"`':
+            raise ValueError("Unexpected JSON.parse argument in page state")
+        end = _literal_end(page_html, i + 1, quote)
+        return json.loads(_unescape_js(page_html[i + 1:end]))
+
+    # Older pages assign the object literal directly
+    state, _ = _decoder.raw_decode(page_html, i)
+    return state
+
+# -------------------- Credits --------------------
+
+def _artist_names(refs, artists):
+    """
+    Resolves artist references ({'id': ..., 'type': 'artists'}, bare IDs or inline objects)
+    against the state's artist entities.
+    """
+    names = []
+    for ref in refs or []:
+        if isinstance(ref, dict):
+            name = ref.get('name') or (artists.get(str(ref.get('id'))) or {}).get('name')
+        else:
+            name = (artists.get(str(ref)) or {}).get('name')
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def credits_from_state(state):
+    """
+    Reads the credits of the page's song from its page state.
+
+    Returns:
+    - dict or None: {'song_id', 'writers', 'producers', 'performances': {label: [names]}},
+      or None if the state holds no song.
+    """
+    song_id = (state.get('songPage') or {}).get('song')
+    entities = state.get('entities') or {}
+    song = (entities.get('songs') or {}).get(str(song_id))
+    if song is None:
+        return None
+    artists = entities.get('artists') or {}
+    performances = {}
+    for performance in song.get('customPerformances') or []:
+        names = _artist_names(performance.get('artists'), artists)
+        if performance.get('label') and names:
+            performances[performance['label']] = names
+    return {
+        'song_id': song_id,
+        'writers': _artist_names(song.get('writerArtists'), artists),
+        'producers': _artist_names(song.get('producerArtists'), artists),
+        'performances': performances,
+    }
+
+
+def credits_from_api(payload):
+    """
+    Reads credits from a Genius API song payload ({'song': {...}} or the song itself).
+    """
+    song = payload.get('song', payload) if isinstance(payload, dict) else {}
+    performances = {}
+    for performance in song.get('custom_performances') or []:
+        names = [artist['name'] for artist in performance.get('artists') or [] if artist.get('name')]
+        if performance.get('label') and names:
+            performances[performance['label']] = names
+    return {
+        'song_id': song.get('id'),
+        'writers': [artist['name'] for artist in song.get('writer_artists') or [] if artist.get('name')],
+        'producers': [artist['name'] for artist in song.get('producer_artists') or [] if artist.get('name')],
+        'performances': performances,
+    }
+
+
+def songwriters_from_html(page_html):
+    """
+    Returns the writer names credited on a song page, or None if the page has no song state.
+    """
+    state = extract_preloaded_state(page_html)
+    song_credits = credits_from_state(state) if state else None
+    return song_credits['writers'] if song_credits else None
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Genius credits from saved song pages.")
+    parser.add_argument('pages', nargs='*', help="Saved song page HTML files")
+    parser.add_argument('--url', help="Fetch a song page instead")
+    parser.add_argument('--save', help="With --url: save the page here as a fixture")
+    args = parser.parse_args()
+
+    pages = []
+    if args.url:
+        import requests
+        from endpoints import genius_web_url
+        response = requests.get(genius_web_url(args.url), timeout=10)
+        response.raise_for_status()
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                f.write(response.text)
+        pages.append((args.url, response.text))
+    for path in args.pages:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((path, f.read()))
+
+    for source, page_html in pages:
+        state = extract_preloaded_state(page_html)
+        song_credits = credits_from_state(state) if state else None
+        print(json.dumps({'source': source, 'credits': song_credits}, ensure_ascii=False, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,718 @@
+"""
+Canonical SQLite store for the dataset.
+
+One typed `tracks` table replaces the overlapping JSON files as the source of truth.
+Records are upserted by Spotify track ID when they carry one and by normalized (artist,
+title) otherwise; point lookups and filtered queries go through indexes on artist, release
+year, popularity and the Spotify track, album and ISRC identifiers, and the JSON,
+JSON Lines, Parquet, CSV and by-artist files are generated from it by streaming exports.
+Lyrics section headers are parsed once on upsert into the `sections` side table.
+Once `compress` has trained a zstd dictionary on the stored lyrics, each track's lyrics
+are kept as one dictionary-compressed frame (see lyrics_codec.py), decoded only when the
+lyrics field is read.
+
+    python dataset_store.py import pop_lyrics_dataset.json fixed_tracks.json
+    python dataset_store.py export --format parquet --output poplyric-1k.parquet
+    python dataset_store.py query --artist "Lady Gaga" --years 2008-2012
+    python dataset_store.py sections --type chorus --performer "Bruno Mars"
+    python dataset_store.py compress
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from lyrics_codec import LyricsCodec, train_dictionary, DICT_SIZE, MAX_TRAINING_SAMPLES
+from search_planner import normalize_text
+from sections import parse_sections, write_section_table
+from track_io import iter_tracks, write_json_array, write_atomic, write_atomic_path, indent, NO_LYRICS
+
+# -------------------- Configuration --------------------
+
+DATASET_DB = os.getenv('DATASET_DB', 'pop_lyrics.db')
+
+# Export field order, matching the published dataset
+FIELDS = ['track_name', 'album', 'release_date', 'song_length', 'popularity',
+          'songwriters', 'artist', 'lyrics', 'genre', 'language',
+          'spotify_track_id', 'spotify_album_id', 'spotify_artist_ids', 'isrc']
+
+# Fields stored as JSON text
+LIST_FIELDS = {'songwriters', 'genre', 'spotify_artist_ids'}
+
+# Stable identifiers captured at ingest; a record without one never clears a stored value
+ID_FIELDS = ('spotify_track_id', 'spotify_album_id', 'spotify_artist_ids', 'isrc')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    track_key TEXT NOT NULL UNIQUE,
+    spotify_track_id TEXT,
+    spotify_album_id TEXT,
+    spotify_artist_ids TEXT,
+    isrc TEXT,
+    track_name TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT,
+    release_date TEXT,
+    release_year INTEGER,
+    song_length TEXT,
+    duration_seconds INTEGER,
+    popularity INTEGER,
+    songwriters TEXT,
+    lyrics TEXT,
+    genre TEXT,
+    language TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks (artist);
+CREATE INDEX IF NOT EXISTS idx_tracks_release_year ON tracks (release_year);
+CREATE INDEX IF NOT EXISTS idx_tracks_popularity ON tracks (popularity);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tracks_spotify_track_id ON tracks (spotify_track_id);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    track_id INTEGER NOT NULL REFERENCES tracks (id) ON DELETE CASCADE,
+    section_index INTEGER NOT NULL,
+    section_type TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    start_offset INTEGER NOT NULL,
+    body_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    UNIQUE (track_id, section_index)
+);
+CREATE INDEX IF NOT EXISTS idx_sections_type ON sections (section_type, ordinal);
+CREATE TABLE IF NOT EXISTS section_performers (
+    section_id INTEGER NOT NULL REFERENCES sections (id) ON DELETE CASCADE,
+    performer TEXT NOT NULL,
+    performer_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_section_performers_key ON section_performers (performer_key);
+CREATE INDEX IF NOT EXISTS idx_section_performers_section ON section_performers (section_id);
+CREATE TABLE IF NOT EXISTS lyrics_dictionaries (
+    dict_id INTEGER PRIMARY KEY,
+    dictionary BLOB NOT NULL,
+    samples INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+SECTION_FIELDS = ['artist', 'track_name', 'section_index', 'section_type', 'ordinal', 'performers',
+                  'label', 'start_offset', 'body_offset', 'end_offset']
+
+# Columns added after the first release: name -> type, added to older databases on open
+MIGRATIONS = {'language': 'TEXT', 'spotify_album_id': 'TEXT', 'spotify_artist_ids': 'TEXT', 'isrc': 'TEXT'}
+
+# Indexes on migrated columns, created once the columns exist
+MIGRATED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_tracks_language ON tracks (language)",
+    "CREATE INDEX IF NOT EXISTS idx_tracks_isrc ON tracks (isrc)",
+    "CREATE INDEX IF NOT EXISTS idx_tracks_spotify_album_id ON tracks (spotify_album_id)",
+]
+
+# -------------------- Field Helpers --------------------
+
+def make_track_key(artist, track_name):
+    """
+    Natural key of a track: normalized artist and title.
+    """
+    return f"{normalize_text(artist)}\x1f{normalize_text(track_name)}"
+
+
+def parse_release_year(release_date):
+    match = re.match(r'^(\d{4})', release_date or '')
+    return int(match.group(1)) if match else None
+
+
+def parse_duration_seconds(song_length):
+    match = re.match(r'^(\d+):(\d{1,2})$', song_length or '')
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+
+def record_to_row(record):
+    """
+    Converts a dataset record into column values for the tracks table.
+
+    Only fields present in the record produce columns, so an upsert of a partial record
+    (e.g. a top_tracks.json entry without lyrics) leaves the other stored fields alone.
+    """
+    row = {'track_key': make_track_key(record.get('artist', ''), record.get('track_name', ''))}
+    for field in ('track_name', 'artist', 'album', 'release_date', 'song_length', 'lyrics', 'language'):
+        if field in record:
+            row[field] = record[field]
+    for field in ID_FIELDS:
+        if record.get(field):
+            row[field] = record[field]
+    if 'release_date' in record:
+        row['release_year'] = parse_release_year(record['release_date'])
+    if 'song_length' in record:
+        row['duration_seconds'] = parse_duration_seconds(record['song_length'])
+    if 'popularity' in record:
+        popularity = record['popularity']
+        row['popularity'] = int(popularity) if popularity is not None else None
+    for field in LIST_FIELDS:
+        # Identifier lists were only copied above when non-empty
+        if field in row or (field in record and field not in ID_FIELDS):
+            value = record[field]
+            row[field] = json.dumps(value, ensure_ascii=False) if value is not None else None
+    return row
+
+
+def row_to_record(row, columns=None, codec=None):
+    """
+    Converts an sqlite3.Row back into a dataset record (FIELDS order, optionally projected).
+    Compressed lyrics are decoded with codec.
+    """
+    record = {}
+    for field in columns or FIELDS:
+        value = row[field]
+        if field in LIST_FIELDS and value is not None:
+            value = json.loads(value)
+        elif field == 'lyrics' and isinstance(value, bytes):
+            value = (codec or LyricsCodec()).decompress(value)
+        record[field] = value
+    return record
+
+# -------------------- Store --------------------
+
+class DatasetStore:
+    """
+    The canonical track table. Safe to share between threads of one process.
+    """
+
+    def __init__(self, db_path=DATASET_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(tracks)")}
+            for column, column_type in MIGRATIONS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE tracks ADD COLUMN {column} {column_type}")
+            for statement in MIGRATED_INDEXES:
+                self.conn.execute(statement)
+        self.codec = LyricsCodec({row['dict_id']: row['dictionary'] for row in self.conn.execute(
+            "SELECT dict_id, dictionary FROM lyrics_dictionaries ORDER BY created_at")})
+
+    # ---- writes ----
+
+    def upsert_many(self, records, batch_size=1000):
+        """
+        Inserts or updates records in batched transactions.
+
+        A record with a Spotify track ID updates the row holding that ID, even if its title
+        was respelled; other records are matched by natural key. Only the fields present in
+        a record are updated, and a record without an identifier keeps the stored one.
+        Sections are re-parsed whenever lyrics are written.
+
+        Returns:
+        - int: Number of records written.
+        """
+        written = 0
+        batch = []
+        for record in records:
+            batch.append(record_to_row(record))
+            if len(batch) >= batch_size:
+                written += self._upsert_batch(batch)
+                batch = []
+        if batch:
+            written += self._upsert_batch(batch)
+        return written
+
+    def upsert(self, record):
+        return self.upsert_many([record])
+
+    def _upsert_batch(self, rows):
+        now = time.time()
+        with self.lock, self.conn:
+            for row in rows:
+                track_id = None
+                if 'spotify_track_id' in row:
+                    found = self.conn.execute("SELECT id FROM tracks WHERE spotify_track_id = ?",
+                                              (row['spotify_track_id'],)).fetchone()
+                    track_id = found[0] if found else None
+                if track_id is not None:
+                    # Keep the stored natural key; the ID is the identity
+                    columns = [c for c in row if c != 'track_key']
+                    self.conn.execute(
+                        f"UPDATE tracks SET {', '.join(f'{c} = ?' for c in columns)}, updated_at = ? WHERE id = ?",
+                        [self._stored(row, c) for c in columns] + [now, track_id]
+                    )
+                else:
+                    columns = list(row)
+                    updates = ', '.join(f"{c} = excluded.{c}" for c in columns if c != 'track_key')
+                    self.conn.execute(
+                        f"INSERT INTO tracks ({', '.join(columns)}, updated_at) "
+                        f"VALUES ({', '.join('?' for _ in columns)}, ?) "
+                        f"ON CONFLICT(track_key) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                        [self._stored(row, c) for c in columns] + [now]
+                    )
+                if 'lyrics' in row:
+                    if track_id is None:
+                        track_id = self.conn.execute("SELECT id FROM tracks WHERE track_key = ?",
+                                                     (row['track_key'],)).fetchone()[0]
+                    self._write_sections(track_id, row['lyrics'])
+        return len(rows)
+
+    def _stored(self, row, column):
+        return self._compress(row[column]) if column == 'lyrics' else row[column]
+
+    def _compress(self, lyrics, codec=None):
+        # The placeholder stays text so that has_lyrics can filter it in SQL
+        return lyrics if lyrics == NO_LYRICS else (codec or self.codec).compress(lyrics)
+
+    def _write_sections(self, track_id, lyrics):
+        """
+        Replaces a track's rows in the section tables. Runs inside the caller's transaction.
+        """
+        self.conn.execute("DELETE FROM sections WHERE track_id = ?", (track_id,))
+        for section in parse_sections(lyrics):
+            cursor = self.conn.execute(
+                "INSERT INTO sections (track_id, section_index, section_type, ordinal, label, "
+                "start_offset, body_offset, end_offset) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (track_id, section.index, section.section_type, section.ordinal, section.label,
+                 section.start, section.body_start, section.end)
+            )
+            self.conn.executemany(
+                "INSERT INTO section_performers (section_id, performer, performer_key) VALUES (?, ?, ?)",
+                [(cursor.lastrowid, performer, normalize_text(performer)) for performer in section.performers]
+            )
+
+    def rebuild_sections(self, batch_size=500):
+        """
+        Re-parses the sections of every stored track (e.g. after the parser rules change).
+
+        Returns:
+        - int: Number of sections written.
+        """
+        with self.lock:
+            track_ids = [row[0] for row in self.conn.execute("SELECT id FROM tracks ORDER BY id")]
+        for i in range(0, len(track_ids), batch_size):
+            chunk = track_ids[i:i + batch_size]
+            with self.lock, self.conn:
+                rows = self.conn.execute(
+                    f"SELECT id, lyrics FROM tracks WHERE id IN ({', '.join('?' for _ in chunk)})", chunk).fetchall()
+                for track_id, lyrics in rows:
+                    self._write_sections(track_id, self.codec.decompress(lyrics))
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+    def compress_lyrics(self, dict_size=DICT_SIZE, max_samples=MAX_TRAINING_SAMPLES, batch_size=500):
+        """
+        Trains a zstd dictionary on a sample of the stored lyrics and rewrites every track's
+        lyrics as a frame compressed with it. New upserts use the dictionary from then on.
+
+        Parameters:
+        - dict_size (int): Dictionary size in bytes.
+        - max_samples (int): Lyrics sampled for training.
+        - batch_size (int): Tracks rewritten per transaction.
+
+        Returns:
+        - dict: {'dict_id', 'tracks', 'text_bytes', 'stored_bytes'}.
+        """
+        with self.lock:
+            samples = [self.codec.decompress(row[0]) for row in self.conn.execute(
+                "SELECT lyrics FROM tracks WHERE lyrics IS NOT NULL AND lyrics != ? ORDER BY random() LIMIT ?",
+                (NO_LYRICS, max_samples))]
+        dictionary = train_dictionary(samples, dict_size)
+
+        codec = LyricsCodec({i: d.as_bytes() for i, d in self.codec.dictionaries.items()})
+        dict_id = codec.add_dictionary(dictionary)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO lyrics_dictionaries (dict_id, dictionary, samples, created_at) "
+                              "VALUES (?, ?, ?, ?)", (dict_id, dictionary, len(samples), time.time()))
+            self.codec = codec
+
+        stats = {'dict_id': dict_id, 'tracks': 0, 'text_bytes': 0, 'stored_bytes': 0}
+        last_id = 0
+        while True:
+            with self.lock, self.conn:
+                rows = self.conn.execute("SELECT id, lyrics FROM tracks WHERE id > ? AND lyrics IS NOT NULL "
+                                         "ORDER BY id LIMIT ?", (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for track_id, stored in rows:
+                    text = codec.decompress(stored)
+                    compressed = self._compress(text, codec)
+                    updates.append((compressed, track_id))
+                    stats['text_bytes'] += len(text.encode('utf-8'))
+                    stats['stored_bytes'] += len(compressed if isinstance(compressed, bytes) else compressed.encode('utf-8'))
+                self.conn.executemany("UPDATE tracks SET lyrics = ? WHERE id = ?", updates)
+                stats['tracks'] += len(rows)
+                last_id = rows[-1][0]
+        with self.lock:
+            # Return the pages freed by the rewrite to the file system
+            self.conn.execute("VACUUM")
+        logging.info("Compressed lyrics of %s tracks with dictionary %s: %s -> %s bytes.",
+                     stats['tracks'], dict_id, stats['text_bytes'], stats['stored_bytes'])
+        return stats
+
+    def delete(self, artist, track_name):
+        with self.lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM tracks WHERE track_key = ?", (make_track_key(artist, track_name),))
+        return cursor.rowcount
+
+    # ---- reads ----
+
+    def get(self, artist, track_name, columns=None):
+        """
+        Point lookup by natural key.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM tracks WHERE track_key = ?",
+                                    (make_track_key(artist, track_name),)).fetchone()
+        return row_to_record(row, columns, self.codec) if row else None
+
+    def get_by_spotify_id(self, spotify_track_id, columns=None):
+        """
+        Point lookup by Spotify track ID.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM tracks WHERE spotify_track_id = ?",
+                                    (spotify_track_id,)).fetchone()
+        return row_to_record(row, columns, self.codec) if row else None
+
+    def get_by_isrc(self, isrc, columns=None):
+        """
+        Point lookups by ISRC. Returns a list: re-releases of a recording share the code.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM tracks WHERE isrc = ? ORDER BY id", (isrc,)).fetchall()
+        return [row_to_record(row, columns, self.codec) for row in rows]
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def query(self, artist=None, year_from=None, year_to=None, min_popularity=None,
+              max_popularity=None, has_lyrics=None, language=None, columns=None, order_by='id', batch_size=500):
+        """
+        Streams records matching the filters. Every filter is served by an index.
+
+        Parameters:
+        - artist (str): Exact artist name.
+        - year_from, year_to (int): Inclusive release-year range.
+        - min_popularity, max_popularity (int): Inclusive popularity range.
+        - has_lyrics (bool): Only tracks with (True) or without (False) lyrics; the
+          'Lyrics not found.' placeholder counts as no lyrics.
+        - language (str): Detected lyrics language code (see language_id.py).
+        - columns (list of str): Fields to return (defaults to FIELDS). Lyrics are only read if requested.
+        - order_by (str): 'id', 'artist', 'release_year' or 'popularity'.
+
+        Yields:
+        - dict: Dataset records.
+        """
+        where, params = [], []
+        if artist is not None:
+            where.append("artist = ?")
+            params.append(artist)
+        if year_from is not None:
+            where.append("release_year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            where.append("release_year <= ?")
+            params.append(year_to)
+        if min_popularity is not None:
+            where.append("popularity >= ?")
+            params.append(min_popularity)
+        if max_popularity is not None:
+            where.append("popularity <= ?")
+            params.append(max_popularity)
+        if has_lyrics is not None:
+            where.append("lyrics IS NOT NULL AND lyrics != ?" if has_lyrics else "(lyrics IS NULL OR lyrics = ?)")
+            params.append(NO_LYRICS)
+        if language is not None:
+            where.append("language = ?")
+            params.append(language)
+        if order_by not in ('id', 'artist', 'release_year', 'popularity'):
+            raise ValueError(f"Unsupported order_by: {order_by}")
+
+        columns = list(columns or FIELDS)
+        sql = (f"SELECT {', '.join(columns)} FROM tracks"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + f" ORDER BY {order_by}" + (", id" if order_by != 'id' else ""))
+
+        # A dedicated cursor streams rows without materializing the result set
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row_to_record(row, columns, self.codec)
+
+    def sections(self, section_type=None, performer=None, artist=None, with_text=False, batch_size=500):
+        """
+        Streams sections matching the filters through the section indexes.
+
+        Parameters:
+        - section_type (str): Canonical type, e.g. 'chorus' or 'verse'.
+        - performer (str): Performer named in the section header (normalized match).
+        - artist (str): Exact track artist.
+        - with_text (bool): Also return the section body, sliced from the lyrics by offset.
+
+        Yields:
+        - dict: SECTION_FIELDS (plus 'text' if requested).
+        """
+        where, params = [], []
+        if section_type is not None:
+            where.append("s.section_type = ?")
+            params.append(section_type)
+        if performer is not None:
+            where.append("s.id IN (SELECT section_id FROM section_performers WHERE performer_key = ?)")
+            params.append(normalize_text(performer))
+        if artist is not None:
+            where.append("t.artist = ?")
+            params.append(artist)
+        # Lyrics may be compressed; section text is sliced after decoding, once per track
+        text = ", s.track_id, t.lyrics" if with_text else ""
+        sql = (f"SELECT s.id, t.track_key, t.artist, t.track_name, s.section_index, s.section_type, s.ordinal, "
+               f"s.label, s.start_offset, s.body_offset, s.end_offset{text} "
+               f"FROM sections s JOIN tracks t ON t.id = s.track_id"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY s.track_id, s.section_index")
+
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        lyrics_track, lyrics = None, None
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(batch_size)
+                performers = {}
+                if rows:
+                    ids = [row['id'] for row in rows]
+                    for section_id, name in self.conn.execute(
+                            f"SELECT section_id, performer FROM section_performers "
+                            f"WHERE section_id IN ({', '.join('?' for _ in ids)}) ORDER BY rowid", ids):
+                        performers.setdefault(section_id, []).append(name)
+            if not rows:
+                return
+            for row in rows:
+                section = {field: row[field] for field in SECTION_FIELDS if field != 'performers'}
+                section['performers'] = performers.get(row['id'], [])
+                section['track_key'] = row['track_key']
+                if with_text:
+                    if row['track_id'] != lyrics_track:
+                        lyrics_track, lyrics = row['track_id'], self.codec.decompress(row['lyrics'])
+                    section['text'] = lyrics[row['body_offset']:row['end_offset']].strip('\n')
+                yield section
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ---- exports ----
+
+    def export_json(self, path, **filters):
+        """
+        Writes records as a JSON array (the layout of pop_lyrics_dataset.json), streaming.
+        """
+        return _write_atomic(path, lambda f: write_json_array(f, self.query(**filters)))
+
+    def export_jsonl(self, path, **filters):
+        def write(f):
+            count = 0
+            for record in self.query(**filters):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+            return count
+        return _write_atomic(path, write)
+
+    def export_by_artist(self, path, **filters):
+        """
+        Writes {artist: [tracks]} (the layout of songs_by_artist.json) from an artist-ordered scan.
+        """
+        def write(f):
+            count = 0
+            current = None
+            f.write('{')
+            for record in self.query(order_by='artist', **filters):
+                if record['artist'] != current:
+                    if current is not None:
+                        f.write('\n    ],')
+                    f.write(f"\n    {json.dumps(record['artist'], ensure_ascii=False)}: [\n")
+                    current = record['artist']
+                else:
+                    f.write(',\n')
+                f.write(indent(json.dumps(record, ensure_ascii=False, indent=4), 8))
+                count += 1
+            f.write('\n    ]\n}\n' if current is not None else '}\n')
+            return count
+        return _write_atomic(path, write)
+
+    def export_csv(self, path, **filters):
+        """
+        Writes a flat CSV with list fields joined by '; '. See exporter.py for more options.
+        """
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            count = 0
+            for record in self.query(**filters):
+                for field in LIST_FIELDS:
+                    record[field] = '; '.join(record[field] or [])
+                writer.writerow(record)
+                count += 1
+            return count
+        return _write_atomic(path, write, newline='')
+
+    def export_parquet(self, path, batch_size=10000, **filters):
+        """
+        Writes a Parquet file in row groups of batch_size records, ordered by artist so that
+        the row-group statistics of an artist filter (see poplyrics.py) are selective.
+        """
+        return write_parquet(self.query(order_by='artist', **filters), path, batch_size)
+
+    def export_sections(self, path, **filters):
+        """
+        Writes the section side table (keyed by track_key) to Parquet.
+        """
+        count = write_section_table(self.sections(**filters), path)
+        logging.info("Exported %s sections to %s.", count, path)
+        return count
+
+
+def write_parquet(records, path, batch_size=10000):
+    """
+    Streams records to a Parquet file in row groups of batch_size, with the typed and
+    validated columns of schema.py (duration_seconds, release_date_start and
+    release_date_precision, uint8 popularity).
+
+    Returns:
+    - int: Number of records written.
+    """
+    import pyarrow.parquet as pq
+    from schema import export_schema, normalize_records, log_failures
+
+    counts = {}
+
+    def write(tmp_path):
+        count = 0
+        # Column statistics let readers skip row groups; the page index lets them skip pages.
+        # zstd pages shrink the lyrics column far more than the default snappy.
+        with pq.ParquetWriter(tmp_path, export_schema(), compression='zstd', write_page_index=True) as writer:
+            for batch in normalize_records(records, batch_size, counts):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+    count = write_atomic_path(path, write)
+    log_failures(counts, path)
+    logging.info("Exported %s tracks to %s.", count, path)
+    return count
+
+
+def _write_atomic(path, write, newline=None):
+    count = write_atomic(path, write, newline)
+    logging.info("Exported %s tracks to %s.", count, path)
+    return count
+
+# -------------------- Main Execution --------------------
+
+EXPORTERS = {
+    'json': DatasetStore.export_json,
+    'jsonl': DatasetStore.export_jsonl,
+    'parquet': DatasetStore.export_parquet,
+    'csv': DatasetStore.export_csv,
+    'by-artist': DatasetStore.export_by_artist,
+}
+
+
+def _filters(args):
+    year_from = year_to = None
+    if args.years:
+        year_from, _, year_to = args.years.partition('-')
+        year_from, year_to = int(year_from), int(year_to or year_from)
+    return {'artist': args.artist, 'year_from': year_from, 'year_to': year_to,
+            'min_popularity': args.min_popularity, 'language': args.language}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canonical SQLite dataset store.")
+    parser.add_argument('--db', default=DATASET_DB)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help="Upsert JSON, JSON Lines or Parquet files into the store (later files win)")
+    imp.add_argument('paths', nargs='+')
+
+    for name in ('export', 'query'):
+        cmd = sub.add_parser(name)
+        cmd.add_argument('--artist')
+        cmd.add_argument('--years', help="Release year or range, e.g. 2010-2019")
+        cmd.add_argument('--min-popularity', type=int)
+        cmd.add_argument('--language', help="Detected lyrics language code, e.g. es")
+        if name == 'export':
+            cmd.add_argument('--format', choices=sorted(EXPORTERS), default='json')
+            cmd.add_argument('--output', required=True)
+            cmd.add_argument('--snapshot', action='store_true',
+                             help="Also record a snapshot manifest of the exported tracks (see snapshot.py)")
+        else:
+            cmd.add_argument('--fields', default='artist,track_name,release_date,popularity')
+
+    sec = sub.add_parser('sections', help="List lyrics sections, or export/rebuild the section table")
+    sec.add_argument('--type', dest='section_type', help="Section type, e.g. chorus")
+    sec.add_argument('--performer')
+    sec.add_argument('--artist')
+    sec.add_argument('--text', action='store_true', help="Print section text")
+    sec.add_argument('--output', help="Write the section table to this Parquet file instead")
+    sec.add_argument('--rebuild', action='store_true', help="Re-parse sections of all stored tracks first")
+
+    comp = sub.add_parser('compress', help="Train a zstd dictionary on the stored lyrics and compress them with it")
+    comp.add_argument('--dict-size', type=int, default=DICT_SIZE, help="Dictionary size in bytes")
+    comp.add_argument('--samples', type=int, default=MAX_TRAINING_SAMPLES, help="Lyrics sampled for training")
+
+    args = parser.parse_args()
+    store = DatasetStore(args.db)
+
+    if args.command == 'import':
+        for path in args.paths:
+            print(f"Upserted {store.upsert_many(iter_tracks(path))} records from {path}.")
+        print(f"Store now holds {store.count()} tracks.")
+    elif args.command == 'export':
+        count = EXPORTERS[args.format](store, args.output, **_filters(args))
+        print(f"Exported {count} tracks to {args.output}.")
+        if args.snapshot:
+            from snapshot import write_manifest
+            info = write_manifest(store.query(**_filters(args)), source=args.output)
+            print(f"Recorded snapshot {info['id'][:12]} of {info['records']} tracks.")
+    elif args.command == 'sections':
+        if args.rebuild:
+            print(f"Parsed {store.rebuild_sections()} sections.")
+        filters = {'section_type': args.section_type, 'performer': args.performer, 'artist': args.artist}
+        if args.output:
+            print(f"Exported {store.export_sections(args.output, **filters)} sections to {args.output}.")
+        elif not args.rebuild or any(filters.values()):
+            for section in store.sections(with_text=args.text, **filters):
+                print(f"{section['artist']}\t{section['track_name']}\t{section['label']}")
+                if args.text:
+                    print(section['text'] + '\n')
+    elif args.command == 'compress':
+        try:
+            stats = store.compress_lyrics(args.dict_size, args.samples)
+        except ValueError as e:
+            # Too few lyrics to train a dictionary; the store is left as it was
+            store.close()
+            parser.error(str(e))
+        ratio = stats['text_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        print(f"Compressed lyrics of {stats['tracks']} tracks with dictionary {stats['dict_id']}: "
+              f"{stats['text_bytes']} -> {stats['stored_bytes']} bytes ({ratio:.1f}x).")
+    else:
+        fields = args.fields.split(',')
+        for record in store.query(columns=fields, **_filters(args)):
+            print('\t'.join(str(record[field]) for field in fields))
+
+    store.close()
+
+if __name__ == "__main__":
+    main()
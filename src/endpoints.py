@@ -0,0 +1,95 @@
+import os
+import logging
+from dotenv import load_dotenv
+
+# Load environment variables from a .env file (if using one)
+load_dotenv()
+
+# -------------------- Configuration --------------------
+
+# Base URL of a local mock server (see mock_server.py). When set, every
+# provider root below defaults to the matching route on that server.
+MOCK_SERVER_URL = os.getenv('POPLYRICS_MOCK_URL', '').rstrip('/')
+
+
+def _root(env_name, real_url, mock_path):
+    """
+    Resolves a provider root URL: explicit env override, then mock server, then the real API.
+    """
+    override = os.getenv(env_name)
+    if override:
+        return override
+    if MOCK_SERVER_URL:
+        return f"{MOCK_SERVER_URL}/{mock_path}"
+    return real_url
+
+
+# Spotify Web API
+SPOTIFY_API_PREFIX = _root('SPOTIFY_API_PREFIX', 'https://api.spotify.com/v1/', 'spotify/v1/')
+SPOTIFY_TOKEN_URL = _root('SPOTIFY_TOKEN_URL', 'https://accounts.spotify.com/api/token', 'spotify/api/token')
+
+# Genius API, public (web app) API and song pages
+GENIUS_WEB_HOST = 'https://genius.com/'
+GENIUS_API_ROOT = _root('GENIUS_API_ROOT', 'https://api.genius.com/', 'genius/api/')
+GENIUS_PUBLIC_API_ROOT = _root('GENIUS_PUBLIC_API_ROOT', 'https://genius.com/api/', 'genius/public/')
+GENIUS_WEB_ROOT = _root('GENIUS_WEB_ROOT', GENIUS_WEB_HOST, 'genius/web/')
+
+# Musixmatch API
+MUSIXMATCH_API_ROOT = _root('MUSIXMATCH_API_ROOT', 'https://api.musixmatch.com/ws/1.1/', 'musixmatch/ws/1.1/')
+
+# -------------------- Functions --------------------
+
+def configure_spotify_client(sp_client, auth_manager=None):
+    """
+    Points an authenticated spotipy client (and its auth manager) at the configured Spotify roots.
+
+    Parameters:
+    - sp_client (spotipy.Spotify): Spotify client to reconfigure.
+    - auth_manager (SpotifyClientCredentials): Auth manager whose token URL should be redirected.
+
+    Returns:
+    - spotipy.Spotify: The same client, for chaining.
+    """
+    sp_client.prefix = SPOTIFY_API_PREFIX
+    auth_manager = auth_manager or getattr(sp_client, 'auth_manager', None)
+    if auth_manager is not None:
+        auth_manager.OAUTH_TOKEN_URL = SPOTIFY_TOKEN_URL
+    if MOCK_SERVER_URL:
+        logging.info("Spotify client pointed at %s.", SPOTIFY_API_PREFIX)
+    return sp_client
+
+
+def configure_genius_client(genius_client):
+    """
+    Points a lyricsgenius client at the configured Genius roots.
+
+    Song URLs returned by the API keep their https://genius.com/ form, which is what
+    lyricsgenius strips before requesting a page from WEB_ROOT.
+
+    Parameters:
+    - genius_client (lyricsgenius.Genius): Genius client to reconfigure.
+
+    Returns:
+    - lyricsgenius.Genius: The same client, for chaining.
+    """
+    genius_client.API_ROOT = GENIUS_API_ROOT
+    genius_client.PUBLIC_API_ROOT = GENIUS_PUBLIC_API_ROOT
+    genius_client.WEB_ROOT = GENIUS_WEB_ROOT
+    if MOCK_SERVER_URL:
+        logging.info("Genius client pointed at %s.", GENIUS_API_ROOT)
+    return genius_client
+
+
+def genius_web_url(song_url):
+    """
+    Rewrites a canonical https://genius.com/ song URL onto the configured web root.
+
+    Parameters:
+    - song_url (str): Song page URL as returned by the Genius API.
+
+    Returns:
+    - str: URL to fetch the page from.
+    """
+    if song_url and song_url.startswith(GENIUS_WEB_HOST):
+        return GENIUS_WEB_ROOT + song_url[len(GENIUS_WEB_HOST):]
+    return song_url
@@ -0,0 +1,229 @@
+"""
+Constant-memory CSV and XLSX exports for spreadsheet users.
+
+Records are streamed from the dataset store (or any iterable of records) and written row
+by row: RFC 4180 CSV through the csv module, and XLSX through openpyxl's write-only mode.
+List fields (songwriters, genre) can be joined into one cell, exploded into one row per
+value, or spread over a fixed number of columns.
+
+    python exporter.py --format csv --output result.csv --songwriters explode
+    python exporter.py --format xlsx --output result.xlsx --genre columns:3
+"""
+import argparse
+import csv
+import itertools
+import logging
+import re
+
+from dataset_store import DatasetStore, DATASET_DB, FIELDS, LIST_FIELDS
+from track_io import write_atomic, write_atomic_path
+
+# -------------------- Configuration --------------------
+
+# List handling modes
+JOIN = 'join'
+EXPLODE = 'explode'
+COLUMNS = 'columns'
+
+DEFAULT_SEPARATOR = '; '
+DEFAULT_LIST_COLUMNS = 3
+
+# Excel limits
+XLSX_MAX_CELL_CHARS = 32767
+XLSX_MAX_ROWS = 1048576
+
+# Control characters that XLSX (XML 1.0) cannot store
+ILLEGAL_XLSX_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# -------------------- Row Layout --------------------
+
+class ListLayout:
+    """
+    How one list field is laid out in rows.
+
+    Parameters:
+    - mode (str): 'join', 'explode' or 'columns'.
+    - width (int): Number of columns for 'columns' mode.
+    - separator (str): Separator for 'join' mode.
+    """
+
+    def __init__(self, mode=JOIN, width=DEFAULT_LIST_COLUMNS, separator=DEFAULT_SEPARATOR):
+        if mode not in (JOIN, EXPLODE, COLUMNS):
+            raise ValueError(f"Unknown list mode: {mode}")
+        self.mode = mode
+        self.width = width
+        self.separator = separator
+        self.truncated = 0
+
+    @classmethod
+    def parse(cls, spec, separator=DEFAULT_SEPARATOR):
+        """
+        Parses 'join', 'explode' or 'columns[:N]'.
+        """
+        mode, _, width = spec.partition(':')
+        return cls(mode, int(width) if width else DEFAULT_LIST_COLUMNS, separator)
+
+    def headers(self, field):
+        if self.mode == COLUMNS:
+            return [f"{field}_{i}" for i in range(1, self.width + 1)]
+        return [field]
+
+    def cells(self, values):
+        """
+        Returns the cell groups for a list value: one group per output row (explode) or a single group.
+        """
+        values = [v for v in (values or []) if v is not None]
+        if self.mode == JOIN:
+            return [[self.separator.join(values)]]
+        if self.mode == EXPLODE:
+            return [[v] for v in values] or [[None]]
+        if len(values) > self.width:
+            self.truncated += 1
+        padded = values[:self.width] + [None] * (self.width - min(len(values), self.width))
+        return [padded]
+
+
+class RowBuilder:
+    """
+    Turns records into flat rows according to per-field list layouts.
+
+    When several list fields are exploded, a record yields the cartesian product of their values.
+    """
+
+    def __init__(self, fields=FIELDS, layouts=None):
+        self.fields = list(fields)
+        self.layouts = {field: (layouts or {}).get(field) or ListLayout() for field in self.fields if field in LIST_FIELDS}
+
+    def headers(self):
+        headers = []
+        for field in self.fields:
+            headers.extend(self.layouts[field].headers(field) if field in self.layouts else [field])
+        return headers
+
+    def rows(self, record):
+        groups = []
+        for field in self.fields:
+            if field in self.layouts:
+                groups.append(self.layouts[field].cells(record.get(field)))
+            else:
+                groups.append([[record.get(field)]])
+        for combination in itertools.product(*groups):
+            yield [cell for group in combination for cell in group]
+
+# -------------------- Writers --------------------
+
+def write_csv(records, path, builder, bom=False):
+    """
+    Streams records to an RFC 4180 CSV file (CRLF line endings, minimal quoting).
+
+    Returns:
+    - int: Number of data rows written.
+    """
+    def write(f):
+        count = 0
+        writer = csv.writer(f, lineterminator='\r\n', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(builder.headers())
+        for record in records:
+            for row in builder.rows(record):
+                writer.writerow(['' if cell is None else cell for cell in row])
+                count += 1
+        return count
+    return write_atomic(path, write, newline='', encoding='utf-8-sig' if bom else 'utf-8')
+
+
+def _xlsx_cell(value, stats):
+    if isinstance(value, str):
+        value = ILLEGAL_XLSX_CHARS.sub('', value)
+        if len(value) > XLSX_MAX_CELL_CHARS:
+            stats['truncated_cells'] += 1
+            value = value[:XLSX_MAX_CELL_CHARS]
+    return value
+
+
+def write_xlsx(records, path, builder, sheet_title='tracks'):
+    """
+    Streams records to an XLSX workbook using openpyxl's write-only mode.
+
+    Cells longer than Excel's limit are truncated, and a new sheet is started whenever a
+    sheet reaches Excel's row limit.
+
+    Returns:
+    - int: Number of data rows written.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    headers = builder.headers()
+    stats = {'truncated_cells': 0}
+    sheet, sheet_rows, sheet_index, count = None, XLSX_MAX_ROWS, 0, 0
+    for record in records:
+        for row in builder.rows(record):
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheet_index += 1
+                sheet = workbook.create_sheet(sheet_title if sheet_index == 1 else f"{sheet_title}_{sheet_index}")
+                sheet.append(headers)
+                sheet_rows = 1
+            sheet.append([_xlsx_cell(cell, stats) for cell in row])
+            sheet_rows += 1
+            count += 1
+    if sheet is None:
+        workbook.create_sheet(sheet_title).append(headers)
+
+    write_atomic_path(path, workbook.save)
+    if stats['truncated_cells']:
+        logging.warning("Truncated %s cells to %s characters in %s.", stats['truncated_cells'], XLSX_MAX_CELL_CHARS, path)
+    return count
+
+
+def export(records, path, fmt='csv', fields=FIELDS, layouts=None, bom=False):
+    """
+    Exports an iterable of dataset records to CSV or XLSX.
+
+    Parameters:
+    - records (iterable of dict): Records, consumed once.
+    - path (str): Output path.
+    - fmt (str): 'csv' or 'xlsx'.
+    - fields (list of str): Columns to export, in order.
+    - layouts (dict): Field name -> ListLayout for list fields (default: join).
+    - bom (bool): Prefix CSV output with a UTF-8 BOM so Excel detects the encoding.
+
+    Returns:
+    - int: Number of data rows written.
+    """
+    builder = RowBuilder(fields, layouts)
+    if fmt == 'csv':
+        count = write_csv(records, path, builder, bom=bom)
+    elif fmt == 'xlsx':
+        count = write_xlsx(records, path, builder)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    for field, layout in builder.layouts.items():
+        if layout.truncated:
+            logging.warning("%s records had more than %s %s values; extras dropped.", layout.truncated, layout.width, field)
+    logging.info("Exported %s rows to %s.", count, path)
+    return count
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the dataset to CSV or XLSX.")
+    parser.add_argument('--store', default=DATASET_DB, help="Dataset store to export from")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--fields', default=','.join(FIELDS), help="Comma-separated columns")
+    parser.add_argument('--songwriters', default=JOIN, help="join, explode or columns[:N]")
+    parser.add_argument('--genre', default=JOIN, help="join, explode or columns[:N]")
+    parser.add_argument('--separator', default=DEFAULT_SEPARATOR, help="Separator for joined lists")
+    parser.add_argument('--bom', action='store_true', help="Write a UTF-8 BOM (CSV only)")
+    args = parser.parse_args()
+
+    fields = args.fields.split(',')
+    layouts = {'songwriters': ListLayout.parse(args.songwriters, args.separator),
+               'genre': ListLayout.parse(args.genre, args.separator)}
+    store = DatasetStore(args.store)
+    count = export(store.query(columns=fields), args.output, args.format, fields, layouts, bom=args.bom)
+    store.close()
+    print(f"Exported {count} rows to {args.output}.")
+
+if __name__ == "__main__":
+    main()
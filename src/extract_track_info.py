@@ -1,5 +1,7 @@
 import json
 
+from track_io import iter_tracks
+
 def extract_track_info(file_path):
     """
     Extracts all track names and their corresponding artists from the given JSON file.
@@ -11,11 +13,9 @@ def extract_track_info(file_path):
         list of tuples: A list where each tuple contains (track_name, artist).
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
         track_info = [
             (track.get('track_name'), track.get('artist'))
-            for track in data
+            for track in iter_tracks(file_path, fields=['track_name', 'artist'])
             if 'track_name' in track and 'artist' in track
         ]
         return track_info
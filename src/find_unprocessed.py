@@ -1,3 +1,14 @@
+from search_planner import normalize_text
+from structured_log import iter_events
+
+def track_keys(artist, track_name):
+    """
+    Returns (full key, title key). Spotify track IDs pass through normalization unchanged
+    apart from case, so ID lines match the IDs fix.py logs for them.
+    """
+    title_key = normalize_text(track_name)
+    return (f"{normalize_text(artist)} - {title_key}" if artist else None), title_key
+
 def extract_tracks_from_file(file_path):
     with open(file_path, 'r') as file:
         lines = file.readlines()
@@ -5,29 +16,46 @@ def extract_tracks_from_file(file_path):
     return tracks
 
 def extract_processed_tracks_from_log(log_path):
+    """
+    Returns (artist, track name) of every repair attempt in a fix.py log. ID jobs are
+    named by their Spotify track ID and have no artist.
+    """
     processed_tracks = []
-    with open(log_path, 'r') as log_file:
-        for line in log_file:
-            if "Processing track:" in line:
-                # Extract the track name from the log line
-                track_name = line.split("Processing track:")[-1].strip()
-                processed_tracks.append(track_name)
+    for record in iter_events(log_path, 'attempt'):
+        processed_tracks.append((record.get('artist'), record.get('track') or record.get('spotify_track_id')))
     return processed_tracks
 
 def find_unprocessed_tracks(defective_tracks, processed_tracks):
-    unprocessed_tracks = [track for track in defective_tracks if track not in processed_tracks]
+    """
+    Returns the defective-list lines ("Artist - Title", "Title" or Spotify ID) that no
+    attempted (artist, title) covers. Lookups are hash-set probes on normalized keys.
+    """
+    processed_full, processed_titles = set(), set()
+    for artist, track_name in processed_tracks:
+        full_key, title_key = track_keys(artist, track_name)
+        if full_key:
+            processed_full.add(full_key)
+        processed_titles.add(title_key)
+
+    unprocessed_tracks = []
+    for track in defective_tracks:
+        artist, _, track_name = track.partition(' - ') if ' - ' in track else ('', '', track)
+        full_key, title_key = track_keys(artist, track_name)
+        if (full_key in processed_full) if full_key else (title_key in processed_titles):
+            continue
+        unprocessed_tracks.append(track)
     return unprocessed_tracks
 
 # File paths
 defective_tracks_file = 'defective_tracks.txt'
-log_file = 'fix_tracks.log'
+log_file = 'fix_tracks.jsonl'
 
 # Extract tracks
 defective_tracks = extract_tracks_from_file(defective_tracks_file)
 processed_tracks = extract_processed_tracks_from_log(log_file)
 
 print(f"Total tracks in defective_tracks.txt: {len(defective_tracks)}")
-print(f"Total processed tracks in fix_tracks.log: {len(processed_tracks)}")
+print(f"Total processed tracks in {log_file}: {len(processed_tracks)}")
 
 # Find unprocessed tracks
 unprocessed_tracks = find_unprocessed_tracks(defective_tracks, processed_tracks)
@@ -40,6 +68,6 @@ print("\nAll tracks in defective_tracks.txt:")
 for track in defective_tracks:
     print(track)
 
-print("\nAll processed tracks in fix_tracks.log:")
-for track in processed_tracks:
-    print(track)
+print(f"\nAll processed tracks in {log_file}:")
+for artist, track_name in processed_tracks:
+    print(f"{track_name} by {artist}")
@@ -1,144 +1,275 @@
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-import lyricsgenius
-import json
-from dotenv import load_dotenv
-import os
+import argparse
 import logging
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("fix_tracks.log"),
-        logging.StreamHandler()
-    ]
-)
-
-# Spotipy API credentials
-SPOTIPY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
-SPOTIPY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
-
-# Genius API credentials
-GENIUS_ACCESS_TOKEN = os.getenv('GENIUS_API_TOKEN')
-
-# Initialize Spotify and Genius API clients
-spotify = spotipy.Spotify(auth_manager=SpotifyClientCredentials(client_id=SPOTIPY_CLIENT_ID,
-                                                                client_secret=SPOTIPY_CLIENT_SECRET))
-genius = lyricsgenius.Genius(GENIUS_ACCESS_TOKEN)
-
-# Function to fetch genres from Genius
-def fetch_genres_from_genius(artist_name):
-    # Placeholder for fetching genres from Genius
-    # You might need to use another API or a different method to get genres
-    return ["pop"]  # Default genre
-
-# Function to clean lyrics
-def clean_lyrics(lyrics, song_title):
-    start_idx = lyrics.find('[')
-    if start_idx != -1:
-        lyrics = lyrics[start_idx:]
-    else:
-        logging.warning(f"Lyrics for song '{song_title}' do not contain session headers.")
-        return lyrics.strip()
-
-    lines = lyrics.split('\n')
-
-    unwanted_languages = ['Trke', 'Español', 'Português', 'Italiano', 'Deutsch', 'Српски', 
-                          'Franais', 'Türkçe', 'Ελληνικά', 'Français', 'فارسی', 'العربية']
-
-    unwanted_promotions = [r'See .* LiveGet tickets as low as', r'You might also like']
-
-    cleaned_lines = []
-    for line in lines:
-        if line.startswith('Translations') or any(lang in line for lang in unwanted_languages):
-            continue
-        if any(re.search(pattern, line) for pattern in unwanted_promotions):
-            continue
-        line = re.sub(r'\d+Embed', '', line)
-        line = re.sub(r'\d+ Contributors', '', line)
-        cleaned_lines.append(line)
-
-    cleaned_lyrics = '\n'.join(cleaned_lines).strip()
-
-    if not cleaned_lyrics.startswith('['):
-        logging.warning(f"Lyrics for song '{song_title}' do not start with '[' after cleaning.")
-        return lyrics.strip()
-
-    unwanted_patterns = [r'^Top canciones de', r'^New Music Friday']
-    if any(re.match(pattern, cleaned_lyrics, flags=re.IGNORECASE) for pattern in unwanted_patterns):
-        logging.warning(f"Lyrics for song '{song_title}' contain unwanted content.")
-        return lyrics.strip()
-
-    if len(cleaned_lyrics) < 100:
-        logging.warning(f"Lyrics for song '{song_title}' are too short after cleaning.")
-        return lyrics.strip()
-
-    return cleaned_lyrics
-
-# Read defective tracks from the text file
-defective_tracks = []
-with open('defective_tracks.txt', 'r') as f:
-    defective_tracks = f.readlines()
-
-# Open the JSON file in write mode to start with an empty list
-with open('fixed_tracks.json', 'w') as f:
-    json.dump([], f)
-
-# Iterate through each line in the file
-for line in defective_tracks:
-    # Strip whitespace and split by hyphen to get artist and track name
-    parts = line.strip().split(' - ')
-    if len(parts) == 2:
-        artist_name = parts[0].strip()
-        track_name = parts[1].strip()
-
-        logging.info(f"Processing track: {track_name} by {artist_name}")
-
-        try:
-            # Fetch the track information from Spotify
-            results = spotify.search(q=f"track:{track_name} artist:{artist_name}", type="track", limit=1)
-            tracks = results['tracks']['items']
-
-            if tracks:
-                track = tracks[0]
-
-                # Extract required information
-                track_data = {
-                    "track_name": track['name'],
-                    "album": track['album']['name'],
-                    "release_date": track['album']['release_date'],
-                    "song_length": f"{int(track['duration_ms'] // 60000)}:{int((track['duration_ms'] % 60000) / 1000):02d}",
-                    "popularity": track['popularity'],
-                    "songwriters": [artist['name'] for artist in track['artists']],
-                    "artist": track['artists'][0]['name']
-                }
-
-                # Fetch the lyrics from Genius
-                song = genius.search_song(track_name, artist_name)
-                if song:
-                    logging.info(f"Genius URL: {song.url}")
-                    track_data['lyrics'] = clean_lyrics(song.lyrics, track_name)
-                else:
-                    track_data['lyrics'] = "Lyrics not found."
-
-                # Fetch genres from Genius
-                track_data['genre'] = fetch_genres_from_genius(artist_name)
-
-                # Append track data to the JSON file
-                with open('fixed_tracks.json', 'r+') as f:
-                    data = json.load(f)
-                    data.append(track_data)
-                    f.seek(0)
-                    json.dump(data, f, indent=4)
-
-                logging.info(f"Successfully processed and saved track: {track_name} by {artist_name}")
+from tqdm import tqdm
+
+from main import enrich_track, extract_track_data, spotify_call, cached_track, negative_cache, DATASET_JSON, sp
+from journal import JournalWriter, completed_keys, compact_journal
+from resilience import CircuitOpenError
+from search_planner import normalize_text
+from structured_log import configure_logging, log_context
+from status import build_status, start_status_server
+from track_io import iter_tracks
+
+# Configure logging (replaces the dataset_builder.jsonl handler that importing main set up)
+FIX_LOG = 'fix_tracks.jsonl'
+configure_logging(FIX_LOG, console=True)
+
+# File paths
+DEFECTIVE_TRACKS_TXT = 'defective_tracks.txt'
+FIXED_TRACKS_JSON = 'fixed_tracks.json'
+
+# Bounded concurrency: worker threads, and how many tracks may be queued ahead of them
+DEFAULT_WORKERS = 8
+MAX_PENDING_PER_WORKER = 4
+
+# Spotify track references accepted in the track list: URI, URL or bare ID
+SPOTIFY_TRACK_RE = re.compile(r'^(?:spotify:track:|https?://open\.spotify\.com/track/)?([0-9A-Za-z]{22})(?:\?.*)?$')
+
+# Journal entry statuses
+STATUS_FIXED = 'fixed'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_UNAVAILABLE = 'unavailable'
+STATUS_ERROR = 'error'
+
+# -------------------- Selecting Tracks --------------------
+
+def track_key(artist, track_name, spotify_track_id=None):
+    """
+    Job key: the Spotify track ID when known, so respelled titles still match, else the
+    normalized "artist - title".
+    """
+    if spotify_track_id:
+        return f"spotify:{spotify_track_id}"
+    return f"{normalize_text(artist)} - {normalize_text(track_name)}"
+
+
+def record_key(record):
+    """
+    Key of a repaired record: its Spotify track ID when it has one, else its name.
+    """
+    return track_key(record.get('artist'), record.get('track_name'), record.get('spotify_track_id'))
+
+
+def record_identities(record):
+    """
+    Every job key a repaired record can have been journaled under.
+    """
+    keys = {track_key(record.get('artist'), record.get('track_name'))}
+    if record.get('spotify_track_id'):
+        keys.add(track_key(None, None, record['spotify_track_id']))
+    return keys
+
+
+def tracks_from_list(path=DEFECTIVE_TRACKS_TXT):
+    """
+    Yields repair jobs from a text file with one "Artist - Title", bare "Title" or Spotify
+    track ID / URI / URL per line.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            match = SPOTIFY_TRACK_RE.match(line)
+            if match:
+                yield {'key': track_key(None, None, match.group(1)), 'artist': None, 'track_name': None,
+                       'spotify_track_id': match.group(1), 'record': None}
+                continue
+            if ' - ' in line:
+                artist_name, track_name = (part.strip() for part in line.split(' - ', 1))
             else:
-                logging.warning(f"Track not found on Spotify: {track_name} by {artist_name}")
+                artist_name, track_name = None, line
+            yield {'key': track_key(artist_name or '', track_name), 'artist': artist_name,
+                   'track_name': track_name, 'record': None}
+
+
+def tracks_from_dataset(path=DATASET_JSON, null_lyrics=True, min_lyrics_length=0):
+    """
+    Yields repair jobs for dataset records with null or too-short lyrics.
+
+    Parameters:
+    - path (str): Dataset JSON file.
+    - null_lyrics (bool): Select records whose lyrics are null.
+    - min_lyrics_length (int): Select records whose lyrics are shorter than this (0 disables).
+    """
+    for record in iter_tracks(path):
+        lyrics = record.get('lyrics')
+        if (null_lyrics and lyrics is None) or (lyrics is not None and len(lyrics) < min_lyrics_length):
+            yield {'key': track_key(record.get('artist', ''), record.get('track_name', ''), record.get('spotify_track_id')),
+                   'artist': record.get('artist'), 'track_name': record.get('track_name'),
+                   'spotify_track_id': record.get('spotify_track_id'), 'record': record}
+
+# -------------------- Repairing --------------------
+
+def lookup_spotify_track(artist_name, track_name, spotify_track_id=None):
+    """
+    Finds a track on Spotify and returns it in the dataset schema, or None.
+
+    A known track ID is fetched directly; otherwise the track is searched by name.
+    """
+    if spotify_track_id:
+        track = cached_track(spotify_track_id, sp)
+    else:
+        query = f"track:{track_name} artist:{artist_name}" if artist_name else f"track:{track_name}"
+        results = spotify_call(sp.search, q=query, type="track", limit=1)
+        tracks = results['tracks']['items']
+        if not tracks:
+            return None
+        track = tracks[0]
+    if not track:
+        return None
+    track_data = extract_track_data(track)
+    if track_data:
+        track_data['artist'] = artist_name or track['artists'][0]['name']
+    return track_data
+
+
+def repair_track(job, retry_misses=False):
+    """
+    Re-runs the main enrichment path for one job.
+
+    Returns:
+    - tuple: (status, structured track or None, error message or None)
+    """
+    with log_context(stage='repair', artist=job['artist'], track=job['track_name'],
+                     spotify_track_id=job.get('spotify_track_id')):
+        return _repair_track(job, retry_misses)
+
+
+def _repair_track(job, retry_misses):
+    # Jobs listed by Spotify ID are named by it until the track is fetched
+    artist_name, track_name = job['artist'], job['track_name'] or job.get('spotify_track_id')
+    logging.info("Processing track: %s by %s", track_name, artist_name, extra={'event': 'attempt'})
+    try:
+        track_data = job['record'] or lookup_spotify_track(artist_name, track_name, job.get('spotify_track_id'))
+        if not track_data:
+            logging.warning("Track not found on Spotify: %s by %s", track_name, artist_name)
+            return STATUS_NOT_FOUND, None, None
+
+        if retry_misses:
+            negative_cache.forget(track_data['artist'], track_data['track_name'])
+        structured_track = enrich_track(track_data, raise_on_error=True)
+        if structured_track is None:
+            return STATUS_NOT_FOUND, None, None
+        if structured_track['lyrics'] is None:
+            logging.warning("Lyrics not found: %s by %s", track_name, artist_name)
+            return STATUS_NOT_FOUND, None, None
+        logging.info("Successfully processed and saved track: %s by %s", track_name, artist_name,
+                     extra={'event': 'repaired'})
+        return STATUS_FIXED, structured_track, None
+
+    except CircuitOpenError as e:
+        logging.error("Provider unavailable, skipping '%s' by '%s': %s", track_name, artist_name, e)
+        return STATUS_UNAVAILABLE, None, str(e)
+    except Exception as e:
+        # Unexpected failures are usually deterministic; they are journaled, not retried every run
+        logging.exception("Error processing track '%s' by '%s': %s", track_name, artist_name, e)
+        return STATUS_ERROR, None, f"{type(e).__name__}: {e}"
+
+
+def run_repairs(jobs, journal_path, workers=DEFAULT_WORKERS, retry_misses=False, retry_errors=False):
+    """
+    Repairs jobs concurrently, journaling each result as soon as it completes.
+
+    Jobs already repaired in the journal (from an interrupted run) are skipped, as are jobs
+    journaled as not found unless retry_misses is set, and jobs that failed with an
+    unexpected error (journaled with its message) unless retry_errors is set. Jobs that
+    failed because a provider was unavailable are retried.
+
+    Returns:
+    - dict: Count of jobs per status.
+    """
+    skip = {STATUS_FIXED}
+    if not retry_misses:
+        skip.add(STATUS_NOT_FOUND)
+    if not retry_errors:
+        skip.add(STATUS_ERROR)
+    done = completed_keys(journal_path, skip)
+    counts = {STATUS_FIXED: 0, STATUS_NOT_FOUND: 0, STATUS_UNAVAILABLE: 0, STATUS_ERROR: 0, 'skipped': 0}
+    counts_lock = threading.Lock()
+    max_pending = workers * MAX_PENDING_PER_WORKER
+
+    with JournalWriter(journal_path) as journal, ThreadPoolExecutor(max_workers=workers) as executor, \
+            tqdm(desc="Repairing tracks") as progress:
+
+        def finish(future, job):
+            status, record, error = future.result()
+            if status != STATUS_UNAVAILABLE:
+                journal.append(job['key'], status, record, error=error)
+            with counts_lock:
+                counts[status] += 1
+            build_status.done('repair', failed=status != STATUS_FIXED)
+            progress.update(1)
+
+        pending = {}
+        build_status.add_source('repair_pool', lambda: {'workers': workers, 'in_flight': len(pending)})
+        for job in jobs:
+            if job['key'] in done:
+                counts['skipped'] += 1
+                continue
+            done.add(job['key'])
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    finish(future, pending.pop(future))
+            pending[executor.submit(repair_track, job, retry_misses)] = job
+            build_status.queued('repair')  # Jobs are read lazily; the ETA covers those queued so far
+
+        for future in list(pending):
+            future.result()
+            finish(future, pending.pop(future))
+
+    return counts
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair defective tracks by re-running the enrichment pipeline.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--tracks', default=DEFECTIVE_TRACKS_TXT,
+                        help="Text file with one 'Artist - Title' per line")
+    source.add_argument('--dataset', help="Dataset JSON to select tracks from (see --null-lyrics/--min-lyrics-length)")
+    parser.add_argument('--null-lyrics', action='store_true', help="With --dataset: select tracks with null lyrics")
+    parser.add_argument('--min-lyrics-length', type=int, default=0,
+                        help="With --dataset: select tracks whose lyrics are shorter than this")
+    parser.add_argument('--output', default=FIXED_TRACKS_JSON)
+    parser.add_argument('--journal', help="Journal path (default: <output>.journal.jsonl)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--fresh', action='store_true', help="Discard an existing journal instead of resuming")
+    parser.add_argument('--retry-misses', action='store_true',
+                        help="Search Genius again even for songs cached as not found")
+    parser.add_argument('--retry-errors', action='store_true',
+                        help="Retry tracks journaled with an unexpected error")
+    parser.add_argument('--status-port', type=int, default=int(os.getenv('STATUS_PORT', 0)) or None,
+                        help="Serve live progress at http://127.0.0.1:<port>/status")
+    args = parser.parse_args()
+
+    if args.status_port:
+        start_status_server(args.status_port)
+
+    journal_path = args.journal or args.output + '.journal.jsonl'
+    if args.fresh and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+    if args.dataset:
+        if not args.null_lyrics and not args.min_lyrics_length:
+            parser.error("--dataset needs --null-lyrics and/or --min-lyrics-length")
+        jobs = tracks_from_dataset(args.dataset, args.null_lyrics, args.min_lyrics_length)
+    else:
+        jobs = tracks_from_list(args.tracks)
+
+    counts = run_repairs(jobs, journal_path, workers=args.workers, retry_misses=args.retry_misses,
+                         retry_errors=args.retry_errors)
+    # Earlier repairs in the output (possibly from runs without a journal) are kept
+    base_records = ((record_key(record), record) for record in iter_tracks(args.output)) \
+        if os.path.exists(args.output) else None
+    written = compact_journal(journal_path, args.output, base_records, record_keys=record_identities)
+    logging.info("Repair finished: %s. %s tracks written to %s.", counts, written, args.output)
 
-        except Exception as e:
-            logging.error(f"Error processing track '{track_name}' by '{artist_name}': {e}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Append-only JSON Lines journal for long-running batch jobs.
+
+Each processed item is appended as one line and flushed to disk immediately, so a crash
+loses at most the line being written. On restart, completed_keys() tells the job what to
+skip, and compact_journal() turns the journal into the final JSON array atomically.
+"""
+import json
+import logging
+import os
+import threading
+
+from track_io import write_atomic
+
+# -------------------- Writing --------------------
+
+class JournalWriter:
+    """
+    Thread-safe appender for journal entries.
+
+    Entry format: {"key": <str>, "status": <str>, "record": <dict or null>}, plus
+    "error": <str> for entries that record a failure.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self._repair_tail()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _repair_tail(self):
+        """
+        Makes sure a torn last line from a previous crash can't merge with the next entry.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    def append(self, key, status, record=None, error=None):
+        entry = {'key': key, 'status': status, 'record': record}
+        if error is not None:
+            entry['error'] = error
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# -------------------- Reading --------------------
+
+def iter_journal(path):
+    """
+    Yields journal entries in write order, skipping a torn or corrupt line.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning("Skipping corrupt journal line %s in %s.", line_no, path)
+
+
+def completed_keys(path, statuses=None):
+    """
+    Returns the keys whose latest journal entry has one of the given statuses (any status
+    if statuses is None).
+    """
+    latest = {}
+    for entry in iter_journal(path):
+        latest[entry['key']] = entry.get('status')
+    return {key for key, status in latest.items() if statuses is None or status in statuses}
+
+
+def compact_journal(journal_path, output_path, base_records=None, record_keys=None):
+    """
+    Writes the journal's records to output_path as a JSON array.
+
+    The latest entry per key wins; entries without a record (e.g. not found) are dropped.
+    The output is written to a temporary file and atomically renamed into place.
+
+    Parameters:
+    - journal_path (str): Path to the journal.
+    - output_path (str): Path of the JSON array to produce.
+    - base_records (iterable of (key, dict)): Optional records to start from (e.g. an existing
+      output file); journal entries replace them by key.
+    - record_keys (callable): record -> keys identifying it (e.g. its Spotify ID and its
+      name); a journal record also replaces base records sharing any of these keys.
+
+    Returns:
+    - int: Number of records written.
+    """
+    latest = {}
+    owners = {}     # identifying key -> key in latest
+    for key, record in base_records or []:
+        latest[key] = record
+        for alias in (record_keys(record) if record_keys else ()):
+            owners[alias] = key
+    for entry in iter_journal(journal_path):
+        record = entry.get('record')
+        if record is None:
+            continue
+        for alias in (record_keys(record) if record_keys else ()):
+            owner = owners.get(alias)
+            if owner is not None and owner != entry['key']:
+                latest.pop(owner, None)
+            owners[alias] = entry['key']
+        latest[entry['key']] = record
+
+    def write(f):
+        f.write('[\n')
+        for i, record in enumerate(latest.values()):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(record, ensure_ascii=False, indent=4))
+        f.write('\n]\n')
+    write_atomic(output_path, write, fsync=True)
+    logging.info("Compacted %s into %s (%s records).", journal_path, output_path, len(latest))
+    return len(latest)
@@ -1,11 +1,12 @@
-import json
+from itertools import groupby
 
-# Load the JSON data from the file
-with open('./songs_by_artist.json', 'r') as file:
-    data = json.load(file)
+from track_io import iter_tracks
+
+# Stream the tracks; songs_by_artist.json keeps each artist's tracks together
+tracks = iter_tracks('./songs_by_artist.json', fields=['artist', 'track_name'])
 
 # Iterate through the artists and their tracks
-for artist, tracks in data.items():
+for artist, artist_tracks in groupby(tracks, key=lambda track: track['artist']):
     print(f"{artist}:")
-    for track in tracks:
+    for track in artist_tracks:
         print(f"  - {track['track_name']}")
\ No newline at end of file
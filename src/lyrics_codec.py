@@ -0,0 +1,134 @@
+"""
+Per-record zstd compression of lyrics with a dictionary trained on the corpus.
+
+Pop lyrics repeat the same section headers, hooks and phrasing across thousands of
+songs, so a single song compresses poorly on its own but very well against a shared
+dictionary of that common text. Each track's lyrics are compressed into one
+independent zstd frame: any record can be decoded on its own, in O(1), only when its
+lyrics are read. The frame header names the dictionary it was compressed with, so
+records written under an older dictionary stay readable after retraining.
+
+The dataset store (dataset_store.py) keeps its dictionaries in the database and uses
+this codec for the `lyrics` column once a dictionary has been trained:
+
+    python dataset_store.py compress
+
+zstandard is only needed once a store holds a dictionary.
+"""
+import os
+import threading
+
+# -------------------- Configuration --------------------
+
+# Dictionary size; zstd's default of 110 KiB suits corpora of short, similar texts
+DICT_SIZE = int(os.getenv('LYRICS_DICT_SIZE', str(110 * 1024)))
+
+COMPRESSION_LEVEL = int(os.getenv('LYRICS_ZSTD_LEVEL', '12'))
+
+# Lyrics sampled to train a dictionary, and the fewest zstd can train on reliably
+MAX_TRAINING_SAMPLES = 50000
+MIN_TRAINING_SAMPLES = 64
+
+# -------------------- Training --------------------
+
+def train_dictionary(samples, dict_size=DICT_SIZE):
+    """
+    Trains a zstd dictionary on lyrics texts.
+
+    Parameters:
+    - samples (list of str): Lyrics to train on.
+    - dict_size (int): Dictionary size in bytes.
+
+    Returns:
+    - bytes: The dictionary.
+
+    Raises:
+    - ValueError: With fewer than MIN_TRAINING_SAMPLES samples.
+    """
+    import zstandard
+
+    encoded = [sample.encode('utf-8') for sample in samples if sample]
+    if len(encoded) < MIN_TRAINING_SAMPLES:
+        raise ValueError(f"Need at least {MIN_TRAINING_SAMPLES} lyrics to train a dictionary, got {len(encoded)}")
+    return zstandard.train_dictionary(dict_size, encoded, level=COMPRESSION_LEVEL).as_bytes()
+
+# -------------------- Codec --------------------
+
+class LyricsCodec:
+    """
+    Compresses lyrics with the newest dictionary and decompresses frames of any known one.
+
+    Without a dictionary, lyrics are passed through as text. Values that are already text
+    (records written before compression was enabled) decode to themselves.
+
+    Parameters:
+    - dictionaries (dict): Dictionary ID -> dictionary bytes, oldest first.
+    - level (int): zstd compression level.
+    """
+
+    def __init__(self, dictionaries=None, level=COMPRESSION_LEVEL):
+        self.level = level
+        self.dictionaries = {}
+        self.current = None
+        self.local = threading.local()
+        for data in (dictionaries or {}).values():
+            self.add_dictionary(data)
+
+    def add_dictionary(self, data):
+        """
+        Makes a dictionary available for decoding and uses it for new records.
+
+        Returns:
+        - int: The zstd dictionary ID.
+        """
+        import zstandard
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dict_id = dictionary.dict_id()
+        self.dictionaries[dict_id] = dictionary
+        self.current = dict_id
+        # Compressors are built per thread and per dictionary
+        self.local = threading.local()
+        return dict_id
+
+    @property
+    def enabled(self):
+        return self.current is not None
+
+    def _compressor(self):
+        compressor = getattr(self.local, 'compressor', None)
+        if compressor is None:
+            import zstandard
+            compressor = self.local.compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self.dictionaries[self.current])
+        return compressor
+
+    def _decompressor(self, dict_id):
+        decompressors = getattr(self.local, 'decompressors', None)
+        if decompressors is None:
+            decompressors = self.local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            import zstandard
+            dictionary = self.dictionaries.get(dict_id) if dict_id else None
+            if dict_id and dictionary is None:
+                raise ValueError(f"Lyrics were compressed with unknown dictionary {dict_id}")
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    def compress(self, lyrics):
+        """
+        Returns the stored form of lyrics: a zstd frame (bytes), or the text itself without a dictionary.
+        """
+        if lyrics is None or not self.enabled:
+            return lyrics
+        return self._compressor().compress(lyrics.encode('utf-8'))
+
+    def decompress(self, value):
+        """
+        Returns the lyrics text of a stored value.
+        """
+        if value is None or isinstance(value, str):
+            return value
+        import zstandard
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        return self._decompressor(dict_id).decompress(value).decode('utf-8')
@@ -11,9 +11,26 @@ import logging
 from huggingface_hub import create_repo, upload_file
 from dotenv import load_dotenv
 import requests
-from bs4 import BeautifulSoup
-from requests.exceptions import ReadTimeout, ConnectionError, HTTPError
 from difflib import SequenceMatcher
+from endpoints import configure_spotify_client, configure_genius_client, genius_web_url, MOCK_SERVER_URL
+from resilience import (
+    call_with_retry, classify_error, RetryPolicy, CircuitOpenError,
+    SPOTIFY_HOST, GENIUS_HOST, RETRYABLE
+)
+from roster import load_roster, ARTIST_ROSTER
+from language_id import detect_language, is_translation_menu, drop_foreign_blocks
+from dataset_store import DatasetStore
+from track_io import iter_tracks
+from credits import songwriters_from_html, credits_from_api
+from providers import GeniusProvider, MusixmatchProvider, HedgedLookup, DEFAULT_PERCENTILE
+from structured_log import configure_logging, log_context
+from status import build_status, start_status_server
+from snapshot import write_manifest
+from spotify_cache import SpotifyCache, ARTIST_ALBUMS, ALBUM_TRACKS, TRACK
+from canonicalize import group_variants, collapse_summary, FAN_OUT, POLICIES, DEFAULT_POLICY
+from search_planner import (
+    plan_search_queries, NegativeResultCache, SearchResultCache, MISS_NO_RESULTS, MISS_MISMATCH, MISS_NON_SONG
+)
 
 
 # Load environment variables from a .env file (if using one)
@@ -21,13 +38,9 @@ load_dotenv()
 
 # -------------------- Configuration --------------------
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    filename='dataset_builder.log',
-    filemode='a',
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Set up logging: JSON Lines records written from a background thread (see structured_log.py)
+LOG_FILE = 'dataset_builder.jsonl'
+configure_logging(LOG_FILE)
 
 # Spotify API credentials from environment variables
 SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID', 'your_spotify_client_id')
@@ -39,6 +52,11 @@ GENIUS_API_TOKEN = os.getenv('GENIUS_API_TOKEN', 'your_genius_api_token')
 # Musixmatch API key from environment variables
 MUSIXMATCH_API_KEY = os.getenv('MUSIXMATCH_API_KEY', 'your_musixmatch_api_key')
 
+# Lyrics providers in order of preference, and the latency percentile of a provider after
+# which the next one is asked as well (see providers.py)
+LYRICS_PROVIDERS = [name.strip() for name in os.getenv('LYRICS_PROVIDERS', 'genius,musixmatch').split(',') if name.strip()]
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', DEFAULT_PERCENTILE))
+
 # Hugging Face credentials from environment variables
 HUGGINGFACE_USERNAME = os.getenv('HUGGINGFACE_USERNAME', 'your_username')
 REPO_NAME = os.getenv('REPO_NAME', 'pop-lyrics-dataset')
@@ -48,10 +66,35 @@ HF_TOKEN = os.getenv('HF_TOKEN', 'your_hf_token')
 SPOTIFY_MAX_RETRIES = 3
 SPOTIFY_BACKOFF_FACTOR = 2  # Exponential backoff factor
 
+# Genius API rate limit parameters
+GENIUS_MAX_RETRIES = 3
+GENIUS_BACKOFF_FACTOR = 2
+
+# Retries, Retry-After handling and circuit breaking live in resilience.py;
+# the client libraries' own retry loops are disabled so there is a single owner.
+SPOTIFY_RETRY_POLICY = RetryPolicy(max_attempts=SPOTIFY_MAX_RETRIES + 1, base_delay=SPOTIFY_BACKOFF_FACTOR)
+GENIUS_RETRY_POLICY = RetryPolicy(max_attempts=GENIUS_MAX_RETRIES + 1, base_delay=GENIUS_BACKOFF_FACTOR)
+
+# Search hits ranked per query, and the similarity both title and artist must reach
+GENIUS_CANDIDATES = 10
+GENIUS_MATCH_THRESHOLD = 0.8
+
+# Hits whose title contains one of these are skipped unless the searched title does too
+GENIUS_EXCLUDED_TERMS = ["(Remix)", "(Live)"]
+
+# Remove lyric blocks that look like translations (see language_id.foreign_blocks);
+# off by default, when they are only logged
+DROP_FOREIGN_BLOCKS = os.getenv('DROP_FOREIGN_BLOCKS', '').lower() in ('1', 'true', 'yes')
+
 # File paths
 TOP_TRACKS_JSON = 'top_tracks.json'
+# What to do with variants of an already enriched song (see canonicalize.py): 'fanout' or 'drop'
+VARIANT_POLICY = os.getenv('VARIANT_POLICY', DEFAULT_POLICY)
 DATASET_JSON = 'pop_lyrics_dataset.json'
 
+# Port of the live build status server (see status.py); unset to run without one
+STATUS_PORT = os.getenv('STATUS_PORT')
+
 # -------------------- Spotify API Setup --------------------
 
 # Create a custom session with increased timeouts
@@ -65,11 +108,13 @@ client_credentials_manager = SpotifyClientCredentials(
 sp = spotipy.Spotify(
     client_credentials_manager=client_credentials_manager,
     requests_session=session,
-    retries=SPOTIFY_MAX_RETRIES,
-    status_forcelist=[429, 500, 502, 503, 504],
-    backoff_factor=SPOTIFY_BACKOFF_FACTOR,
+    retries=0,
+    status_retries=0,
+    status_forcelist=[],  # Surface 429/5xx as SpotifyException for resilience.call_with_retry
     #timeout=(5, 30)  # (connect timeout, read timeout)
 )
+# Redirect to a local mock server or alternative roots when configured
+configure_spotify_client(sp, client_credentials_manager)
 
 # -------------------- Genius API Setup --------------------
 
@@ -77,117 +122,47 @@ sp = spotipy.Spotify(
 genius = Genius(
     GENIUS_API_TOKEN,
     timeout=15,
-    retries=3,
+    retries=0,  # Retries are handled by resilience.call_with_retry
     remove_section_headers=False,  # Retain session headers like [Chorus], [Verse 1], etc.
     skip_non_songs=False,
-    excluded_terms=["(Remix)", "(Live)"]
+    excluded_terms=GENIUS_EXCLUDED_TERMS
 )
+configure_genius_client(genius)
 
-# -------------------- Artists with Spotify IDs --------------------
-
-artists_with_ids = {
-    "Lady Gaga" : "1HY2Jd0NmPuamShAr6KMms",
-    "Hayd" : "1adGvsK8A0XG2D18ufk7fZ",
-    "Justin Bieber" : "1uNFoZAHBGtllmzznpCI3s",
-    "The Kid LAROI" : "2tIP7SsRs7vjIcLrU85W8J",
-    "Ed Sheeran" : "6eUKZXaKkcviH0Ku9w2n3V",
-    "Charlie Puth" : "6VuMaDnrHyPL1p4EHjYLi7",
-    "Shawn Mendes" : "7n2wHs1TKAczGzO7Dd2rGr",
-    "JVKE" : "164Uj4eKjl6zTBKfJLFKKK",
-    "Lauv" : "5JZ7CnR6gTvEMKX4g70Amv",
-    "Stephen Sanchez" : "5XKFrudbV4IiuE5WuTPRmT",
-    "Benson Boone" : "22wbnEMDvgVIAGdFeek6ET",
-    "Harry Styles" : "6KImCVD70vtIoJWnq6nGn3",
-    "Conan Gray" : "4Uc8Dsxct0oMqx0P6i60ea",
-    "Chappell Roan" : "7GlBOeep6PqTfFi59PTUUN",
-    "Halsey" : "26VFTg2z8YR0cCuwLzESi2",
-    "Sabrina Carpenter" : "74KM79TiuVKeVCqs8QtB0B",
-    "Taylor Swift" : "06HL4z0CvFAxyc27GXpf02",
-    "Ariana Grande" : "66CXWjxzNUsdJxJ2JdwvnR",
-    "Sasha Alex Sloan" : "4xnihxcoXWK3UqryOSnbw5",
-    "Ali Gatie" : "4rTv3Ejc7hKMtmoBOK1B4T",
-    "Bruno Mars" : "0du5cEVh5yTK9QJze8zA0C",
-    "Dua Lipa" : "6M2wZ9GZgrQXHCFfjv46we",
-    "Billie Eilish" : "6qqNVTkY8uBg9cP3Jd7DAH",
-    "Katy Perry" : "6jJ0s89eD6GaHleKKya26X",
-    "David Kushner" : "33NVpKoXjItPwUJTMZIOiY",
-    "Myles Smith" : "3bO19AOone0ubCsfDXDtYt",
-    "FINNEAS" : "37M5pPGs6V1fchFJSgCguX",
-    "Post Malone" : "246dkjvS1zLTtiykXe5h60",
-    "SZA" : "7tYKF4w9nC0nq9CsPZTHyP",
-    "Hozier" : "2FXC3k01G6Gw61bmprjgqS",
-    "The Weeknd" : "1Xyo4u8uXC1ZmMpatF05PJ",
-    "Coldplay" : "4gzpq5DPGxSnKTe4SA8HAU",
-    "Tate McRae" : "45dkTj5sMRSjrmBSBeiHym",
-    "Frank Ocean" : "2h93pZq0e7k5yf4dywlkpM",
-    "Alec Benjamin" : "5IH6FPUwQTxPSXurCrcIov",
-    "Cigarettes After Sex" : "1QAJqy2dA3ihHBFIHRphZj",
-    "Gracie Abrams" : "4tuJ0bMpJh08umKkEXKUI5",
-    "Olivia Rodrigo" : "1McMsnEElThX1knmY4oliG",
-    "Michael Jackson" : "3fMbdgg4jU18AjLCKBhRSm",
-    "Future" : "1RyvyyTE3xzB2ZywiAwp0i",
-    "Miley Cyrus" : "5YGY8feqx7naU7z4HrwZM6",
-    "Doja Cat" : "5cj0lLjcoR7YOSnhnX0Po5",
-    "Karol G" : "790FomKkXshlbRYZFtlgla",
-    "Jimin" : "1oSPZhvZMIrWW5I41kPkkY",
-    "Lana Del Rey" : "00FQb4jTyendYWaN8pK0wa",
-    "Melanie Martinez" : "63yrD80RY3RNEM2YDpUpO8",
-    "Jennifer Lopez" : "2DlGxzQSjYe5N6G9nkYghR",
-    "Beyoncé" : "6vWDO969PvNqNYHIOW5v0m",
-    "Madonna" : "6tbjWDEIzxoDsBA1FuhfPW",
-    "Britney Spears" : "26dSoYclwsYLMAKD3tpOr4",
-    "Justin Timberlake" : "31TPClRtHm23RisEBtV3X7",
-    "Elton John" : "3PhoLpVuITZKcymswpck5b",
-    "Celine Dion" : "4S9EykWXhStSc15wEx8QFK",
-    "Prince" : "3MHaV05u0io8fQbZ2XPtlC",
-    "The Beach Boys" : "3oDbviiivRWhXwIE8hxkVV",
-    "Selena Gomez" : "0C8ZW7ezQVs4URX5aX7Kqx",
-    "Janet Jackson" : "4qwGe91Bz9K2T8jXTZ815W",
-    "Adele" : "1d4uM0g9449nE9TV5KeWch",
-    "Backstreet Boys" : "5rSXSAkZ67PYJSvpUpkOr7",
-    "Christina Aguilera" : "1l7ZsJRRS8wlW3WfJfPfNS",
-    "Usher" : "23zg3TcAtWQy7J6upgbUnj",
-    "The Jackson 5" : "2iE18Oxc8YSumAU232n4rW",
-    "Pink" : "78rUTD7y6Cy67W1RVzYs7t",
-    "Kelly Clarkson" : "3BmGtnKgCSGYIUhmivXKWX",
-    "Jonas Brothers" : "7gOdHgIoIKoe4i9Tta6qdD",
-    "The Black Eyed Peas" : "1yxSLGMDHlW21z4YXirZDS",
-    "Spice Girls" : "0uq5PttqEjj3IH1bzwcrXF",
-    "Cher" : "72OaDtakiy6yFqkt4TsiFt",
-    "Shakira" : "0EmeFodog0BfCgMzAIvKQp",
-    "Gwen Stefani" : "4yiQZ8tQPux8cPriYMWUFP",
-    "'N Sync" : "6Ff53KvcvAj5U7Z1vojB5o",
-    "Cyndi Lauper" : "2BTZIqw0ntH9MvilQ3ewNY",
-    "The 1975" : "3mIj9lX2MWuHmhNCA7LSCW",
-    "New Kids on the Block" : "55qiaow2sDYtjqu1mwRua6",
-    "Demi Lovato" : "6S2OmqARrzebs0tKUEyXyp",
-    "R. Kelly" : "3AuMNF8rQAKOzjYppFNAoB",
-    "Nick Jonas" : "4Rxn7Im3LGfyRkY2FlHhWi",
-    "Maroon 5" : "04gDigrS5kc9YWfZHwBETP",
-    "Chris Brown" : "7bXgB6jMjp9ATFy66eO08Z",
-    "Barry Manilow" : "3alW3LYQS8K29z8C8NSLIX",
-    "One Direction" : "4AK6F7OLvEQ5QYCBNiQWHq",
-    "GRAHAM" : "662lI9CXPZ0a6ou4CkLr0G",
-    "Michael Bublé" : "1GxkXlMwML1oSg5eLPiAz3",
-    "Susan Boyle" : "1qAuetfG6mhtDgsVIffWQc",
-    "Smash Mouth" : "2iEvnFsWxR0Syqu2JNopAd",
-    "Steely Dan" : "6P7H3ai06vU1sGvdpBwDmE",
-    "Ashlee Simpson" : "4hqDqHtBlgxXpLXVYf7c8L",
-    "WHAM!" : "5lpH0xAS4fVfLkACg9DAuM",
-    "The Bangles" : "51l0uqRxGaczYr4271pVIC",
-    "Harry Connick, Jr." : "6u17YlWtW4oqFF5Hn9UU79",
-    "OneRepublic" : "5Pwc4xIPtQLFEnJriah9YJ",
-    "Sam Smith" : "2wY79sveU1sp5g7SokKOiI",
-    "Rick Astley" : "0gxyHStUsqpMadRV0Di1Qt",
-    "Anne Murray" : "7d7q5Y1p2QWS4QRAhTQR5E",
-    "Sia" : "5WUlDfRSoLAfcVSX1WnrxN",
-    "Fiona Apple" : "3g2kUQ6tHLLbmkV7T4GPtL",
-    "Kylie Minogue" : "4RVnAU35WRWra6OZ3CbbMA",
-    "Carly Rae Jepsen" : "6sFIWsNpZYqfjUpaCgueju",
-    "BTS" : "3kYFawNQVZ00FQbgs4rVBe",
-    "Ace of Base" : "5ksRONqssB7BR161NTtJAm"
-}
+# -------------------- Lyrics Providers --------------------
 
+def build_lyrics_lookup(names=LYRICS_PROVIDERS, percentile=HEDGE_PERCENTILE):
+    """
+    Builds the hedged lookup over the configured providers. Musixmatch is skipped when no
+    API key is set, unless a mock server stands in for it.
+    """
+    providers = []
+    for name in names:
+        if name == 'genius':
+            # Providers raise their failures; HedgedLookup decides whether the caller sees them
+            providers.append(GeniusProvider(
+                lambda artist, title: fetch_lyrics_and_songwriters(artist, title, genius, raise_on_error=True)))
+        elif name == 'musixmatch':
+            if MUSIXMATCH_API_KEY == 'your_musixmatch_api_key' and not MOCK_SERVER_URL:
+                logging.warning("MUSIXMATCH_API_KEY is not set; Musixmatch is not used.")
+                continue
+            providers.append(MusixmatchProvider(MUSIXMATCH_API_KEY))
+        else:
+            raise ValueError(f"Unknown lyrics provider: {name}")
+    return HedgedLookup(providers, percentile=percentile)
+
+lyrics_lookup = build_lyrics_lookup()
+
+# Canonical dataset store; the JSON/Parquet/CSV files are exported from it
+dataset_store = DatasetStore()
+
+# Persistent records of songs Genius definitively doesn't have, and of resolved searches
+# with their raw lyrics, shared with fix.py and test.py (see search_planner.py)
+negative_cache = NegativeResultCache()
+search_cache = SearchResultCache()
+
+# Persistent Spotify albums, album track lists and tracks, shared by every artist and run
+spotify_cache = SpotifyCache()
 
 # -------------------- Functions --------------------
 
@@ -196,87 +171,255 @@ def sanitize_song_title(song_title):
     sanitized = re.sub(r'\s*\(Remix\)', '', song_title, flags=re.IGNORECASE)
     sanitized = re.sub(r'\s*\(Live\)', '', sanitized, flags=re.IGNORECASE)
     sanitized = sanitized.strip()
-    logging.debug(f"Sanitized song title from '{song_title}' to '{sanitized}'.")
+    logging.debug("Sanitized song title from '%s' to '%s'.", song_title, sanitized)
     return sanitized
 
-def is_song_matching(song, expected_title, expected_artist, threshold=0.8):
-    def similar(a, b):
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+def similar(a, b):
+    return SequenceMatcher(None, (a or '').lower(), (b or '').lower()).ratio()
 
-    title_match = similar(song.title, expected_title) >= threshold
-    artist_match = similar(song.artist, expected_artist) >= threshold
-    return title_match and artist_match
+def rank_candidates(hits, expected_title, expected_artist):
+    """
+    Ranks Genius search hits by similarity to the expected title and artist. Hits whose
+    title contains a GENIUS_EXCLUDED_TERMS entry the expected title lacks are dropped, as
+    lyricsgenius' search_song did.
 
-def fetch_songwriter_from_genius(song_url):
+    Parameters:
+    - hits (list of dict): Hits from a Genius search response.
+    - expected_title (str): Title being searched for.
+    - expected_artist (str): Artist being searched for.
+
+    Returns:
+    - list of dict: Candidates (id, title, artist, url, title_score, artist_score), best first.
+    """
+    excluded = [term.lower() for term in GENIUS_EXCLUDED_TERMS if term.lower() not in (expected_title or '').lower()]
+    candidates = []
+    for hit in hits:
+        if hit.get('type', 'song') != 'song':
+            continue
+        result = hit.get('result', hit)
+        title = result.get('title')
+        if any(term in (title or '').lower() for term in excluded):
+            continue
+        artist = (result.get('primary_artist') or {}).get('name')
+        candidates.append({
+            'id': result.get('id'),
+            'title': title,
+            'artist': artist,
+            'url': result.get('url'),
+            'title_score': round(similar(title, expected_title), 3),
+            'artist_score': round(similar(artist, expected_artist), 3),
+        })
+    candidates.sort(key=lambda c: (min(c['title_score'], c['artist_score']), c['title_score']), reverse=True)
+    return candidates
+
+def search_hits(response):
+    """
+    Returns the song hits of a Genius search response (API or public API layout).
+    """
+    if 'hits' in response:
+        return response['hits']
+    return [hit for section in response.get('sections', []) for hit in section.get('hits', [])]
+
+def _get_genius_page(song_url):
+    response = requests.get(genius_web_url(song_url), timeout=10)
+    response.raise_for_status()
+    return response
+
+def fetch_songwriter_from_genius(song_url, song_id=None, genius_client=None):
+    """
+    Reads the writer credits of a Genius song from the state embedded in its page.
+
+    Pages without embedded state fall back to the song API payload when the song ID is known.
+
+    Parameters:
+    - song_url (str): Genius song page URL.
+    - song_id (int): Genius song ID, for the API fallback.
+    - genius_client (lyricsgenius.Genius): Genius client; defaults to the module client.
+
+    Returns:
+    - list of str: Writer names, empty if none are credited or the page could not be read.
+    """
     try:
-        response = requests.get(song_url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Updated selectors based on Genius's current HTML structure
-        songwriters_section = soup.find('section', {'class': 'SongCredits'})
-        if not songwriters_section:
-            logging.warning(f"No songwriters section found on Genius page: {song_url}")
+        response = call_with_retry(GENIUS_HOST, _get_genius_page, song_url, policy=GENIUS_RETRY_POLICY)
+        songwriters = songwriters_from_html(response.text)
+        if songwriters is None and song_id:
+            logging.info("No page state on %s; reading credits from the song API.", song_url)
+            payload = call_with_retry(GENIUS_HOST, (genius_client or genius).song, song_id, policy=GENIUS_RETRY_POLICY)
+            songwriters = credits_from_api(payload)['writers']
+        if songwriters is None:
+            logging.warning("No credits found on Genius page: %s", song_url)
             return []
 
-        songwriters = []
-        for credit in songwriters_section.find_all('a', class_='SongCredit__AArtistLink'):
-            songwriter = credit.get_text(strip=True)
-            if songwriter:
-                songwriters.append(songwriter)
-
         if not songwriters:
-            logging.warning(f"No songwriters found on Genius page: {song_url}")
+            logging.warning("No songwriters found on Genius page: %s", song_url)
 
         return songwriters
+    except CircuitOpenError as e:
+        logging.error("Skipping Genius page %s: %s", song_url, e)
+        return []
     except requests.exceptions.Timeout:
-        logging.error(f"Timeout while fetching Genius page: {song_url}")
+        logging.error("Timeout while fetching Genius page: %s", song_url)
         return []
     except requests.exceptions.HTTPError as e:
-        logging.error(f"HTTP error while fetching Genius page {song_url}: {e}")
+        logging.error("HTTP error while fetching Genius page %s: %s", song_url, e)
         return []
     except Exception as e:
-        logging.error(f"Error fetching songwriter from Genius page {song_url}: {e}")
+        logging.error("Error fetching songwriter from Genius page %s: %s", song_url, e)
         return []
 
-def fetch_lyrics_and_songwriters(artist_name, song_title, genius_client, retries=3):
+def cached_songwriters(artist_name, song_title, url, cached=None, song_id=None):
+    """
+    Returns the songwriters of a resolved song, reading and caching them on first use.
+    """
+    if cached and cached.get('songwriters'):
+        return cached['songwriters']
+    with log_context(stage='credits'):
+        songwriters = fetch_songwriter_from_genius(url, song_id or (cached or {}).get('song_id'))
+    if songwriters:
+        search_cache.set_songwriters(artist_name, song_title, songwriters)
+    return songwriters or [artist_name]
+
+def fetch_lyrics_and_songwriters(artist_name, song_title, genius_client, retries=GENIUS_MAX_RETRIES,
+                                 raise_on_error=False):
+    cached = search_cache.get(artist_name, song_title)
+    # An entry without lyrics can't be served; search again
+    if cached is not None and cached.get('lyrics'):
+        logging.info("Using cached lyrics for '%s - %s' (%s).", artist_name, song_title, cached['url'])
+        if cached['song_id'] is None:
+            # Won by another provider (see fetch_lyrics): no Genius page to read credits from
+            return clean_lyrics(cached['lyrics'], song_title, headers=False), cached['songwriters'] or [artist_name]
+        return clean_lyrics(cached['lyrics'], song_title), cached_songwriters(artist_name, song_title, cached['url'], cached)
+
+    if negative_cache.is_known_miss(artist_name, song_title):
+        logging.info("Skipping known Genius miss '%s - %s'.", artist_name, song_title)
+        return None, []
+
     sanitized_title = sanitize_song_title(song_title)
-    search_queries = [
+    # Broadest query first; equivalent variants are only searched once
+    search_queries = plan_search_queries([
         sanitized_title,
         song_title  # Try the original title if sanitized search fails
-    ]
-
-    for attempt in range(1, retries + 2):
-        for query in search_queries:
-            try:
-                logging.debug(f"Searching for '{artist_name} - {query}' on Genius.")
-                song = genius_client.search_song(title=query, artist=artist_name)
-                if song and is_song_matching(song, song_title, artist_name):
-                    if '/lyrics/' not in song.url:
-                        logging.warning(f"Non-song URL returned: {song.url}")
-                        continue  # Skip non-song URLs
-
-                    logging.info(f"Successfully found lyrics for '{artist_name} - {song.title}' at {song.url}.")
-                    cleaned_lyrics = clean_lyrics(song.lyrics, song_title)
-                    songwriters = fetch_songwriter_from_genius(song.url) or [artist_name]
-                    return cleaned_lyrics, songwriters
-                else:
-                    if song:
-                        logging.warning(f"Search result mismatch for '{artist_name} - {song_title}' with query '{query}'. Found '{song.title}' by '{song.artist}'.")
-                    else:
-                        logging.warning(f"No song found for '{artist_name} - {song_title}' with query '{query}'.")
-            except Exception as e:
-                logging.error(f"Error during search for '{artist_name} - {song_title}' with query '{query}': {e}")
-                continue  # Proceed to next query or retry
-
-        logging.warning(f"Attempt {attempt} failed for '{artist_name} - {song_title}'. Retrying after delay...")
-        time.sleep(5)  # Wait before retrying
-
-    logging.error(f"Failed to fetch lyrics for '{artist_name} - {song_title}' after {retries} retries.")
+    ])
+    policy = RetryPolicy(max_attempts=retries + 1, base_delay=GENIUS_BACKOFF_FACTOR)
+    miss_reason = MISS_NO_RESULTS
+    # A query that raised gave no answer; the song is only a known miss if every query answered
+    failed = False
+
+    for query in search_queries:
+        try:
+            logging.debug("Searching for '%s - %s' on Genius.", artist_name, query)
+            response = call_with_retry(GENIUS_HOST, genius_client.search_songs, f"{query} {artist_name}",
+                                       per_page=GENIUS_CANDIDATES, policy=policy)
+            candidates = rank_candidates(search_hits(response), song_title, artist_name)
+            best = candidates[0] if candidates else None
+            matched = bool(best) and min(best['title_score'], best['artist_score']) >= GENIUS_MATCH_THRESHOLD
+            lyrics = None
+            if matched and (best['url'] or '').endswith('-lyrics'):
+                lyrics = call_with_retry(GENIUS_HOST, genius_client.lyrics, song_url=best['url'], policy=policy)
+        except CircuitOpenError as e:
+            # Genius is failing; don't spend the remaining queries on it
+            logging.error("Skipping '%s - %s': %s", artist_name, song_title, e)
+            if raise_on_error:
+                raise
+            return None, []
+        except Exception as e:
+            error_class, _ = classify_error(e)
+            logging.error("%s error during search for '%s - %s' with query '%s': %s", error_class, artist_name, song_title, query, e)
+            if error_class in RETRYABLE:
+                # Retries for this call are already exhausted
+                if raise_on_error:
+                    raise
+                return None, []
+            failed = True
+            continue  # Proceed to next query
+
+        if lyrics:
+            logging.info("Successfully found lyrics for '%s - %s' at %s.", artist_name, best['title'], best['url'])
+            search_cache.put(artist_name, song_title, candidates, best['id'], best['url'], lyrics)
+            return clean_lyrics(lyrics, song_title), cached_songwriters(artist_name, song_title, best['url'], song_id=best['id'])
+        elif matched:
+            # Matching hit that is not a song page, or whose page has no lyrics
+            logging.warning("Non-song or empty result returned: %s", best['url'])
+            miss_reason = MISS_NON_SONG
+        elif best:
+            logging.warning("Search result mismatch for '%s - %s' with query '%s'. Found '%s' by '%s'.", artist_name, song_title, query, best['title'], best['artist'])
+            miss_reason = MISS_MISMATCH
+        else:
+            logging.warning("No song found for '%s - %s' with query '%s'.", artist_name, song_title, query)
+            # The broader query already came back empty; narrower variants can't do better
+            break
+
+    logging.error("Failed to fetch lyrics for '%s - %s'.", artist_name, song_title)
+    if not failed:
+        negative_cache.record_miss(artist_name, song_title, miss_reason)
     return None, []
 
 
-def get_artist_top_tracks_by_id(artist_id, sp_client, top_n=10):
+def fetch_lyrics(artist_name, song_title, genius_client=None, raise_on_error=False):
+    """
+    Looks up lyrics and songwriters through the hedged provider lookup (see providers.py).
+
+    Parameters:
+    - artist_name (str): Artist name.
+    - song_title (str): Track title.
+    - genius_client (lyricsgenius.Genius): If given, only this Genius client is asked.
+    - raise_on_error (bool): Raise provider failures (e.g. CircuitOpenError) instead of
+      returning no lyrics, so queue workers can retry the track later.
+
+    Returns:
+    - tuple: (lyrics or None, list of songwriters).
+    """
+    if genius_client is not None:
+        return fetch_lyrics_and_songwriters(artist_name, song_title, genius_client, raise_on_error=raise_on_error)
+    result = lyrics_lookup.lookup(artist_name, song_title, raise_on_error=raise_on_error)
+    if result is None:
+        return None, []
+    if result['provider'] != 'genius':
+        # Genius results are cleaned and cached on the way; other providers' wins are
+        # cleaned the same way and cached raw, so the next run skips every provider.
+        # Only real credits are cached; the artist fallback is not a credit.
+        logging.info("Lyrics for '%s - %s' from %s (%s).", artist_name, song_title, result['provider'], result['url'])
+        search_cache.put(artist_name, song_title, [], None, result['url'], result['lyrics'],
+                         result['songwriters'] or None)
+        return clean_lyrics(result['lyrics'], song_title, headers=False), result['songwriters'] or [artist_name]
+    return result['lyrics'], result['songwriters'] or [artist_name]
+
+
+def spotify_call(fn, *args, **kwargs):
+    """
+    Calls a spotipy method through the shared retry policy and Spotify circuit breaker.
+    """
+    return call_with_retry(SPOTIFY_HOST, fn, *args, policy=SPOTIFY_RETRY_POLICY, **kwargs)
+
+
+def cached_artist_albums(artist_id, sp_client):
+    """
+    Returns an artist's albums and singles (simplified album objects), from the Spotify cache when fresh.
+    """
+    return spotify_cache.fetch(ARTIST_ALBUMS, artist_id, lambda: spotify_call(
+        sp_client.artist_albums, artist_id, album_type='album,single', limit=50).get('items', []))
+
+
+def cached_album_tracks(album, sp_client):
+    """
+    Returns the tracks of an album, each carrying the simplified album it belongs to, from
+    the Spotify cache when fresh. Concurrent requests for the same album share one call.
+    """
+    def fetch():
+        items = spotify_call(sp_client.album_tracks, album['id']).get('items', [])
+        # Album track objects have no 'album'; attach it so each track is complete
+        return [dict(track, album=album) for track in items]
+    return spotify_cache.fetch(ALBUM_TRACKS, album['id'], fetch)
+
+
+def cached_track(track_id, sp_client):
+    """
+    Returns a full Spotify track object, from the Spotify cache when fresh.
+    """
+    return spotify_cache.fetch(TRACK, track_id, lambda: spotify_call(sp_client.track, track_id))
+
+
+def get_artist_top_tracks_by_id(artist_id, sp_client, top_n=10, raise_on_error=False):
     """
     Fetches the top N tracks for a given artist using their Spotify artist ID.
 
@@ -284,105 +427,115 @@ def get_artist_top_tracks_by_id(artist_id, sp_client, top_n=10):
     - artist_id (str): Spotify artist ID.
     - sp_client (spotipy.Spotify): Authenticated Spotify client.
     - top_n (int): Number of top tracks to fetch.
+    - raise_on_error (bool): Re-raise provider errors instead of returning an empty list,
+      so queue workers can tell a failure from an artist with no tracks.
 
     Returns:
     - list of dict: List containing track information dictionaries.
     """
+    with log_context(stage='fetch', artist_id=artist_id):
+        return _get_artist_top_tracks_by_id(artist_id, sp_client, top_n, raise_on_error)
+
+def _get_artist_top_tracks_by_id(artist_id, sp_client, top_n, raise_on_error):
     tracks = []
     fetched_track_ids = set()
 
-    for attempt in range(1, SPOTIFY_MAX_RETRIES + 1):
-        try:
-            # 1. Get top tracks (max 10)
-            top_tracks = sp_client.artist_top_tracks(artist_id, country='US').get('tracks', [])
-            for track in top_tracks:
-                track_id = track.get('id')
-                if track_id and track_id not in fetched_track_ids:
-                    tracks.append(track)
-                    fetched_track_ids.add(track_id)
-
-            logging.info(f"Fetched {len(top_tracks)} top tracks for artist ID {artist_id}.")
-
-            # 2. If needed, fetch more from albums/singles
-            if len(tracks) < top_n:
-                albums = sp_client.artist_albums(artist_id, album_type='album,single', limit=50)
-                album_ids = [album['id'] for album in albums.get('items', [])]
-                logging.info(f"Fetched {len(album_ids)} albums/singles for artist ID {artist_id}.")
-
-                for album_id in album_ids:
-                    album_tracks = sp_client.album_tracks(album_id)
-                    for track in album_tracks.get('items', []):
-                        if len(tracks) >= top_n:
-                            break
-                        track_id = track.get('id')
-                        if track_id and track_id not in fetched_track_ids:
-                            tracks.append(track)
-                            fetched_track_ids.add(track_id)
+    try:
+        # 1. Get top tracks (max 10)
+        top_tracks = spotify_call(sp_client.artist_top_tracks, artist_id, country='US').get('tracks', [])
+        # Top tracks reflect current popularity and are always fetched; the tracks themselves are kept
+        spotify_cache.put_many(TRACK, ((track.get('id'), track) for track in top_tracks))
+        for track in top_tracks:
+            track_id = track.get('id')
+            if track_id and track_id not in fetched_track_ids:
+                tracks.append(track)
+                fetched_track_ids.add(track_id)
+
+        logging.info("Fetched %s top tracks for artist ID %s.", len(top_tracks), artist_id)
+
+        # 2. If needed, fetch more from albums/singles
+        if len(tracks) < top_n:
+            albums = cached_artist_albums(artist_id, sp_client)
+            logging.info("Fetched %s albums/singles for artist ID %s.", len(albums), artist_id)
+
+            for album in albums:
+                for track in cached_album_tracks(album, sp_client):
                     if len(tracks) >= top_n:
                         break
-                logging.info(f"Total tracks after fetching from albums: {len(tracks)}.")
+                    track_id = track.get('id')
+                    if track_id and track_id not in fetched_track_ids:
+                        tracks.append(track)
+                        fetched_track_ids.add(track_id)
+                if len(tracks) >= top_n:
+                    break
+            logging.info("Total tracks after fetching from albums: %s.", len(tracks))
+
+    except CircuitOpenError as e:
+        logging.error("Skipping artist ID %s: %s", artist_id, e)
+        if raise_on_error:
+            raise
+        return []
+    except Exception as e:
+        error_class, _ = classify_error(e)
+        logging.error("%s error fetching top tracks for artist ID %s: %s.", error_class, artist_id, e)
+        if raise_on_error:
+            raise
+        return []
 
-            # 3. Slice to top_n
-            tracks = tracks[:top_n]
-            logging.info(f"Final number of tracks for artist ID {artist_id}: {len(tracks)}.")
+    # 3. Slice to top_n
+    tracks = tracks[:top_n]
+    logging.info("Final number of tracks for artist ID %s: %s.", artist_id, len(tracks))
 
-            # 4. Extract track information
-            track_info = []
-            for track in tracks:
-                album_info = track.get('album')
-                if not album_info:
-                    logging.warning(f"Missing 'album' in track: {track.get('name', 'Unknown Track')}")
-                    continue  # Skip tracks without album info
-
-                album_name = album_info.get('name', 'Unknown Album')
-                release_date = album_info.get('release_date', 'Unknown Release Date')
-                track_name = track.get('name', 'Unknown Track')
-                duration_ms = track.get('duration_ms', 0)
-                song_length = f"{int(duration_ms / 60000)}:{int((duration_ms % 60000)/1000):02d}"
-                popularity = track.get('popularity', 0)
-                songwriters = [artist['name'] for artist in track.get('artists', [])]
-
-                track_data = {
-                    'track_name': track_name,
-                    'album': album_name,
-                    'release_date': release_date,
-                    'song_length': song_length,
-                    'popularity': popularity,
-                    'songwriters': songwriters  # Placeholder; will replace with precise data
-                }
-                track_info.append(track_data)
-
-            logging.info(f"Extracted information for {len(track_info)} tracks.")
-            return track_info
-
-        except (ReadTimeout, ConnectionError) as e:
-            logging.warning(f"Network error on attempt {attempt} for artist ID {artist_id}: {e}. Retrying after {SPOTIFY_BACKOFF_FACTOR ** attempt} seconds...")
-            time.sleep(SPOTIFY_BACKOFF_FACTOR ** attempt)
-            continue
-        except HTTPError as e:
-            if e.response.status_code == 429:
-                retry_after = int(e.response.headers.get('Retry-After', 5))
-                logging.warning(f"Rate limit hit for artist ID {artist_id}. Retrying after {retry_after} seconds...")
-                time.sleep(retry_after)
-                continue
-            else:
-                logging.error(f"HTTP error on attempt {attempt} for artist ID {artist_id}: {e}.")
-                break
-        except Exception as e:
-            logging.error(f"Unexpected error on attempt {attempt} for artist ID {artist_id}: {e}.")
-            break
+    # 4. Extract track information
+    track_info = []
+    for track in tracks:
+        track_data = extract_track_data(track)
+        if track_data:
+            track_info.append(track_data)
+
+    logging.info("Extracted information for %s tracks.", len(track_info))
+    return track_info
 
-    logging.error(f"Failed to fetch top tracks for artist ID {artist_id} after {SPOTIFY_MAX_RETRIES} attempts.")
-    return []
+def extract_track_data(track):
+    """
+    Converts a Spotify track object into the dataset's track schema.
+
+    Parameters:
+    - track (dict): Spotify track object (must include 'album').
 
-def clean_lyrics(lyrics, song_title):
+    Returns:
+    - dict or None: Track information dictionary, or None if the track has no album info.
+    """
+    album_info = track.get('album')
+    if not album_info:
+        logging.warning("Missing 'album' in track: %s", track.get('name', 'Unknown Track'))
+        return None  # Skip tracks without album info
+
+    duration_ms = track.get('duration_ms', 0)
+    return {
+        'track_name': track.get('name', 'Unknown Track'),
+        'album': album_info.get('name', 'Unknown Album'),
+        'release_date': album_info.get('release_date', 'Unknown Release Date'),
+        'song_length': f"{int(duration_ms / 60000)}:{int((duration_ms % 60000)/1000):02d}",
+        'popularity': track.get('popularity', 0),
+        'songwriters': [artist['name'] for artist in track.get('artists', [])],  # Placeholder; will replace with precise data
+        # Stable identifiers for joins; simplified track objects (album listings) carry no ISRC
+        'spotify_track_id': track.get('id'),
+        'spotify_album_id': album_info.get('id'),
+        'spotify_artist_ids': [artist['id'] for artist in track.get('artists', []) if artist.get('id')],
+        'isrc': (track.get('external_ids') or {}).get('isrc')
+    }
+
+def clean_lyrics(lyrics, song_title, headers=True):
     """
     Cleans the lyrics by removing unwanted translation prefixes and other unwanted text,
     while retaining session headers like [Chorus], [Verse 1], etc.
 
     Parameters:
-    - lyrics (str): The raw lyrics fetched from Genius.
+    - lyrics (str): The raw lyrics fetched from Genius or another provider.
     - song_title (str): The title of the song, used to accurately remove unwanted prefixes.
+    - headers (bool): Whether the lyrics carry section headers. Genius lyrics do, and
+      anything before the first header is dropped; Musixmatch lyrics have none.
 
     Returns:
     - str: The cleaned lyrics, or the original lyrics if cleaning fails.
@@ -390,28 +543,26 @@ def clean_lyrics(lyrics, song_title):
     # Remove any unwanted translation prefixes before the lyrics
     # Assume that the actual lyrics start with a session header like [Intro], [Verse 1], etc.
     start_idx = lyrics.find('[')
-    if start_idx != -1:
+    if not headers:
+        lyrics = lyrics.strip()
+    elif start_idx != -1:
         lyrics = lyrics[start_idx:]
     else:
         # Log a warning if no session headers are found
-        logging.warning(f"Lyrics for song '{song_title}' do not contain session headers.")
+        logging.warning("Lyrics for song '%s' do not contain session headers.", song_title)
         # Proceed to save lyrics as-is
         return lyrics.strip()
 
     # Split lyrics into lines
     lines = lyrics.split('\n')
 
-    # Define unwanted language substrings
-    unwanted_languages = ['Trke', 'Español', 'Português', 'Italiano', 'Deutsch', 'Српски', 
-                          'Franais', 'Türkçe', 'Ελληνικά', 'Français', 'فارسی', 'العربية']
-
     # Define unwanted promotional patterns
     unwanted_promotions = [r'See .* LiveGet tickets as low as', r'You might also like']
 
     cleaned_lines = []
     for line in lines:
-        # Skip lines that start with 'Translations' or contain unwanted language substrings
-        if line.startswith('Translations') or any(lang in line for lang in unwanted_languages):
+        # Skip the translations menu; lyric lines that merely mention a language are kept
+        if is_translation_menu(line):
             continue
         # Skip lines that match unwanted promotional patterns
         if any(re.search(pattern, line) for pattern in unwanted_promotions):
@@ -424,51 +575,69 @@ def clean_lyrics(lyrics, song_title):
     # Join the cleaned lines back into a single string
     cleaned_lyrics = '\n'.join(cleaned_lines).strip()
 
+    # Long blocks in another language than the rest of the track may be translations;
+    # they are only removed with DROP_FOREIGN_BLOCKS, since bilingual songs look the same
+    cleaned_lyrics, foreign = drop_foreign_blocks(cleaned_lyrics, drop=DROP_FOREIGN_BLOCKS)
+    if foreign:
+        logging.info("%s %s block(s) in another language in '%s'.",
+                     'Dropped' if DROP_FOREIGN_BLOCKS else 'Found', foreign, song_title)
+    cleaned_lyrics = cleaned_lyrics.strip()
+
     # Additional validation:
     # Check if lyrics start with '['
-    if not cleaned_lyrics.startswith('['):
-        logging.warning(f"Lyrics for song '{song_title}' do not start with '[' after cleaning.")
+    if headers and not cleaned_lyrics.startswith('['):
+        logging.warning("Lyrics for song '%s' do not start with '[' after cleaning.", song_title)
         # Proceed to save lyrics as-is
         return lyrics.strip()
 
     # Check for unwanted content like lists of songs
     unwanted_patterns = [r'^Top canciones de', r'^New Music Friday']
     if any(re.match(pattern, cleaned_lyrics, flags=re.IGNORECASE) for pattern in unwanted_patterns):
-        logging.warning(f"Lyrics for song '{song_title}' contain unwanted content.")
+        logging.warning("Lyrics for song '%s' contain unwanted content.", song_title)
         # Proceed to save lyrics as-is
         return lyrics.strip()
 
     # Optional: Check for minimum length to ensure lyrics are substantial
     if len(cleaned_lyrics) < 100:
-        logging.warning(f"Lyrics for song '{song_title}' are too short after cleaning.")
+        logging.warning("Lyrics for song '%s' are too short after cleaning.", song_title)
         # Proceed to save lyrics as-is
         return lyrics.strip()
 
     return cleaned_lyrics
 
-def get_artist_genres(artist_name, sp_client):
+def get_artist_genres(artist_name, sp_client, raise_on_error=False):
     """
     Retrieves genres associated with an artist from Spotify.
 
     Parameters:
     - artist_name (str): Name of the artist.
     - sp_client (spotipy.Spotify): Authenticated Spotify client.
+    - raise_on_error (bool): Re-raise an open circuit or an exhausted transient error instead
+      of returning no genres, so queue workers and fix.py retry the track later.
 
     Returns:
     - list of str: List containing genres associated with the artist.
     """
     try:
-        results = sp_client.search(q='artist:' + artist_name, type='artist', limit=1)
+        results = spotify_call(sp_client.search, q='artist:' + artist_name, type='artist', limit=1)
         items = results['artists']['items']
         if not items:
-            logging.warning(f"No artist found for genres: {artist_name}")
+            logging.warning("No artist found for genres: %s", artist_name)
             return []
         artist = items[0]
         genres = artist.get('genres', [])
-        logging.info(f"Fetched genres for artist '{artist_name}': {genres}")
+        logging.info("Fetched genres for artist '%s': %s", artist_name, genres)
         return genres
+    except CircuitOpenError as e:
+        logging.error("Skipping genres for artist '%s': %s", artist_name, e)
+        if raise_on_error:
+            raise
+        return []
     except Exception as e:
-        logging.error(f"Error fetching genres for artist '{artist_name}': {e}")
+        error_class, _ = classify_error(e)
+        logging.error("%s error fetching genres for artist '%s': %s", error_class, artist_name, e)
+        if raise_on_error and error_class in RETRYABLE:
+            raise
         return []
 
 def upload_to_huggingface(json_file, readme_content, repo_id, hf_token):
@@ -484,7 +653,7 @@ def upload_to_huggingface(json_file, readme_content, repo_id, hf_token):
     try:
         # Create repository if it doesn't exist
         create_repo(name=repo_id, token=hf_token, exist_ok=True)
-        logging.info(f"Created or verified existence of Hugging Face repository: {repo_id}")
+        logging.info("Created or verified existence of Hugging Face repository: %s", repo_id)
 
         # Upload the JSON file
         upload_file(
@@ -493,7 +662,7 @@ def upload_to_huggingface(json_file, readme_content, repo_id, hf_token):
             repo_id=repo_id,
             token=hf_token
         )
-        logging.info(f"Uploaded JSON dataset to Hugging Face repository: {repo_id}")
+        logging.info("Uploaded JSON dataset to Hugging Face repository: %s", repo_id)
 
         # Upload README.md
         with open('README.md', 'w', encoding='utf-8') as f:
@@ -505,11 +674,11 @@ def upload_to_huggingface(json_file, readme_content, repo_id, hf_token):
             repo_id=repo_id,
             token=hf_token
         )
-        logging.info(f"Uploaded README.md to Hugging Face repository: {repo_id}")
+        logging.info("Uploaded README.md to Hugging Face repository: %s", repo_id)
 
         print(f"Dataset uploaded to https://huggingface.co/{repo_id}")
     except Exception as e:
-        logging.error(f"Failed to upload to Hugging Face: {e}")
+        logging.error("Failed to upload to Hugging Face: %s", e)
         print(f"Failed to upload to Hugging Face: {e}")
 
 # -------------------- Data Collection --------------------
@@ -526,15 +695,14 @@ def load_top_tracks(json_path=TOP_TRACKS_JSON):
     """
     if os.path.exists(json_path):
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                top_tracks = json.load(f)
-            logging.info(f"Loaded top tracks from {json_path}.")
+            top_tracks = list(iter_tracks(json_path))
+            logging.info("Loaded top tracks from %s.", json_path)
             return top_tracks
         except Exception as e:
-            logging.error(f"Failed to load {json_path}: {e}")
+            logging.error("Failed to load %s: %s", json_path, e)
             return []
     else:
-        logging.info(f"{json_path} does not exist. Proceeding to fetch top tracks from Spotify.")
+        logging.info("%s does not exist. Proceeding to fetch top tracks from Spotify.", json_path)
         return []
 
 def save_top_tracks(tracks, json_path=TOP_TRACKS_JSON):
@@ -548,14 +716,64 @@ def save_top_tracks(tracks, json_path=TOP_TRACKS_JSON):
     try:
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(tracks, f, ensure_ascii=False, indent=4)
-        logging.info(f"Saved top tracks to {json_path}.")
+        logging.info("Saved top tracks to %s.", json_path)
     except Exception as e:
-        logging.error(f"Failed to save top tracks to {json_path}: {e}")
+        logging.error("Failed to save top tracks to %s: %s", json_path, e)
 
-def fetch_all_top_tracks():
+ID_FIELDS = ('spotify_track_id', 'spotify_album_id', 'spotify_artist_ids', 'isrc')
+
+def backfill_track_ids(tracks, sp_client, candidates=5):
     """
-    Fetches top tracks for all artists. If top_tracks.json exists, uses it.
-    Otherwise, fetches from Spotify and saves to top_tracks.json.
+    Adds Spotify IDs and ISRCs to tracks saved before the records carried them.
+
+    Each such track is searched by title and artist, and the first hit whose title and
+    artist match is used. Tracks without a match get None IDs, so they are searched once.
+
+    Parameters:
+    - tracks (list of dict): Track information dictionaries, updated in place.
+    - sp_client (spotipy.Spotify): Authenticated Spotify client.
+    - candidates (int): Search hits considered per track.
+
+    Returns:
+    - int: Number of tracks that were searched.
+    """
+    searched = 0
+    for track in tqdm([t for t in tracks if 'spotify_track_id' not in t], desc="Backfilling track IDs"):
+        searched += 1
+        artist_name, track_name = track.get('artist') or '', track.get('track_name') or ''
+        match = None
+        try:
+            results = spotify_call(sp_client.search, q=f"track:{track_name} artist:{artist_name}",
+                                   type='track', limit=candidates)
+            match = next((item for item in results['tracks']['items']
+                          if similar(item.get('name'), track_name) >= GENIUS_MATCH_THRESHOLD
+                          and any(similar(artist.get('name'), artist_name) >= GENIUS_MATCH_THRESHOLD
+                                  for artist in item.get('artists', []))), None)
+            # Search hits are full track objects; fetch the track when one lacks its ISRC
+            if match and not (match.get('external_ids') or {}).get('isrc'):
+                match = cached_track(match['id'], sp_client) or match
+        except CircuitOpenError:
+            # Leave the track for the next run rather than recording it as unmatched
+            searched -= 1
+            continue
+        except Exception as e:
+            logging.error("Error searching Spotify for '%s' by '%s': %s", track_name, artist_name, e)
+            continue
+        data = extract_track_data(match) if match else None
+        if data is None:
+            logging.warning("No Spotify match to backfill IDs of '%s' by '%s'.", track_name, artist_name)
+        track.update({field: (data or {}).get(field) for field in ID_FIELDS})
+    return searched
+
+def fetch_all_top_tracks(roster_path=ARTIST_ROSTER):
+    """
+    Fetches top tracks for all artists. If top_tracks.json exists, uses it, backfilling
+    the IDs of tracks saved before records carried them. Otherwise, fetches from Spotify
+    and saves to top_tracks.json.
+
+    Parameters:
+    - roster_path (str): Artists with Spotify IDs; artist.txt by default, or the
+      JSON/CSV/TSV roster set in ARTIST_ROSTER. Only read when fetching.
 
     Returns:
     - list of dict: List containing track information dictionaries.
@@ -564,13 +782,19 @@ def fetch_all_top_tracks():
 
     if top_tracks:
         # Assuming top_tracks.json contains tracks for all artists
+        if backfill_track_ids(top_tracks, sp):
+            save_top_tracks(top_tracks)
         return top_tracks
     else:
         # Fetch top tracks from Spotify
+        artists_with_ids = load_roster(roster_path)
         all_tracks = []
+        build_status.set_total('fetch', len(artists_with_ids))
+        build_status.add_source('spotify_cache', spotify_cache.stats)
         for artist, artist_id in tqdm(artists_with_ids.items(), desc="Fetching top tracks"):
             tracks = get_artist_top_tracks_by_id(artist_id, sp, top_n=10)  # Fetch top 10 tracks
-            logging.info(f"Processing {len(tracks)} tracks for artist '{artist}'.")
+            build_status.done('fetch')
+            logging.info("Processing %s tracks for artist '%s'.", len(tracks), artist)
             for track in tracks:
                 track['artist'] = artist  # Add artist name to the track
             all_tracks.extend(tracks)
@@ -583,98 +807,174 @@ def fetch_all_top_tracks():
 
 # -------------------- Data Structuring --------------------
 
-def save_dataset_incrementally(track, json_path=DATASET_JSON):
+def structure_dataset(tracks, policy=VARIANT_POLICY):
     """
-    Appends a single track's data to the JSON file.
+    Structures the dataset by fetching lyrics and songwriters, and adding genres.
+
+    Variants of the same song (remasters, edits, remixes, collaborations listed under each
+    artist) are grouped first and enriched once; the other members of a group either get
+    the same lyrics and songwriters or are dropped, depending on the policy.
 
     Parameters:
-    - track (dict): Track information dictionary.
-    - json_path (str): Path to the JSON file to save the dataset.
+    - tracks (list of dict): List containing track information dictionaries.
+    - policy (str): 'fanout' or 'drop' for the non-representative members of a group.
+
+    Returns:
+    - list of dict: Structured dataset ready for saving.
     """
-    try:
-        if os.path.exists(json_path):
-            with open(json_path, 'r+', encoding='utf-8') as f:
-                data = json.load(f)
-                data.append(track)
-                f.seek(0)
-                json.dump(data, f, ensure_ascii=False, indent=4)
-        else:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump([track], f, ensure_ascii=False, indent=4)
-        logging.info(f"Appended track '{track['track_name']}' to {json_path}.")
-    except Exception as e:
-        logging.error(f"Failed to append track to {json_path}: {e}")
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown variant policy: {policy}")
+    groups = group_variants(tracks)
+    total, count, saved = collapse_summary(groups)
+    logging.info("Collapsed %s tracks into %s variant groups; %s enrichments saved (%s).", total, count, saved, policy)
+
+    build_status.set_total('enrich', len(groups))
+    build_status.add_source('lyrics_providers', lyrics_lookup.stats)
+    structured_data = []
+    for group in tqdm(groups, desc="Processing tracks"):
+        representative = group.representative
+        structured_track = enrich_track(representative)
+        build_status.done('enrich', failed=structured_track is None or structured_track['lyrics'] is None)
+        if structured_track is None:
+            continue
+
+        for track in group.members:
+            if track is representative:
+                record = structured_track
+            elif policy == FAN_OUT:
+                record = fan_out_track(track, structured_track)
+                if record is None:
+                    continue
+            else:
+                logging.info("Dropped variant '%s - %s' of '%s - %s'.", track.get('artist'), track.get('track_name'),
+                             representative['artist'], representative['track_name'])
+                continue
+            structured_data.append(record)
+            save_dataset_incrementally(record)  # Save each track incrementally
 
-def structure_dataset(tracks):
+    logging.info("Lyrics providers: %s", lyrics_lookup.stats())
+    return structured_data
+
+def enrich_track(track, genius_client=None, sp_client=None, raise_on_error=False):
     """
-    Structures the dataset by fetching lyrics and songwriters, and adding genres.
+    Enriches one track with lyrics, songwriters and genres. Shared by the main build and fix.py.
 
     Parameters:
-    - tracks (list of dict): List containing track information dictionaries.
+    - track (dict): Track information dictionary with at least 'artist' and 'track_name'.
+    - genius_client (lyricsgenius.Genius): Genius client to use alone; defaults to the hedged
+      lookup over all configured providers.
+    - sp_client (spotipy.Spotify): Spotify client; defaults to the module client.
+    - raise_on_error (bool): Raise when no lyrics provider or Spotify could answer, instead
+      of returning the track without lyrics or genres.
 
     Returns:
-    - list of dict: Structured dataset ready for saving.
+    - dict or None: Structured track, or None if the track lacks an artist or name.
     """
-    structured_data = []
-    for track in tqdm(tracks, desc="Processing tracks"):
-        artist = track.get('artist')
-        track_name = track.get('track_name')
+    sp_client = sp_client or sp
+    artist = track.get('artist')
+    track_name = track.get('track_name')
 
-        if not artist or not track_name:
-            logging.warning(f"Missing artist or track name in track: {track}")
-            continue
+    if not artist or not track_name:
+        logging.warning("Missing artist or track name in track: %s", track)
+        return None
 
-        lyrics, songwriters = fetch_lyrics_and_songwriters(artist, track_name, genius)
+    with log_context(artist=artist, track=track_name, spotify_track_id=track.get('spotify_track_id')):
+        with log_context(stage='lyrics'):
+            lyrics, songwriters = fetch_lyrics(artist, track_name, genius_client, raise_on_error)
 
-        genre = get_artist_genres(artist, sp)
+        with log_context(stage='genre'):
+            genre = get_artist_genres(artist, sp_client, raise_on_error)
 
-        structured_track = {
-            'track_name': track_name,
-            'album': track.get('album', 'Unknown Album'),
-            'release_date': track.get('release_date', 'Unknown Release Date'),
-            'song_length': track.get('song_length', '0:00'),
-            'popularity': track.get('popularity', 0),
-            'songwriters': songwriters,
-            'artist': artist,
-            'lyrics': lyrics,
-            'genre': genre
-        }
+    return build_record(track, lyrics, songwriters, genre)
 
-        structured_data.append(structured_track)
-        save_dataset_incrementally(structured_track)  # Save each track incrementally
+def fan_out_track(track, enriched, sp_client=None):
+    """
+    Structures a variant from its group's enriched representative without another Genius lookup.
 
-    return structured_data
+    The variant keeps its own Spotify metadata; genres are per artist, so they are only
+    fetched again when the variant is listed under a different artist.
+
+    Parameters:
+    - track (dict): Track information dictionary of the variant.
+    - enriched (dict): Structured record of the group's representative.
+    - sp_client (spotipy.Spotify): Spotify client; defaults to the module client.
+
+    Returns:
+    - dict or None: Structured track, or None if the track lacks an artist or name.
+    """
+    artist = track.get('artist')
+    if not artist or not track.get('track_name'):
+        logging.warning("Missing artist or track name in track: %s", track)
+        return None
+    genre = enriched['genre'] if artist == enriched['artist'] else get_artist_genres(artist, sp_client or sp)
+    return build_record(track, enriched['lyrics'], enriched['songwriters'], genre)
+
+def build_record(track, lyrics, songwriters, genre):
+    """
+    Builds a dataset record from Spotify track information and the enrichment results.
+    """
+    return {
+        'track_name': track['track_name'],
+        'album': track.get('album', 'Unknown Album'),
+        'release_date': track.get('release_date', 'Unknown Release Date'),
+        'song_length': track.get('song_length', '0:00'),
+        'popularity': track.get('popularity', 0),
+        'songwriters': songwriters,
+        'artist': track['artist'],
+        'lyrics': lyrics,
+        'genre': genre,
+        'language': detect_language(lyrics) if lyrics else None,
+        'spotify_track_id': track.get('spotify_track_id'),
+        'spotify_album_id': track.get('spotify_album_id'),
+        'spotify_artist_ids': track.get('spotify_artist_ids') or [],
+        'isrc': track.get('isrc')
+    }
 
 # -------------------- Saving the Dataset --------------------
 
-def save_dataset_incrementally(track, json_path=DATASET_JSON):
+def save_dataset_incrementally(track, store=None):
     """
-    Appends a single track's data to the JSON file.
+    Upserts a single track into the canonical dataset store (see dataset_store.py).
 
     Parameters:
     - track (dict): Track information dictionary.
-    - json_path (str): Path to the JSON file to save the dataset.
+    - store (DatasetStore): Store to write to; defaults to the module store.
+    """
+    with log_context(stage='save', artist=track.get('artist'), track=track.get('track_name')):
+        try:
+            (store or dataset_store).upsert(track)
+            logging.info("Saved track '%s' to %s.", track['track_name'], (store or dataset_store).db_path)
+        except Exception as e:
+            logging.error("Failed to save track '%s': %s", track.get('track_name'), e)
+
+def export_dataset(json_path=DATASET_JSON, store=None):
+    """
+    Regenerates the dataset JSON file from the canonical store.
+
+    Parameters:
+    - json_path (str): Path to the JSON file to write.
+    - store (DatasetStore): Store to export; defaults to the module store.
     """
     try:
-        # Check if the file exists and is not empty
-        if os.path.exists(json_path) and os.path.getsize(json_path) > 0:
-            with open(json_path, 'r+', encoding='utf-8') as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError:
-                    logging.error(f"Corrupted JSON file: {json_path}. Reinitializing.")
-                    data = []  # Reinitialize if corrupted
-
-                data.append(track)
-                f.seek(0)
-                json.dump(data, f, ensure_ascii=False, indent=4)
-        else:
-            # Initialize the file with an empty list if it doesn't exist or is empty
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump([track], f, ensure_ascii=False, indent=4)
-        logging.info(f"Appended track '{track['track_name']}' to {json_path}.")
+        count = (store or dataset_store).export_json(json_path)
+        logging.info("Exported %s tracks to %s.", count, json_path)
     except Exception as e:
-        logging.error(f"Failed to append track to {json_path}: {e}")
+        logging.error("Failed to export dataset to %s: %s", json_path, e)
+
+def record_snapshot(store=None):
+    """
+    Records a snapshot manifest of the build (see snapshot.py) for diffs against earlier builds.
+
+    Parameters:
+    - store (DatasetStore): Store to snapshot; defaults to the module store.
+    """
+    store = store or dataset_store
+    try:
+        info = write_manifest(store.query(), source=store.db_path)
+        print(f"Recorded snapshot {info['id'][:12]} of {info['records']} tracks.")
+    except Exception as e:
+        logging.error("Failed to record dataset snapshot: %s", e)
+
 # -------------------- Uploading to Hugging Face --------------------
 
 def upload_dataset_to_huggingface(json_file, readme_content, repo_id, hf_token):
@@ -690,7 +990,7 @@ def upload_dataset_to_huggingface(json_file, readme_content, repo_id, hf_token):
     try:
         # Create repository if it doesn't exist
         create_repo(name=repo_id, token=hf_token, exist_ok=True)
-        logging.info(f"Created or verified existence of Hugging Face repository: {repo_id}")
+        logging.info("Created or verified existence of Hugging Face repository: %s", repo_id)
 
         # Upload the JSON file
         upload_file(
@@ -699,7 +999,7 @@ def upload_dataset_to_huggingface(json_file, readme_content, repo_id, hf_token):
             repo_id=repo_id,
             token=hf_token
         )
-        logging.info(f"Uploaded JSON dataset to Hugging Face repository: {repo_id}")
+        logging.info("Uploaded JSON dataset to Hugging Face repository: %s", repo_id)
 
         # Upload README.md
         with open('README.md', 'w', encoding='utf-8') as f:
@@ -711,16 +1011,19 @@ def upload_dataset_to_huggingface(json_file, readme_content, repo_id, hf_token):
             repo_id=repo_id,
             token=hf_token
         )
-        logging.info(f"Uploaded README.md to Hugging Face repository: {repo_id}")
+        logging.info("Uploaded README.md to Hugging Face repository: %s", repo_id)
 
         print(f"Dataset uploaded to https://huggingface.co/{repo_id}")
     except Exception as e:
-        logging.error(f"Failed to upload to Hugging Face: {e}")
+        logging.error("Failed to upload to Hugging Face: %s", e)
         print(f"Failed to upload to Hugging Face: {e}")
 
 # -------------------- Main Execution --------------------
 
 def main():
+    if STATUS_PORT:
+        start_status_server(int(STATUS_PORT))
+
     # Step 1: Fetch or Load Top Tracks
     top_tracks = fetch_all_top_tracks()
 
@@ -732,8 +1035,9 @@ def main():
     # Step 2: Structure the Dataset
     structured_dataset = structure_dataset(top_tracks)
 
-    # Step 3: Save the Dataset
-    save_dataset_incrementally(structured_dataset)
+    # Step 3: Save the Dataset (tracks were upserted into the store as they were processed)
+    export_dataset()
+    record_snapshot()
 
     # Step 4: Upload to Hugging Face (Optional)
     # Define README content
@@ -755,6 +1059,9 @@ Each entry in the dataset contains the following fields:
 - `artist`: Name of the artist.
 - `lyrics`: The full lyrics of the song.
 - `genre`: List of genres associated with the artist.
+- `language`: Detected language of the lyrics (ISO 639-1 code).
+- `spotify_track_id`, `spotify_album_id`, `spotify_artist_ids`: Spotify identifiers of the track, its album and its artists.
+- `isrc`: International Standard Recording Code of the track, when Spotify provides one.
 
 ## License
 This dataset is intended for educational and research purposes. Please respect copyright laws when using the lyrics.
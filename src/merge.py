@@ -0,0 +1,254 @@
+"""
+Hash-join merge of patch files (e.g. fixed_tracks.json) into a dataset file.
+
+The patch files are loaded into hash indexes on Spotify track ID and normalized
+(artist, title); the base dataset is then streamed once. Each base record is looked up in
+the indexes and replaced by its patch, and patch records that matched nothing are
+appended at the end. Work is linear in base + patch size and memory is bounded by the
+patches, so a large dataset never has to fit in memory.
+
+    python merge.py filtered_pop_lyrics_dataset.json fixed_tracks.json --output merged.json
+    python merge.py base.parquet patch1.json patch2.jsonl --output merged.parquet --conflicts conflicts.jsonl
+
+Conflicts are written one per line to the conflicts report:
+
+    patch_duplicate     the same track appears in two patches (or twice in one); the later one wins
+    id_mismatch         same (artist, title) but different Spotify track IDs; not merged
+    base_duplicate      a patch matched more than one base record; all of them are replaced
+    lyrics_regression   a patch without lyrics would replace lyrics; the base lyrics are kept
+"""
+import argparse
+import json
+import logging
+import os
+
+from dataset_store import make_track_key, write_parquet
+from track_io import iter_tracks, write_json_array, write_atomic, JSONL_EXTENSIONS, PARQUET_EXTENSIONS, NO_LYRICS
+
+# -------------------- Configuration --------------------
+
+# Join keys
+KEY_AUTO = 'auto'   # Spotify track ID when both sides have one, else normalized (artist, title)
+KEY_ID = 'id'       # Spotify track ID only
+KEY_NAME = 'name'   # Normalized (artist, title) only
+KEY_MODES = (KEY_AUTO, KEY_ID, KEY_NAME)
+
+# Conflict types
+PATCH_DUPLICATE = 'patch_duplicate'
+ID_MISMATCH = 'id_mismatch'
+BASE_DUPLICATE = 'base_duplicate'
+LYRICS_REGRESSION = 'lyrics_regression'
+
+# -------------------- Patch Index --------------------
+
+def has_lyrics(record):
+    lyrics = record.get('lyrics')
+    return bool(lyrics) and lyrics != NO_LYRICS
+
+
+def label(record):
+    return f"{record.get('artist')} - {record.get('track_name')}"
+
+
+class PatchIndex:
+    """
+    Patch records indexed by Spotify track ID and by natural key.
+
+    Parameters:
+    - key_mode (str): 'auto', 'id' or 'name' (see KEY_MODES).
+    """
+
+    def __init__(self, key_mode=KEY_AUTO):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown key mode: {key_mode}")
+        self.key_mode = key_mode
+        self.entries = []     # [record, source, matched]
+        self.by_id = {}
+        self.by_name = {}
+        self.conflicts = []
+
+    def add(self, record, source):
+        """
+        Indexes one patch record; a record for an already indexed track replaces it.
+        """
+        track_id = record.get('spotify_track_id') if self.key_mode != KEY_NAME else None
+        name_key = make_track_key(record.get('artist', ''), record.get('track_name', '')) \
+            if self.key_mode != KEY_ID else None
+        if self.key_mode == KEY_ID and not track_id:
+            logging.warning("Skipping patch record without a Spotify track ID: %s (%s).", label(record), source)
+            return
+
+        previous = self.by_id.get(track_id) if track_id else None
+        if previous is None and name_key:
+            previous = self.by_name.get(name_key)
+            if previous is not None and track_id and previous[0].get('spotify_track_id') not in (None, track_id):
+                previous = None  # Same name, different recording: both are kept
+        if previous is not None:
+            self.conflicts.append({'type': PATCH_DUPLICATE, 'track': label(record),
+                                   'sources': [previous[1], source]})
+            previous[0], previous[1] = {**previous[0], **record}, source
+            entry = previous
+        else:
+            entry = [record, source, False]
+            self.entries.append(entry)
+        if track_id:
+            self.by_id[track_id] = entry
+        if name_key:
+            self.by_name.setdefault(name_key, entry)
+
+    def lookup(self, record):
+        """
+        Returns the patch entry for a base record, or None.
+        """
+        track_id = record.get('spotify_track_id') if self.key_mode != KEY_NAME else None
+        if track_id and track_id in self.by_id:
+            return self.by_id[track_id]
+        if self.key_mode == KEY_ID:
+            return None
+        entry = self.by_name.get(make_track_key(record.get('artist', ''), record.get('track_name', '')))
+        if entry is None:
+            return None
+        patch_id = entry[0].get('spotify_track_id')
+        if track_id and patch_id and patch_id != track_id:
+            self.conflicts.append({'type': ID_MISMATCH, 'track': label(record),
+                                   'base_id': track_id, 'patch_id': patch_id, 'source': entry[1]})
+            return None
+        return entry
+
+
+def load_patches(paths, key_mode=KEY_AUTO):
+    """
+    Builds the patch index from patch files; later files win.
+    """
+    index = PatchIndex(key_mode)
+    for path in paths:
+        count = 0
+        for record in iter_tracks(path):
+            index.add(record, path)
+            count += 1
+        logging.info("Indexed %s patch records from %s.", count, path)
+    return index
+
+# -------------------- Merge --------------------
+
+def apply_patch(base, patch, conflicts):
+    """
+    Returns the base record updated with the patch's fields, keeping the base lyrics if the
+    patch has none.
+    """
+    merged = {**base, **patch}
+    if has_lyrics(base) and not has_lyrics(patch):
+        merged['lyrics'] = base['lyrics']
+        merged['language'] = base.get('language', merged.get('language'))
+        conflicts.append({'type': LYRICS_REGRESSION, 'track': label(base)})
+    return merged
+
+
+def merge_records(base_records, index, insert=True, stats=None):
+    """
+    Streams the merged dataset: base records in order, patched where matched, followed by
+    unmatched patch records.
+
+    Parameters:
+    - base_records (iterable of dict): Base dataset, consumed once.
+    - index (PatchIndex): Patches.
+    - insert (bool): Append patch records that matched no base record.
+    - stats (dict): Updated with 'base', 'replaced', 'inserted' and 'unmatched' counts.
+
+    Yields:
+    - dict: Merged records.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(base=0, replaced=0, inserted=0, unmatched=0)
+    for record in base_records:
+        stats['base'] += 1
+        entry = index.lookup(record)
+        if entry is None:
+            yield record
+            continue
+        if entry[2]:
+            index.conflicts.append({'type': BASE_DUPLICATE, 'track': label(record), 'source': entry[1]})
+        entry[2] = True
+        stats['replaced'] += 1
+        yield apply_patch(record, entry[0], index.conflicts)
+
+    for record, _, matched in index.entries:
+        if matched:
+            continue
+        if insert:
+            stats['inserted'] += 1
+            yield record
+        else:
+            stats['unmatched'] += 1
+
+
+def write_records(records, path):
+    """
+    Writes records as JSON, JSON Lines or Parquet depending on the output extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return write_parquet(records, path)
+    if extension in JSONL_EXTENSIONS:
+        def write(f):
+            count = 0
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+            return count
+        return write_atomic(path, write)
+    return write_atomic(path, lambda f: write_json_array(f, records))
+
+
+def merge_files(base_path, patch_paths, output_path, conflicts_path=None, key_mode=KEY_AUTO, insert=True):
+    """
+    Merges patch files into a base dataset file in one streaming pass.
+
+    Parameters:
+    - base_path (str): Base dataset (JSON, JSON Lines or Parquet).
+    - patch_paths (list of str): Patch files, applied in order.
+    - output_path (str): Merged output; may be the base file itself.
+    - conflicts_path (str): JSON Lines conflicts report (not written if None).
+    - key_mode (str): 'auto', 'id' or 'name'.
+    - insert (bool): Append patch records that matched nothing.
+
+    Returns:
+    - dict: Counts of base, replaced, inserted, unmatched and conflicting records.
+    """
+    index = load_patches(patch_paths, key_mode)
+    stats = {}
+    written = write_records(merge_records(iter_tracks(base_path), index, insert, stats), output_path)
+    stats.update(written=written, conflicts=len(index.conflicts))
+
+    if conflicts_path:
+        def write(f):
+            for conflict in index.conflicts:
+                f.write(json.dumps(conflict, ensure_ascii=False) + '\n')
+            return len(index.conflicts)
+        write_atomic(conflicts_path, write)
+    by_type = {}
+    for conflict in index.conflicts:
+        by_type[conflict['type']] = by_type.get(conflict['type'], 0) + 1
+    if by_type:
+        logging.warning("Merge conflicts: %s%s", by_type, f" (see {conflicts_path})" if conflicts_path else "")
+    logging.info("Merged %s into %s -> %s: %s", patch_paths, base_path, output_path, stats)
+    return stats
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge repaired tracks back into a dataset file.")
+    parser.add_argument('base', help="Base dataset file")
+    parser.add_argument('patches', nargs='+', help="Patch files, applied in order (later files win)")
+    parser.add_argument('--output', required=True, help="Merged output (.json, .jsonl or .parquet)")
+    parser.add_argument('--conflicts', help="Write conflicts to this JSON Lines file")
+    parser.add_argument('--key', choices=KEY_MODES, default=KEY_AUTO, help="Join key")
+    parser.add_argument('--no-insert', action='store_true', help="Only replace; don't append unmatched patch records")
+    args = parser.parse_args()
+
+    stats = merge_files(args.base, args.patches, args.output, args.conflicts, args.key, not args.no_insert)
+    print(f"{stats['replaced']} replaced, {stats['inserted']} inserted, {stats['unmatched']} unmatched, "
+          f"{stats['conflicts']} conflicts; {stats['written']} records written to {args.output}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,786 @@
+"""
+Local stand-in for the subset of the Spotify Web API, Genius and Musixmatch that the pipeline uses.
+
+Serves recorded (built from the json/ artifacts) or synthetic fixtures with configurable
+latency distributions, 429 injection with Retry-After and random server errors, so that
+throughput and retry behaviour can be measured offline and reproducibly.
+
+Point the pipeline at it with:
+
+    python mock_server.py --port 8765 --fixtures recorded --profile profile.json
+    python mock_server.py --fixtures recorded --top-tracks top_tracks.json --dataset pop_lyrics_dataset.json
+    POPLYRICS_MOCK_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import hashlib
+import html
+import json
+import logging
+import math
+import os
+import random
+import re
+import string
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from roster import load_roster, ARTIST_ROSTER
+
+# -------------------- Configuration --------------------
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_PORT = 8765
+# Recorded artifacts, found next to this script whatever the working directory
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'json')
+TOP_TRACKS_JSON = os.path.join(ARTIFACTS_DIR, 'top_tracks.json')
+DATASET_JSON = os.path.join(ARTIFACTS_DIR, 'pop_lyrics_dataset.json')
+
+# Fault and latency profile applied per provider. Any key may be overridden with --profile.
+DEFAULT_PROFILE = {
+    'spotify': {
+        'latency': {'dist': 'lognormal', 'median_ms': 80, 'sigma': 0.5},
+        'rate_limit_rate': 0.0,
+        'retry_after': 2,
+        'error_rate': 0.0,
+    },
+    'genius': {
+        'latency': {'dist': 'lognormal', 'median_ms': 250, 'sigma': 0.7},
+        'rate_limit_rate': 0.0,
+        'retry_after': 5,
+        'error_rate': 0.0,
+    },
+    'musixmatch': {
+        'latency': {'dist': 'lognormal', 'median_ms': 150, 'sigma': 0.5},
+        'rate_limit_rate': 0.0,
+        'retry_after': 2,
+        'error_rate': 0.0,
+    },
+}
+
+BASE62 = string.digits + string.ascii_letters
+
+# Appended to lyrics by the Musixmatch API
+MUSIXMATCH_NOTICE = '\n\n******* This Lyrics is NOT for Commercial use *******\n(1409624398523)'
+
+# -------------------- Latency and Faults --------------------
+
+class LatencyModel:
+    """
+    Samples response delays (in seconds) from a configurable distribution.
+
+    Supported specs:
+    - {'dist': 'fixed', 'ms': 100}
+    - {'dist': 'uniform', 'low_ms': 50, 'high_ms': 150}
+    - {'dist': 'exponential', 'mean_ms': 100}
+    - {'dist': 'lognormal', 'median_ms': 100, 'sigma': 0.5}
+    - {'dist': 'none'}
+    Every spec accepts an optional 'max_ms' cap.
+    """
+
+    def __init__(self, spec, rng):
+        self.spec = dict(spec or {'dist': 'none'})
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def sample(self):
+        spec = self.spec
+        dist = spec.get('dist', 'none')
+        with self.lock:
+            if dist == 'fixed':
+                ms = spec.get('ms', 0)
+            elif dist == 'uniform':
+                ms = self.rng.uniform(spec.get('low_ms', 0), spec.get('high_ms', 0))
+            elif dist == 'exponential':
+                ms = self.rng.expovariate(1.0 / max(spec.get('mean_ms', 1), 1e-6))
+            elif dist == 'lognormal':
+                ms = self.rng.lognormvariate(math.log(max(spec.get('median_ms', 1), 1e-6)), spec.get('sigma', 0.5))
+            elif dist == 'none':
+                ms = 0
+            else:
+                raise ValueError(f"Unknown latency distribution: {dist}")
+        if 'max_ms' in spec:
+            ms = min(ms, spec['max_ms'])
+        return ms / 1000.0
+
+
+class FaultInjector:
+    """
+    Decides, per request, whether a provider answers normally, with a 429 or with a 5xx.
+    """
+
+    def __init__(self, provider_profile, rng):
+        self.rate_limit_rate = provider_profile.get('rate_limit_rate', 0.0)
+        self.retry_after = provider_profile.get('retry_after', 1)
+        self.error_rate = provider_profile.get('error_rate', 0.0)
+        self.error_status = provider_profile.get('error_status', 503)
+        self.latency = LatencyModel(provider_profile.get('latency'), rng)
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def decide(self):
+        """
+        Returns:
+        - tuple: (status or None, delay_seconds). None means serve the fixture.
+        """
+        with self.lock:
+            roll = self.rng.random()
+        delay = self.latency.sample()
+        if roll < self.rate_limit_rate:
+            return 429, delay
+        if roll < self.rate_limit_rate + self.error_rate:
+            return self.error_status, delay
+        return None, delay
+
+
+def merge_profile(base, override):
+    """
+    Recursively merges a partial profile over the defaults.
+    """
+    merged = dict(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_profile(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+# -------------------- Fixtures --------------------
+
+def stable_id(*parts, length=22):
+    """
+    Derives a deterministic Spotify-style base62 ID from arbitrary strings.
+    """
+    digest = int(hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest(), 16)
+    chars = []
+    for _ in range(length):
+        digest, rem = divmod(digest, 62)
+        chars.append(BASE62[rem])
+    return ''.join(chars)
+
+
+def genius_path(artist, title):
+    """
+    Builds a Genius-style song page path, e.g. 'Lady-gaga-die-with-a-smile-lyrics'.
+    """
+    slug = re.sub(r'[^0-9A-Za-z]+', '-', f"{artist} {title}").strip('-').lower()
+    return (slug[:1].upper() + slug[1:]) + '-lyrics'
+
+
+def _load_artist_ids(roster_path):
+    if not os.path.exists(roster_path):
+        return {}
+    return load_roster(roster_path)
+
+
+def _duration_ms(song_length):
+    try:
+        minutes, seconds = song_length.split(':')
+        return (int(minutes) * 60 + int(seconds)) * 1000
+    except (AttributeError, ValueError):
+        return 0
+
+
+def new_fixtures():
+    return {
+        'spotify': {'artists': {}, 'albums': {}, 'tracks': {}},
+        'genius': {'songs': {}},
+    }
+
+
+def add_track_fixture(fixtures, artist_name, artist_id, track, lyrics=None, writers=None, genres=None):
+    """
+    Registers one track (Spotify track, album, artist and optional Genius song) in a fixture set.
+
+    Parameters:
+    - fixtures (dict): Fixture set from new_fixtures().
+    - artist_name (str): Primary artist name.
+    - artist_id (str): Spotify artist ID.
+    - track (dict): Track record in the dataset schema (track_name, album, release_date, ...).
+    - lyrics (str): Lyrics served by the Genius stand-in; None means Genius has no such song.
+    - writers (list of str): Writer credits for the Genius song page.
+    - genres (list of str): Artist genres.
+    """
+    spotify = fixtures['spotify']
+    track_name = track.get('track_name', 'Unknown Track')
+    album_name = track.get('album', 'Unknown Album')
+    album_id = stable_id('album', artist_name, album_name)
+    track_id = stable_id('track', artist_name, track_name)
+
+    artist = spotify['artists'].setdefault(artist_id, {
+        'id': artist_id, 'name': artist_name, 'genres': list(genres or []),
+        'top_tracks': [], 'albums': [],
+    })
+    album = spotify['albums'].setdefault(album_id, {
+        'id': album_id, 'name': album_name,
+        'release_date': track.get('release_date', 'Unknown Release Date'),
+        'artist_id': artist_id, 'tracks': [],
+    })
+    if album_id not in artist['albums']:
+        artist['albums'].append(album_id)
+    if track_id not in album['tracks']:
+        album['tracks'].append(track_id)
+    if track_id not in artist['top_tracks'] and len(artist['top_tracks']) < 10:
+        artist['top_tracks'].append(track_id)
+
+    credited = track.get('songwriters') or [artist_name]
+    spotify['tracks'][track_id] = {
+        'id': track_id,
+        'name': track_name,
+        'album_id': album_id,
+        'artists': [{'id': stable_id('artist', name) if name != artist_name else artist_id, 'name': name}
+                    for name in credited],
+        'duration_ms': _duration_ms(track.get('song_length', '0:00')),
+        'popularity': track.get('popularity', 0),
+        'isrc': 'QZ' + stable_id('isrc', artist_name, track_name, length=10).upper(),
+    }
+
+    if lyrics is not None:
+        song_id = int(hashlib.sha1(f"{artist_name}\x1f{track_name}".encode('utf-8')).hexdigest()[:8], 16)
+        path = genius_path(artist_name, track_name)
+        fixtures['genius']['songs'][str(song_id)] = {
+            'id': song_id,
+            'title': track_name,
+            'artist': artist_name,
+            'path': '/' + path,
+            'url': 'https://genius.com/' + path,
+            'lyrics': lyrics,
+            'writers': list(writers or credited),
+        }
+
+
+def recorded_fixtures(top_tracks_path=TOP_TRACKS_JSON, dataset_path=DATASET_JSON, roster_path=ARTIST_ROSTER):
+    """
+    Builds fixtures from previously recorded pipeline artifacts.
+
+    Tracks come from top_tracks.json; lyrics, writers and genres from the dataset JSON.
+    Both default to the artifacts in json/ next to this script.
+    Tracks whose recorded lyrics are null are served by Spotify but missing on Genius.
+    """
+    artist_ids = _load_artist_ids(roster_path)
+    with open(top_tracks_path, 'r', encoding='utf-8') as f:
+        top_tracks = json.load(f)
+    enriched = {}
+    if os.path.exists(dataset_path):
+        with open(dataset_path, 'r', encoding='utf-8') as f:
+            for record in json.load(f):
+                enriched[(record.get('artist'), record.get('track_name'))] = record
+
+    fixtures = new_fixtures()
+    for track in top_tracks:
+        artist_name = track.get('artist', 'Unknown Artist')
+        artist_id = artist_ids.get(artist_name) or stable_id('artist', artist_name)
+        record = enriched.get((artist_name, track.get('track_name')), {})
+        add_track_fixture(fixtures, artist_name, artist_id, track,
+                          lyrics=record.get('lyrics'),
+                          writers=record.get('songwriters'),
+                          genres=record.get('genre'))
+    return fixtures
+
+
+def synthetic_fixtures(n_artists=100, tracks_per_artist=10, missing_rate=0.1, seed=0):
+    """
+    Generates a reproducible synthetic catalogue of any size.
+
+    Parameters:
+    - n_artists (int): Number of artists.
+    - tracks_per_artist (int): Tracks per artist.
+    - missing_rate (float): Fraction of tracks that have no Genius song.
+    - seed (int): Random seed.
+    """
+    rng = random.Random(seed)
+    words = ['love', 'night', 'heart', 'dance', 'fire', 'baby', 'summer', 'dream', 'light',
+             'tears', 'road', 'home', 'gold', 'rain', 'wild', 'forever', 'tonight', 'stars']
+    fixtures = new_fixtures()
+    for a in range(n_artists):
+        artist_name = f"Artist {a:05d}"
+        artist_id = stable_id('artist', artist_name)
+        for t in range(tracks_per_artist):
+            title = ' '.join(rng.choice(words).title() for _ in range(rng.randint(1, 3))) + f" {t}"
+            sections = []
+            for name in ['Verse 1', 'Chorus', 'Verse 2', 'Chorus', 'Bridge', 'Chorus']:
+                lines = [' '.join(rng.choice(words) for _ in range(rng.randint(4, 8))).capitalize()
+                         for _ in range(4)]
+                sections.append(f"[{name}]\n" + '\n'.join(lines))
+            track = {
+                'track_name': title,
+                'album': f"Album {a:05d}-{t // 4}",
+                'release_date': f"{rng.randint(1970, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'song_length': f"{rng.randint(2, 5)}:{rng.randint(0, 59):02d}",
+                'popularity': rng.randint(0, 100),
+                'songwriters': [artist_name],
+            }
+            lyrics = None if rng.random() < missing_rate else '\n\n'.join(sections)
+            add_track_fixture(fixtures, artist_name, artist_id, track, lyrics=lyrics, genres=['pop'])
+    return fixtures
+
+# -------------------- Response Builders --------------------
+
+class MockCatalogue:
+    """
+    Read-only views over a fixture set in the shapes the real APIs return.
+    """
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.spotify = fixtures['spotify']
+        self.songs = fixtures['genius']['songs']
+        self.songs_by_title = defaultdict(list)
+        for song in self.songs.values():
+            self.songs_by_title[self._norm(song['title'])].append(song)
+        self.artists_by_name = {a['name'].lower(): a for a in self.spotify['artists'].values()}
+
+    @staticmethod
+    def _norm(text):
+        return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+
+    # ---- Spotify ----
+
+    def simple_artist(self, artist_id):
+        artist = self.spotify['artists'].get(artist_id)
+        if artist is None:
+            return None
+        return {'id': artist['id'], 'name': artist['name'], 'type': 'artist',
+                'uri': f"spotify:artist:{artist['id']}", 'genres': artist['genres'],
+                'external_urls': {'spotify': f"https://open.spotify.com/artist/{artist['id']}"}}
+
+    def simple_album(self, album_id):
+        album = self.spotify['albums'][album_id]
+        return {'id': album['id'], 'name': album['name'], 'release_date': album['release_date'],
+                'release_date_precision': 'day' if album['release_date'].count('-') == 2 else 'year',
+                'type': 'album', 'album_type': 'album', 'uri': f"spotify:album:{album['id']}",
+                'artists': [self.simple_artist(album['artist_id'])]}
+
+    def full_track(self, track_id, simplified=False):
+        track = self.spotify['tracks'].get(track_id)
+        if track is None:
+            return None
+        body = {'id': track['id'], 'name': track['name'], 'type': 'track',
+                'uri': f"spotify:track:{track['id']}", 'duration_ms': track['duration_ms'],
+                'artists': [dict(a, type='artist') for a in track['artists']],
+                'track_number': 1, 'disc_number': 1, 'explicit': False}
+        if not simplified:
+            body['album'] = self.simple_album(track['album_id'])
+            body['popularity'] = track['popularity']
+            body['external_ids'] = {'isrc': track['isrc']}
+        return body
+
+    def spotify_search(self, query, search_type, limit):
+        parts = re.split(r'\b(track|artist|album|year|genre):', query)
+        free_text = parts[0].strip().lower()
+        fields = {parts[i]: parts[i + 1].strip().strip('"').lower() for i in range(1, len(parts) - 1, 2)}
+        artist_q = fields.get('artist', '')
+        if search_type == 'artist':
+            name = artist_q or free_text
+            items = [self.simple_artist(a['id']) for a in self.spotify['artists'].values()
+                     if name and name in a['name'].lower()]
+            items.sort(key=lambda a: a['name'].lower() != name)
+            return {'artists': {'items': items[:limit], 'total': len(items), 'limit': limit, 'offset': 0, 'next': None}}
+        track_q = fields.get('track', free_text)
+        items = []
+        for track in self.spotify['tracks'].values():
+            names = ' '.join(a['name'].lower() for a in track['artists'])
+            if track_q and track_q not in track['name'].lower():
+                continue
+            if artist_q and artist_q not in names:
+                continue
+            items.append(track)
+        items.sort(key=lambda t: (t['name'].lower() != track_q, -t['popularity']))
+        return {'tracks': {'items': [self.full_track(t['id']) for t in items[:limit]],
+                           'total': len(items), 'limit': limit, 'offset': 0, 'next': None}}
+
+    # ---- Genius ----
+
+    def song_info(self, song):
+        return {
+            'id': song['id'], 'title': song['title'], 'url': song['url'], 'path': song['path'],
+            'full_title': f"{song['title']} by {song['artist']}",
+            'artist_names': song['artist'], 'lyrics_state': 'complete', 'instrumental': False,
+            'type': 'song', 'api_path': f"/songs/{song['id']}",
+            'primary_artist': {'id': int(hashlib.sha1(song['artist'].encode('utf-8')).hexdigest()[:6], 16),
+                               'name': song['artist']},
+            'writer_artists': [{'name': name} for name in song['writers']],
+        }
+
+    def genius_search(self, query, limit=10):
+        """
+        Ranks songs whose normalized title and artist both appear in the query.
+        """
+        q = self._norm(query)
+        hits = []
+        for title, songs in self.songs_by_title.items():
+            if title and title in q:
+                for song in songs:
+                    artist = self._norm(song['artist'])
+                    score = len(title) + (len(artist) if artist in q else -len(q))
+                    hits.append((score, song))
+        hits.sort(key=lambda pair: -pair[0])
+        return [self.song_info(song) for _, song in hits[:limit]]
+
+    # ---- Musixmatch (served from the Genius songs) ----
+
+    def musixmatch_track(self, song):
+        return {'track_id': song['id'], 'track_name': song['title'], 'artist_name': song['artist'],
+                'has_lyrics': 1, 'instrumental': 0, 'explicit': 0, 'track_rating': 50,
+                'track_share_url': f"https://www.musixmatch.com/lyrics/{song['path'].strip('/')}",
+                'primary_genres': {'music_genre_list': []}}
+
+    def musixmatch_search(self, track_q, artist_q, limit=10):
+        """
+        Songs whose normalized title contains q_track and artist contains q_artist.
+        """
+        track_q, artist_q = self._norm(track_q), self._norm(artist_q)
+        hits = [song for song in self.songs.values()
+                if track_q in self._norm(song['title']) and artist_q in self._norm(song['artist'])]
+        hits.sort(key=lambda song: self._norm(song['title']) != track_q)
+        return [{'track': self.musixmatch_track(song)} for song in hits[:limit]]
+
+    def musixmatch_lyrics(self, song):
+        """
+        Musixmatch lyrics carry no [Section] headers and end with the usage notice.
+        """
+        body = '\n'.join(line for line in song['lyrics'].split('\n') if not re.fullmatch(r'\[.*\]', line.strip()))
+        return {'lyrics_id': song['id'], 'explicit': 0, 'lyrics_language': 'en',
+                'lyrics_body': body.strip() + MUSIXMATCH_NOTICE,
+                'lyrics_copyright': 'Lyrics powered by www.musixmatch.com.'}
+
+    def song_by_path(self, path):
+        path = '/' + path.strip('/')
+        for song in self.songs.values():
+            if song['path'] == path:
+                return song
+        return None
+
+    def song_page(self, song):
+        """
+        Renders a minimal Genius song page: lyrics containers plus embedded page state.
+        """
+        lyrics_html = html.escape(song['lyrics']).replace('\n', '<br/>')
+        writer_ids = [stable_id('writer', name, length=8) for name in song['writers']]
+        state = {
+            'songPage': {'song': song['id'], 'trackingData': [{'key': 'Song ID', 'value': song['id']}]},
+            'entities': {
+                'songs': {str(song['id']): {
+                    'id': song['id'], 'title': song['title'], 'url': song['url'],
+                    'writerArtists': [{'id': wid, 'type': 'artists'} for wid in writer_ids],
+                }},
+                'artists': {wid: {'id': wid, 'name': name} for wid, name in zip(writer_ids, song['writers'])},
+            },
+        }
+        state_js = json.dumps(json.dumps(state))[1:-1].replace("'", "\\'")
+        return (
+            "<!DOCTYPE html><html><head>"
+            f"<title>{html.escape(song['artist'])} – {html.escape(song['title'])} Lyrics | Genius Lyrics</title>"
+            "</head><body>"
+            '<div class="Lyrics__Root-sc-1ynbvzw-1">'
+            f'<div data-lyrics-container="true" class="Lyrics__Container-sc-1ynbvzw-6">{lyrics_html}</div>'
+            "</div>"
+            f"<script>window.__PRELOADED_STATE__ = JSON.parse('{state_js}');</script>"
+            "</body></html>"
+        )
+
+# -------------------- HTTP Server --------------------
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'PopLyricsMock/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    # ---- plumbing ----
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _provider(self, path):
+        for provider in ('spotify', 'genius', 'musixmatch'):
+            if path.startswith(f"/{provider}/"):
+                return provider
+        return None
+
+    def _musixmatch(self, body, status=200):
+        # Musixmatch answers HTTP 200 and puts the status in the header
+        self._send(200, {'message': {'header': {'status_code': status, 'execute_time': 0.01}, 'body': body}})
+        return status
+
+    def _handle(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        if self.command == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length).decode('utf-8') if length else ''
+            query.update({k: v[-1] for k, v in parse_qs(body).items()})
+
+        if path == '/__stats':
+            return self._send(200, self.server.stats.snapshot())
+
+        provider = self._provider(path)
+        started = time.perf_counter()
+        status, delay = (None, 0.0)
+        if provider and not path.endswith('/api/token'):
+            status, delay = self.server.faults[provider].decide()
+        if delay:
+            time.sleep(delay)
+        try:
+            if status == 429:
+                retry_after = self.server.faults[provider].retry_after
+                self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                           headers={'Retry-After': retry_after})
+            elif status is not None:
+                self._send(status, {'error': {'status': status, 'message': 'Injected server error'}})
+            else:
+                status = self._route(path, query)
+        finally:
+            self.server.stats.record(provider or 'other', status or 200, time.perf_counter() - started)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    # ---- routes ----
+
+    def _route(self, path, query):
+        catalogue = self.server.catalogue
+
+        if path == '/spotify/api/token':
+            self._send(200, {'access_token': 'mock-token', 'token_type': 'Bearer', 'expires_in': 3600})
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/artists/([^/]+)/top-tracks', path)
+        if match:
+            artist = catalogue.spotify['artists'].get(match.group(1))
+            if artist is None:
+                return self._not_found('spotify')
+            self._send(200, {'tracks': [catalogue.full_track(t) for t in artist['top_tracks']]})
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/artists/([^/]+)/albums', path)
+        if match:
+            artist = catalogue.spotify['artists'].get(match.group(1))
+            if artist is None:
+                return self._not_found('spotify')
+            limit, offset = int(query.get('limit', 20)), int(query.get('offset', 0))
+            items = [catalogue.simple_album(a) for a in artist['albums'][offset:offset + limit]]
+            self._send(200, {'items': items, 'total': len(artist['albums']), 'limit': limit,
+                             'offset': offset, 'next': None})
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/artists/([^/]+)', path)
+        if match:
+            artist = catalogue.simple_artist(match.group(1))
+            if artist is None:
+                return self._not_found('spotify')
+            self._send(200, artist)
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/albums/([^/]+)/tracks', path)
+        if match:
+            album = catalogue.spotify['albums'].get(match.group(1))
+            if album is None:
+                return self._not_found('spotify')
+            items = [catalogue.full_track(t, simplified=True) for t in album['tracks']]
+            self._send(200, {'items': items, 'total': len(items), 'limit': 50, 'offset': 0, 'next': None})
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/albums/([^/]+)', path)
+        if match:
+            if match.group(1) not in catalogue.spotify['albums']:
+                return self._not_found('spotify')
+            self._send(200, catalogue.simple_album(match.group(1)))
+            return 200
+
+        if path == '/spotify/v1/tracks':
+            ids = [i for i in query.get('ids', '').split(',') if i]
+            self._send(200, {'tracks': [catalogue.full_track(i) for i in ids]})
+            return 200
+
+        match = re.fullmatch(r'/spotify/v1/tracks/([^/]+)', path)
+        if match:
+            track = catalogue.full_track(match.group(1))
+            if track is None:
+                return self._not_found('spotify')
+            self._send(200, track)
+            return 200
+
+        if path == '/spotify/v1/search':
+            search_type = query.get('type', 'track').split(',')[0]
+            self._send(200, catalogue.spotify_search(query.get('q', ''), search_type, int(query.get('limit', 10))))
+            return 200
+
+        if path in ('/genius/public/search/multi', '/genius/public/search/song', '/genius/api/search'):
+            hits = [{'type': 'song', 'index': 'song', 'result': info}
+                    for info in catalogue.genius_search(query.get('q', ''), int(query.get('per_page', 10)))]
+            if path == '/genius/public/search/multi':
+                response = {'sections': [{'type': 'top_hit', 'hits': hits[:1]}, {'type': 'song', 'hits': hits}]}
+            elif path == '/genius/public/search/song':
+                response = {'sections': [{'type': 'song', 'hits': hits}], 'next_page': None}
+            else:
+                response = {'hits': hits}
+            self._send(200, {'meta': {'status': 200}, 'response': response})
+            return 200
+
+        match = re.fullmatch(r'/genius/(?:api|public)/songs/(\d+)', path)
+        if match:
+            song = catalogue.songs.get(match.group(1))
+            if song is None:
+                return self._not_found('genius')
+            self._send(200, {'meta': {'status': 200}, 'response': {'song': catalogue.song_info(song)}})
+            return 200
+
+        if path.startswith('/genius/web/'):
+            song = catalogue.song_by_path(path[len('/genius/web/'):])
+            if song is None:
+                return self._not_found('genius', html_page=True)
+            self._send(200, catalogue.song_page(song), content_type='text/html')
+            return 200
+
+        if path == '/musixmatch/ws/1.1/track.search':
+            track_list = catalogue.musixmatch_search(query.get('q_track') or query.get('q', ''),
+                                                     query.get('q_artist', ''), int(query.get('page_size', 10)))
+            return self._musixmatch({'track_list': track_list})
+
+        if path in ('/musixmatch/ws/1.1/track.get', '/musixmatch/ws/1.1/track.lyrics.get'):
+            song = catalogue.songs.get(query.get('track_id', ''))
+            if song is None:
+                return self._musixmatch([], status=404)
+            if path.endswith('track.get'):
+                return self._musixmatch({'track': catalogue.musixmatch_track(song)})
+            return self._musixmatch({'lyrics': catalogue.musixmatch_lyrics(song)})
+
+        return self._not_found(self._provider(path))
+
+    def _not_found(self, provider, html_page=False):
+        if html_page:
+            self._send(404, '<html><body>Page not found</body></html>', content_type='text/html')
+        elif provider == 'genius':
+            self._send(404, {'meta': {'status': 404, 'message': 'Not found'}})
+        else:
+            self._send(404, {'error': {'status': 404, 'message': 'Resource not found'}})
+        return 404
+
+
+class ServerStats:
+    """
+    Thread-safe request counters and latency samples, exposed at /__stats.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.latencies = defaultdict(list)
+
+    def record(self, provider, status, elapsed):
+        with self.lock:
+            self.counts[provider][str(status)] += 1
+            self.latencies[provider].append(elapsed)
+
+    def snapshot(self):
+        with self.lock:
+            result = {}
+            for provider, counts in self.counts.items():
+                samples = sorted(self.latencies[provider])
+                pct = lambda p: round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2) if samples else None
+                result[provider] = {'requests': sum(counts.values()), 'status': dict(counts),
+                                    'p50_ms': pct(0.50), 'p95_ms': pct(0.95), 'p99_ms': pct(0.99)}
+            return result
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, profile=None, seed=0):
+        super().__init__(address, MockRequestHandler)
+        profile = merge_profile(DEFAULT_PROFILE, profile)
+        rng = random.Random(seed)
+        self.catalogue = MockCatalogue(fixtures)
+        self.faults = {name: FaultInjector(profile[name], random.Random(rng.random())) for name in profile}
+        self.stats = ServerStats()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_mock_server(fixtures, profile=None, host='127.0.0.1', port=0, seed=0):
+    """
+    Starts a mock server on a background thread.
+
+    Parameters:
+    - fixtures (dict): Fixture set (see recorded_fixtures / synthetic_fixtures).
+    - profile (dict): Partial latency/fault profile merged over DEFAULT_PROFILE.
+    - host (str): Bind address.
+    - port (int): Port, or 0 to pick a free one.
+    - seed (int): Seed for latency and fault sampling.
+
+    Returns:
+    - MockServer: Running server; use server.base_url and server.shutdown().
+    """
+    server = MockServer((host, port), fixtures, profile=profile, seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info("Mock server listening on %s", server.base_url)
+    return server
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Spotify/Genius/Musixmatch stand-in for offline load tests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--fixtures', default='recorded',
+                        help="'recorded', 'synthetic' or a path to a fixtures JSON file")
+    parser.add_argument('--artists', type=int, default=100, help="Synthetic artist count")
+    parser.add_argument('--tracks-per-artist', type=int, default=10, help="Synthetic tracks per artist")
+    parser.add_argument('--profile', help="JSON file with latency/fault overrides per provider")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save-fixtures', help="Write the loaded fixtures to this path and continue")
+    parser.add_argument('--top-tracks', default=TOP_TRACKS_JSON, help="Recorded top tracks JSON")
+    parser.add_argument('--dataset', default=DATASET_JSON, help="Recorded dataset JSON with lyrics, writers and genres")
+    args = parser.parse_args()
+
+    if args.fixtures == 'recorded':
+        fixtures = recorded_fixtures(args.top_tracks, args.dataset)
+    elif args.fixtures == 'synthetic':
+        fixtures = synthetic_fixtures(args.artists, args.tracks_per_artist, seed=args.seed)
+    else:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+    if args.save_fixtures:
+        with open(args.save_fixtures, 'w', encoding='utf-8') as f:
+            json.dump(fixtures, f, ensure_ascii=False)
+
+    profile = None
+    if args.profile:
+        with open(args.profile, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+
+    server = MockServer((args.host, args.port), fixtures, profile=profile, seed=args.seed)
+    print(f"Serving {len(fixtures['spotify']['tracks'])} tracks / {len(fixtures['genius']['songs'])} songs "
+          f"on {server.base_url} (set POPLYRICS_MOCK_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 import json
-from collections import defaultdict
+import os
+import sqlite3
+import tempfile
+
+from track_io import iter_tracks, indent
 
 class SongOrganizer:
     def __init__(self, input_file, output_file):
@@ -8,39 +12,64 @@ class SongOrganizer:
     
     def organize_songs_by_artist(self):
         """
-        Reads JSON data from input_file, groups songs by artist,
+        Streams songs from input_file, groups them by artist (in order of first appearance),
         and writes the organized data to output_file.
+
+        Songs are spooled to a temporary SQLite file rather than held in memory, so memory
+        stays flat however large the input is.
         """
-        try:
-            # Load the data from the JSON file
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except FileNotFoundError:
+        if not os.path.exists(self.input_file):
             print(f"Error: The file {self.input_file} does not exist.")
             return
-        except json.JSONDecodeError:
-            print(f"Error: The file {self.input_file} is not a valid JSON file.")
-            return
-        
-        # Group songs by artist
-        artist_dict = defaultdict(list)
-        for song in data:
-            artist = song.get('artist', 'Unknown Artist')
-            artist_dict[artist].append(song)
-        
-        # Convert defaultdict to regular dict for JSON serialization
-        organized_data = dict(artist_dict)
-        
-        try:
-            # Save the grouped data to the output file
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                json.dump(organized_data, f, indent=4)
-            print(f"Songs have been organized by artist and saved to '{self.output_file}'.")
-        except IOError:
-            print(f"Error: Could not write to file {self.output_file}.")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spool = sqlite3.connect(os.path.join(tmp_dir, 'spool.db'))
+            spool.execute("CREATE TABLE songs (artist_rank INTEGER, seq INTEGER, artist TEXT, song TEXT)")
+            try:
+                # Group songs by artist
+                artist_ranks = {}
+                rows = []
+                for seq, song in enumerate(iter_tracks(self.input_file)):
+                    artist = song.get('artist', 'Unknown Artist')
+                    rank = artist_ranks.setdefault(artist, len(artist_ranks))
+                    rows.append((rank, seq, artist, json.dumps(song, indent=4)))
+                    if len(rows) >= 1000:
+                        spool.executemany("INSERT INTO songs VALUES (?, ?, ?, ?)", rows)
+                        rows = []
+                spool.executemany("INSERT INTO songs VALUES (?, ?, ?, ?)", rows)
+                spool.execute("CREATE INDEX idx_songs_order ON songs (artist_rank, seq)")
+            except json.JSONDecodeError:
+                print(f"Error: The file {self.input_file} is not a valid JSON file.")
+                spool.close()
+                return
+
+            try:
+                # Save the grouped data to the output file (the layout of json.dump(..., indent=4))
+                with open(self.output_file, 'w', encoding='utf-8') as f:
+                    self._write_grouped(f, spool.execute("SELECT artist, song FROM songs ORDER BY artist_rank, seq"))
+                print(f"Songs have been organized by artist and saved to '{self.output_file}'.")
+            except IOError:
+                print(f"Error: Could not write to file {self.output_file}.")
+            finally:
+                spool.close()
+
+    @staticmethod
+    def _write_grouped(f, rows):
+        current = None
+        f.write('{')
+        for artist, song in rows:
+            if artist != current:
+                if current is not None:
+                    f.write('\n    ],')
+                f.write(f"\n    {json.dumps(artist)}: [\n")
+                current = artist
+            else:
+                f.write(',\n')
+            f.write(indent(song, 8))
+        f.write('\n    ]\n}' if current is not None else '}')
 
 if __name__ == "__main__":
     input_file = 'filtered_pop_lyrics_dataset.json'
     output_file = 'songs_by_artist.json'
     organizer = SongOrganizer(input_file, output_file)
-    organizer.organize_songs_by_artist()
\ No newline at end of file
+    organizer.organize_songs_by_artist()
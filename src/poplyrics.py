@@ -0,0 +1,316 @@
+"""
+Lazy queries over the published dataset.
+
+    from poplyrics import PopLyrics
+
+    songs = PopLyrics('poplyric-1k.parquet')
+    titles = songs.where(artist='Lady Gaga').select('track_name', 'release_date').to_table()
+    for record in songs.where(years=(2010, 2019), min_popularity=80).select('artist', 'track_name'):
+        ...
+
+Opening a dataset reads only the Parquet footer. where() and select() return new queries
+without reading anything; the filters on artist, year, popularity and language are
+handed to the Arrow dataset scanner, which skips row groups whose column statistics
+cannot match, and only the selected and filtered columns are decoded. A query that does
+not select `lyrics` never reads a lyrics page. Files exported by dataset_store.py are
+ordered by artist, so an artist filter reads one or two row groups; they also carry
+typed release dates (see schema.py) and a page index for readers that use one.
+
+Genre is a list column whose statistics cannot prune anything; it is filtered batch by
+batch with Arrow kernels after the scan. JSON and JSON Lines files are supported too,
+by streaming them with only the needed fields decoded (track_io.iter_tracks).
+
+    python poplyrics.py poplyric-1k.parquet --artist "Lady Gaga" --fields track_name,release_date
+"""
+import argparse
+import datetime
+import os
+
+from track_io import iter_tracks, PARQUET_EXTENSIONS
+
+# -------------------- Configuration --------------------
+
+PARQUET_DATASET = 'poplyric-1k.parquet'
+
+BATCH_SIZE = 10000
+
+# Column each filter of where() reads
+FILTER_COLUMNS = {'artist': 'artist', 'genre': 'genre', 'years': 'release_date',
+                  'min_popularity': 'popularity', 'max_popularity': 'popularity', 'language': 'language'}
+
+# -------------------- Predicates --------------------
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _year_bounds(years):
+    """
+    Accepts a year, a (from, to) pair with either end None, or a decade string like '1990s'.
+    """
+    if isinstance(years, str) and years.endswith('s'):
+        start = int(years[:-1])
+        return start, start + 9
+    if isinstance(years, (tuple, list)):
+        return years[0], years[1]
+    return int(years), int(years)
+
+
+def _record_year(release_date):
+    text = (release_date or '')[:4]
+    return int(text) if text.isdigit() else None
+
+
+def _matches(record, filters):
+    """
+    Applies query filters to a plain record (JSON sources).
+    """
+    if 'artist' in filters and record.get('artist') not in filters['artist']:
+        return False
+    if 'genre' in filters and not set(record.get('genre') or []) & set(filters['genre']):
+        return False
+    if 'years' in filters:
+        year_from, year_to = filters['years']
+        year = _record_year(record.get('release_date'))
+        if year is None or (year_from is not None and year < year_from) or (year_to is not None and year > year_to):
+            return False
+    popularity = record.get('popularity')
+    if 'min_popularity' in filters and (popularity is None or popularity < filters['min_popularity']):
+        return False
+    if 'max_popularity' in filters and (popularity is None or popularity > filters['max_popularity']):
+        return False
+    if 'language' in filters and record.get('language') not in filters['language']:
+        return False
+    return True
+
+# -------------------- Query --------------------
+
+class PopLyrics:
+    """
+    A lazy query over a dataset file. Queries are immutable: where() and select() return new ones.
+
+    Parameters:
+    - path (str): Parquet, JSON or JSON Lines dataset file.
+    - batch_size (int): Records per batch when scanning.
+    """
+
+    def __init__(self, path=PARQUET_DATASET, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.filters = {}
+        self.columns = None
+        self.is_parquet = os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS
+        if self.is_parquet:
+            import pyarrow.dataset as ds
+            self.dataset = ds.dataset(path, format='parquet')
+            self.names = self.dataset.schema.names
+        else:
+            self.dataset = None
+            self.names = None
+
+    def _copy(self, filters=None, columns=None):
+        query = object.__new__(PopLyrics)
+        query.__dict__.update(self.__dict__)
+        query.filters = {**self.filters, **(filters or {})}
+        query.columns = columns if columns is not None else self.columns
+        return query
+
+    def where(self, artist=None, genre=None, years=None, min_popularity=None, max_popularity=None, language=None):
+        """
+        Narrows the query; filters combine with AND, and a list means any of its values.
+
+        Parameters:
+        - artist (str or list of str): Exact artist names.
+        - genre (str or list of str): Tracks with any of these genres.
+        - years (int, (from, to) or '1990s'): Release years, inclusive.
+        - min_popularity, max_popularity (int): Inclusive popularity range.
+        - language (str or list of str): Detected lyrics language codes.
+        """
+        filters = {}
+        if artist is not None:
+            filters['artist'] = _as_list(artist)
+        if genre is not None:
+            filters['genre'] = _as_list(genre)
+        if years is not None:
+            filters['years'] = _year_bounds(years)
+        if min_popularity is not None:
+            filters['min_popularity'] = min_popularity
+        if max_popularity is not None:
+            filters['max_popularity'] = max_popularity
+        if language is not None:
+            filters['language'] = _as_list(language)
+        for name in filters:
+            column = FILTER_COLUMNS[name]
+            if self.names is not None and column not in self.names:
+                raise ValueError(f"{self.path} has no {column} column")
+        return self._copy(filters=filters)
+
+    def select(self, *columns):
+        """
+        Restricts the columns returned (default: all of them).
+        """
+        if self.names is not None:
+            unknown = [column for column in columns if column not in self.names]
+            if unknown:
+                raise ValueError(f"{self.path} has no column(s): {', '.join(unknown)}")
+        return self._copy(columns=list(columns))
+
+    # ---- Parquet ----
+
+    def _expression(self):
+        """
+        Returns the filters the scanner can prune row groups with, as one Arrow expression.
+        """
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        terms = []
+        if 'artist' in self.filters:
+            terms.append(ds.field('artist').isin(self.filters['artist']))
+        if 'language' in self.filters:
+            terms.append(ds.field('language').isin(self.filters['language']))
+        if 'min_popularity' in self.filters:
+            terms.append(ds.field('popularity') >= self.filters['min_popularity'])
+        if 'max_popularity' in self.filters:
+            terms.append(ds.field('popularity') <= self.filters['max_popularity'])
+        if 'years' in self.filters:
+            year_from, year_to = self.filters['years']
+            if 'release_date_start' in self.names:
+                # Typed dates carry row-group statistics
+                date = ds.field('release_date_start')
+                if year_from is not None:
+                    terms.append(date >= datetime.date(year_from, 1, 1))
+                if year_to is not None:
+                    terms.append(date < datetime.date(year_to + 1, 1, 1))
+            else:
+                # Older files: compare the year prefix of the string
+                year = pc.utf8_slice_codeunits(ds.field('release_date'), 0, 4)
+                if year_from is not None:
+                    terms.append(year >= f"{year_from:04d}")
+                if year_to is not None:
+                    terms.append(year <= f"{year_to:04d}")
+                terms.append(pc.match_substring_regex(year, r'^\d{4}$'))
+        expression = None
+        for term in terms:
+            expression = term if expression is None else expression & term
+        return expression
+
+    def _scan_columns(self):
+        columns = list(self.columns or self.names)
+        if 'genre' in self.filters and 'genre' not in columns:
+            columns.append('genre')
+        return columns
+
+    def _genre_mask(self, batch):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        genre = batch.column('genre')
+        flat = pc.list_flatten(genre)
+        hits = pc.is_in(flat, value_set=pa.array(self.filters['genre'], pa.string()))
+        rows = pc.filter(pc.list_parent_indices(genre), hits)
+        return pc.is_in(pa.array(range(batch.num_rows), pa.int64()), value_set=pc.unique(rows))
+
+    def to_batches(self):
+        """
+        Streams the query result as Arrow record batches (Parquet) or record lists (JSON).
+        """
+        if not self.is_parquet:
+            fields = None if self.columns is None else set(self.columns) | set(FILTER_COLUMNS.values())
+            batch = []
+            for record in iter_tracks(self.path, fields=fields):
+                if _matches(record, self.filters):
+                    batch.append(record if self.columns is None else {c: record.get(c) for c in self.columns})
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+            return
+
+        scanner = self.dataset.scanner(columns=self._scan_columns(), filter=self._expression(),
+                                       batch_size=self.batch_size)
+        for batch in scanner.to_batches():
+            if 'genre' in self.filters:
+                batch = batch.filter(self._genre_mask(batch))
+                if self.columns is not None and 'genre' not in self.columns:
+                    batch = batch.drop_columns(['genre'])
+            if batch.num_rows:
+                yield batch
+
+    def __iter__(self):
+        """
+        Yields matching records as dicts.
+        """
+        for batch in self.to_batches():
+            yield from (batch if isinstance(batch, list) else batch.to_pylist())
+
+    def to_table(self):
+        """
+        Returns the query result as an Arrow table.
+        """
+        import pyarrow as pa
+        if self.is_parquet:
+            schema = self.dataset.schema
+            schema = pa.schema([schema.field(name) for name in self.columns or self.names])
+            return pa.Table.from_batches(list(self.to_batches()), schema=schema)
+        return pa.Table.from_pylist([record for batch in self.to_batches() for record in batch])
+
+    def to_pandas(self):
+        return self.to_table().to_pandas()
+
+    def count(self):
+        """
+        Number of matching records; reads only the filter columns.
+        """
+        if self.is_parquet and 'genre' not in self.filters:
+            return self.dataset.count_rows(filter=self._expression())
+        return sum(len(batch) if isinstance(batch, list) else batch.num_rows
+                   for batch in self.select('genre' if self.is_parquet else 'artist').to_batches())
+
+    def plan(self):
+        """
+        Describes what a scan of this query reads: row groups kept after statistics pruning,
+        out of all row groups, and the columns decoded.
+        """
+        if not self.is_parquet:
+            return {'source': 'json', 'columns': self.columns}
+        expression = self._expression()
+        total = kept = 0
+        for fragment in self.dataset.get_fragments():
+            total += fragment.metadata.num_row_groups
+            kept += len(fragment.split_by_row_group(expression)) if expression is not None \
+                else fragment.metadata.num_row_groups
+        return {'source': 'parquet', 'row_groups': total, 'row_groups_read': kept, 'columns': self._scan_columns()}
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the dataset without loading all of it.")
+    parser.add_argument('path', nargs='?', default=PARQUET_DATASET)
+    parser.add_argument('--artist', action='append')
+    parser.add_argument('--genre', action='append')
+    parser.add_argument('--years', help="Year, range (2010-2019) or decade (1990s)")
+    parser.add_argument('--min-popularity', type=int)
+    parser.add_argument('--max-popularity', type=int)
+    parser.add_argument('--language', action='append')
+    parser.add_argument('--fields', default='artist,track_name,release_date,popularity')
+    parser.add_argument('--plan', action='store_true', help="Print what the scan reads instead of the results")
+    args = parser.parse_args()
+
+    years = args.years
+    if years and '-' in years:
+        year_from, _, year_to = years.partition('-')
+        years = (int(year_from) if year_from else None, int(year_to) if year_to else None)
+    fields = args.fields.split(',')
+    query = PopLyrics(args.path).where(artist=args.artist, genre=args.genre, years=years,
+                                        min_popularity=args.min_popularity, max_popularity=args.max_popularity,
+                                        language=args.language).select(*fields)
+    if args.plan:
+        print(query.plan())
+        return
+    for record in query:
+        print('\t'.join(str(record.get(field)) for field in fields))
+
+if __name__ == "__main__":
+    main()
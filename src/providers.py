@@ -0,0 +1,343 @@
+"""
+Lyrics providers behind one interface, with hedged lookups across them.
+
+A slow Genius search or page scrape used to hold a track for as long as its retries
+took. HedgedLookup asks the primary provider first and, once that call has taken longer
+than a recent latency percentile of the provider (p95 by default), sends a backup request
+to the next provider. Whichever answer is acceptable first wins; a provider that answers
+with a miss or fails hands over to the next one immediately. Only lookups in the slow
+tail are duplicated, so the extra load on the backup is bounded by the percentile.
+
+    providers = [GeniusProvider(fetch), MusixmatchProvider(api_key)]
+    lookup = HedgedLookup(providers, percentile=0.95)
+    result = lookup.lookup('Lady Gaga', 'Die With A Smile')   # {'provider', 'lyrics', 'songwriters', 'url'}
+
+Both providers follow endpoints.py, so the whole layer runs against mock_server.py:
+
+    python providers.py "Lady Gaga" "Die With A Smile"
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from difflib import SequenceMatcher
+
+from resilience import call_with_retry, CircuitOpenError, RetryPolicy, MUSIXMATCH_HOST
+from search_planner import normalize_text
+from structured_log import log_context
+from track_io import NO_LYRICS
+
+# -------------------- Configuration --------------------
+
+DEFAULT_PERCENTILE = 0.95
+
+# Hedge delay used until a provider has MIN_SAMPLES latencies, and its bounds afterwards
+INITIAL_HEDGE_DELAY = 5.0
+MIN_HEDGE_DELAY = 0.5
+MAX_HEDGE_DELAY = 30.0
+MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+# Threads shared by all lookups; losing requests run to completion in the background
+MAX_WORKERS = 16
+
+MUSIXMATCH_CANDIDATES = 5
+MUSIXMATCH_MATCH_THRESHOLD = 0.8
+MUSIXMATCH_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=1.0)
+
+# The free Musixmatch plan returns part of the lyrics followed by this notice
+COMMERCIAL_NOTICE_RE = re.compile(r'\*+\s*This Lyrics is NOT for Commercial use\s*\*+.*$', re.DOTALL | re.IGNORECASE)
+TRUNCATION_MARK = '...'
+
+# -------------------- Latency Tracking --------------------
+
+class LatencyTracker:
+    """
+    Rolling window of a provider's call latencies (seconds).
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, elapsed):
+        with self.lock:
+            self.samples.append(elapsed)
+
+    def percentile(self, p):
+        """
+        Returns the p-quantile (0-1) of the window, or None with fewer than MIN_SAMPLES samples.
+        """
+        with self.lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+# -------------------- Providers --------------------
+
+def is_acceptable(result):
+    """
+    A result wins a hedged lookup if it has complete lyrics.
+    """
+    return bool(result) and bool(result.get('lyrics')) and result['lyrics'] != NO_LYRICS \
+        and result.get('complete', True)
+
+
+class LyricsProvider:
+    """
+    Interface of a lyrics source.
+
+    lookup(artist, title) returns {'provider', 'lyrics', 'songwriters', 'url', 'complete'}
+    or None when the provider has no such song; provider failures are raised.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.latency = LatencyTracker()
+
+    def lookup(self, artist, title):
+        raise NotImplementedError
+
+    def result(self, lyrics, songwriters=None, url=None, complete=True):
+        return {'provider': self.name, 'lyrics': lyrics, 'songwriters': list(songwriters or []),
+                'url': url, 'complete': complete}
+
+
+class GeniusProvider(LyricsProvider):
+    """
+    Genius through the pipeline's own search, caches and scraping.
+
+    Parameters:
+    - fetch (callable): fetch(artist, title) -> (lyrics, songwriters), e.g. a binding of
+      main.fetch_lyrics_and_songwriters to a Genius client.
+    """
+
+    name = 'genius'
+
+    def __init__(self, fetch):
+        super().__init__()
+        self.fetch = fetch
+
+    def lookup(self, artist, title):
+        lyrics, songwriters = self.fetch(artist, title)
+        return self.result(lyrics, songwriters) if lyrics else None
+
+
+class MusixmatchError(Exception):
+    """
+    Musixmatch reports errors in the response header with HTTP 200; the status is carried
+    as http_status so that resilience.classify_error treats it like an HTTP error.
+    """
+
+    def __init__(self, status, method):
+        self.http_status = status
+        super().__init__(f"Musixmatch {method} returned status {status}")
+
+
+def _similarity(a, b):
+    return SequenceMatcher(None, normalize_text(a), normalize_text(b)).ratio()
+
+
+class MusixmatchProvider(LyricsProvider):
+    """
+    Musixmatch track.search and track.lyrics.get.
+
+    Musixmatch has no writer credits, so results carry no songwriters; lyrics cut short by
+    the free plan are returned with complete=False and do not win a lookup.
+
+    Parameters:
+    - api_key (str): Musixmatch API key.
+    - api_root (str): API root; defaults to endpoints.MUSIXMATCH_API_ROOT.
+    - threshold (float): Similarity both title and artist of a hit must reach.
+    """
+
+    name = 'musixmatch'
+
+    def __init__(self, api_key, api_root=None, threshold=MUSIXMATCH_MATCH_THRESHOLD, timeout=10):
+        super().__init__()
+        if api_root is None:
+            from endpoints import MUSIXMATCH_API_ROOT
+            api_root = MUSIXMATCH_API_ROOT
+        self.api_key = api_key
+        self.api_root = api_root
+        self.threshold = threshold
+        self.timeout = timeout
+
+    def _get(self, method, **params):
+        import requests
+        response = requests.get(self.api_root + method, params={'apikey': self.api_key, 'format': 'json', **params},
+                                timeout=self.timeout)
+        response.raise_for_status()
+        message = response.json().get('message') or {}
+        status = (message.get('header') or {}).get('status_code', 200)
+        if status == 404:
+            return None
+        if status != 200:
+            raise MusixmatchError(status, method)
+        return message.get('body') or None
+
+    def call(self, method, **params):
+        return call_with_retry(MUSIXMATCH_HOST, self._get, method, policy=MUSIXMATCH_RETRY_POLICY, **params)
+
+    def search(self, artist, title):
+        """
+        Returns the best matching track of a track.search, or None.
+        """
+        body = self.call('track.search', q_track=title, q_artist=artist, f_has_lyrics=1,
+                         page_size=MUSIXMATCH_CANDIDATES, s_track_rating='desc')
+        best, best_score = None, 0.0
+        for item in (body or {}).get('track_list') or []:
+            track = item.get('track') or {}
+            score = min(_similarity(track.get('track_name', ''), title), _similarity(track.get('artist_name', ''), artist))
+            if score > best_score:
+                best, best_score = track, score
+        if best is None or best_score < self.threshold:
+            return None
+        return best
+
+    def lookup(self, artist, title):
+        track = self.search(artist, title)
+        if track is None:
+            return None
+        body = self.call('track.lyrics.get', track_id=track['track_id'])
+        lyrics = ((body or {}).get('lyrics') or {}).get('lyrics_body') or ''
+        lyrics = COMMERCIAL_NOTICE_RE.sub('', lyrics).strip()
+        if not lyrics:
+            return None
+        complete = not lyrics.endswith(TRUNCATION_MARK)
+        return self.result(lyrics, url=track.get('track_share_url'), complete=complete)
+
+# -------------------- Hedged Lookup --------------------
+
+class HedgedLookup:
+    """
+    Looks a song up across providers in order, hedging slow calls.
+
+    Parameters:
+    - providers (list of LyricsProvider): Providers in order of preference.
+    - percentile (float): Latency quantile of a provider after which the next provider is asked.
+    - accept (callable): accept(result) -> bool; defaults to is_acceptable.
+    - max_workers (int): Threads shared by all lookups.
+    """
+
+    def __init__(self, providers, percentile=DEFAULT_PERCENTILE, accept=is_acceptable, max_workers=MAX_WORKERS):
+        if not providers:
+            raise ValueError("HedgedLookup needs at least one provider")
+        self.providers = list(providers)
+        self.percentile = percentile
+        self.accept = accept
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lyrics')
+        self.lock = threading.Lock()
+        self.counts = {'lookups': 0, 'hedged': 0, 'misses': 0, 'errors': 0,
+                       **{f"won_{provider.name}": 0 for provider in self.providers}}
+
+    def hedge_delay(self, provider):
+        """
+        Seconds to wait on a provider before asking the next one.
+        """
+        delay = provider.latency.percentile(self.percentile)
+        if delay is None:
+            return INITIAL_HEDGE_DELAY
+        return min(MAX_HEDGE_DELAY, max(MIN_HEDGE_DELAY, delay))
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    @staticmethod
+    def _timed(provider, artist, title):
+        started = time.perf_counter()
+        try:
+            with log_context(provider=provider.name):
+                return provider.lookup(artist, title)
+        finally:
+            provider.latency.record(time.perf_counter() - started)
+
+    def lookup(self, artist, title, raise_on_error=False):
+        """
+        Returns the first acceptable result, or None if no provider has the song.
+
+        With raise_on_error, a lookup in which no provider succeeded and one failed raises
+        that failure (a CircuitOpenError first), since the song may well exist.
+        """
+        self._count('lookups')
+        queue = list(self.providers)
+        pending = {}
+        deadline = None
+        errors = []
+
+        def launch():
+            nonlocal deadline
+            provider = queue.pop(0)
+            # Provider threads log under the caller's track and stage
+            context = contextvars.copy_context()
+            pending[self.executor.submit(context.run, self._timed, provider, artist, title)] = provider
+            deadline = time.monotonic() + self.hedge_delay(provider)
+
+        launch()
+        while pending:
+            timeout = max(0.0, deadline - time.monotonic()) if queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logging.info("Hedging '%s - %s': no answer from %s; asking %s.",
+                             artist, title, ', '.join(p.name for p in pending.values()), queue[0].name)
+                self._count('hedged')
+                launch()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error("%s lookup failed for '%s - %s': %s", provider.name, artist, title, e)
+                    self._count('errors')
+                    errors.append(e)
+                    continue
+                if self.accept(result):
+                    self._count(f"won_{provider.name}")
+                    if pending:
+                        logging.info("%s answered first for '%s - %s'.", provider.name, artist, title)
+                    return result
+                if result:
+                    logging.info("Incomplete lyrics from %s for '%s - %s'.", provider.name, artist, title)
+            if not pending and queue:
+                # Every provider asked so far came back empty; don't wait out the threshold
+                launch()
+
+        if raise_on_error and errors:
+            raise next((e for e in errors if isinstance(e, CircuitOpenError)), errors[0])
+        self._count('misses')
+        return None
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        for provider in self.providers:
+            p = provider.latency.percentile(self.percentile)
+            counts[f"{provider.name}_p{round(self.percentile * 100)}_s"] = round(p, 3) if p is not None else None
+        return counts
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Look a song up on Musixmatch (e.g. against mock_server.py).")
+    parser.add_argument('artist')
+    parser.add_argument('title')
+    args = parser.parse_args()
+
+    provider = MusixmatchProvider(os.getenv('MUSIXMATCH_API_KEY', 'your_musixmatch_api_key'))
+    print(json.dumps(provider.lookup(args.artist, args.title), ensure_ascii=False, indent=4))
+
+if __name__ == "__main__":
+    main()
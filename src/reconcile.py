@@ -0,0 +1,198 @@
+"""
+One-pass reconciliation of every pipeline artifact into a per-track status matrix.
+
+Replaces running compare_tracks.py, find_unprocessed.py and check_null.py separately.
+Each input is streamed once and folded into a hash table keyed by normalized
+(artist, title), with Spotify track IDs mapped onto the same rows, so the whole report is
+linear in the total input size:
+
+    fetched      listed in top_tracks.json
+    enriched     present in the dataset
+    null_lyrics  present in the dataset without lyrics
+    copies       number of dataset records for the track (> 1 is a duplicate)
+    defective    listed in defective_tracks.txt
+    attempted    a repair was started for it (fix.py log, JSON Lines or plain text)
+    repaired     present in fixed_tracks.json
+    exported     present in the published export
+
+    python reconcile.py --output reconciliation.csv
+"""
+import argparse
+import csv
+import logging
+import os
+
+from search_planner import normalize_text
+from structured_log import iter_events
+from track_io import iter_tracks, write_atomic, NO_LYRICS
+
+# -------------------- Configuration --------------------
+
+TOP_TRACKS_JSON = 'top_tracks.json'
+DATASET_JSON = 'pop_lyrics_dataset.json'
+FIXED_TRACKS_JSON = 'fixed_tracks.json'
+DEFECTIVE_TRACKS_TXT = 'defective_tracks.txt'
+FIX_LOG = 'fix_tracks.jsonl'
+EXPORT_JSON = 'filtered_pop_lyrics_dataset.json'
+
+STATUS_COLUMNS = ['fetched', 'enriched', 'null_lyrics', 'copies', 'defective', 'attempted', 'repaired', 'exported']
+MATRIX_COLUMNS = ['artist', 'track_name', 'spotify_track_id'] + STATUS_COLUMNS
+
+# -------------------- Status Matrix --------------------
+
+class StatusMatrix:
+    """
+    Per-track status rows keyed by normalized (artist, title), with Spotify IDs and bare
+    titles resolved to the same rows.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.by_id = {}
+        self.by_title = {}
+        self.unresolved = []    # (source, entry) that matched no track
+
+    def _row(self, artist, track_name, track_id=None):
+        if track_id and track_id in self.by_id:
+            return self.rows[self.by_id[track_id]]
+        key = f"{normalize_text(artist)}\x1f{normalize_text(track_name)}"
+        row = self.rows.get(key)
+        if row is None:
+            row = {'artist': artist, 'track_name': track_name, 'spotify_track_id': None,
+                   **{column: 0 if column == 'copies' else False for column in STATUS_COLUMNS}}
+            self.rows[key] = row
+            self.by_title.setdefault(normalize_text(track_name), []).append(key)
+        if track_id and not row['spotify_track_id']:
+            row['spotify_track_id'] = track_id
+            self.by_id[track_id] = key
+        return row
+
+    def mark_record(self, record, column):
+        row = self._row(record.get('artist') or '', record.get('track_name') or '', record.get('spotify_track_id'))
+        row[column] = True
+        return row
+
+    def mark_name(self, artist, track_name, column, source):
+        """
+        Marks a track named in a text file or log. A bare title marks every track with that
+        title, and a Spotify track ID (as fix.py logs ID jobs) marks its track; if no track
+        matches yet, the entry is reported as unresolved.
+        """
+        if artist:
+            self._row(artist, track_name)[column] = True
+            return
+        if track_name in self.by_id:
+            self.rows[self.by_id[track_name]][column] = True
+            return
+        keys = self.by_title.get(normalize_text(track_name))
+        if not keys:
+            self.unresolved.append((source, track_name))
+            return
+        for key in keys:
+            self.rows[key][column] = True
+
+# -------------------- Readers --------------------
+
+def _exists(path):
+    if path and os.path.exists(path):
+        return True
+    if path:
+        logging.warning("%s not found; its column stays empty.", path)
+    return False
+
+
+def reconcile(top_tracks=TOP_TRACKS_JSON, dataset=DATASET_JSON, fixed=FIXED_TRACKS_JSON,
+              defective=DEFECTIVE_TRACKS_TXT, log=FIX_LOG, export=EXPORT_JSON):
+    """
+    Streams each artifact once and builds the status matrix. Missing files are skipped.
+
+    Record files are read before the defective list and the log, so that bare titles in
+    those resolve against every known track.
+
+    Returns:
+    - StatusMatrix: The reconciled rows.
+    """
+    matrix = StatusMatrix()
+    fields = ['artist', 'track_name', 'spotify_track_id']
+
+    if _exists(top_tracks):
+        for record in iter_tracks(top_tracks, fields=fields):
+            matrix.mark_record(record, 'fetched')
+    if _exists(dataset):
+        for record in iter_tracks(dataset, fields=fields + ['lyrics']):
+            row = matrix.mark_record(record, 'enriched')
+            row['copies'] += 1
+            lyrics = record.get('lyrics')
+            if not lyrics or lyrics == NO_LYRICS:
+                row['null_lyrics'] = True
+    if _exists(fixed):
+        for record in iter_tracks(fixed, fields=fields):
+            matrix.mark_record(record, 'repaired')
+    if _exists(export):
+        for record in iter_tracks(export, fields=fields):
+            matrix.mark_record(record, 'exported')
+
+    if _exists(defective):
+        with open(defective, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    artist, _, track_name = line.partition(' - ') if ' - ' in line else ('', '', line)
+                    matrix.mark_name(artist, track_name, 'defective', defective)
+    if _exists(log):
+        for record in iter_events(log, 'attempt'):
+            matrix.mark_name(record.get('artist'), record.get('track') or record.get('spotify_track_id'),
+                             'attempted', log)
+    return matrix
+
+
+def summarize(matrix):
+    """
+    Counts tracks per status and the combinations that need attention.
+    """
+    rows = matrix.rows.values()
+    summary = {column: sum(1 for row in rows if row[column]) for column in STATUS_COLUMNS if column != 'copies'}
+    summary.update({
+        'tracks': len(matrix.rows),
+        'duplicated': sum(1 for row in rows if row['copies'] > 1),
+        'fetched_not_enriched': sum(1 for row in rows if row['fetched'] and not row['enriched']),
+        'null_not_repaired': sum(1 for row in rows if row['null_lyrics'] and not row['repaired']),
+        'defective_not_attempted': sum(1 for row in rows if row['defective'] and not row['attempted']),
+        'repaired_not_exported': sum(1 for row in rows if row['repaired'] and not row['exported']),
+        'unresolved_names': len(matrix.unresolved),
+    })
+    return summary
+
+
+def write_matrix(matrix, path):
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=MATRIX_COLUMNS)
+        writer.writeheader()
+        for row in matrix.rows.values():
+            writer.writerow({column: int(value) if isinstance(value, bool) else value for column, value in row.items()})
+        return len(matrix.rows)
+    return write_atomic(path, write, newline='')
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile all pipeline artifacts into a per-track status matrix.")
+    parser.add_argument('--top-tracks', default=TOP_TRACKS_JSON)
+    parser.add_argument('--dataset', default=DATASET_JSON)
+    parser.add_argument('--fixed', default=FIXED_TRACKS_JSON)
+    parser.add_argument('--defective', default=DEFECTIVE_TRACKS_TXT)
+    parser.add_argument('--log', default=FIX_LOG, help="fix.py run log")
+    parser.add_argument('--export', default=EXPORT_JSON, help="Published dataset file")
+    parser.add_argument('--output', default='reconciliation.csv', help="Status matrix CSV")
+    args = parser.parse_args()
+
+    matrix = reconcile(args.top_tracks, args.dataset, args.fixed, args.defective, args.log, args.export)
+    count = write_matrix(matrix, args.output)
+    for name, value in summarize(matrix).items():
+        print(f"{name}: {value}")
+    for source, name in matrix.unresolved:
+        print(f"Unresolved in {source}: {name}")
+    print(f"Wrote {count} tracks to {args.output}.")
+
+if __name__ == "__main__":
+    main()
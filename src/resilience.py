@@ -0,0 +1,322 @@
+"""
+Shared retry and circuit-breaker layer for calls to Spotify, Genius and other providers.
+
+Every outbound call goes through call_with_retry(host, fn, ...), which:
+- classifies the failure (rate limited, transient, not found, fatal),
+- honors Retry-After on 429 responses,
+- otherwise backs off exponentially with full jitter,
+- and counts failures against a per-host circuit breaker so that, during an outage,
+  workers fail fast with CircuitOpenError instead of queuing doomed calls.
+"""
+import http.client
+import logging
+import random
+import socket
+import threading
+import time
+
+from status import build_status
+
+# -------------------- Configuration --------------------
+
+SPOTIFY_HOST = 'api.spotify.com'
+GENIUS_HOST = 'genius.com'
+MUSIXMATCH_HOST = 'api.musixmatch.com'
+
+# Error classes
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+NOT_FOUND = 'not_found'
+FATAL = 'fatal'
+
+RETRYABLE = {RATE_LIMITED, TRANSIENT}
+
+# Network errors of clients other than requests, matched by class name
+TRANSIENT_ERROR_NAMES = ('Timeout', 'ReadTimeout', 'ConnectTimeout', 'ConnectionError', 'ChunkedEncodingError')
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# -------------------- Error Classification --------------------
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+    def __init__(self, host, retry_at, throttled=False):
+        self.host = host
+        self.retry_at = retry_at
+        self.throttled = throttled
+        super().__init__(f"Circuit open for {host}; retry in {max(0.0, retry_at - time.monotonic()):.1f}s")
+
+
+def _status_and_headers(exc):
+    """
+    Extracts (HTTP status, headers) from spotipy, requests and lyricsgenius exceptions.
+    """
+    # spotipy.SpotifyException
+    status = getattr(exc, 'http_status', None)
+    headers = getattr(exc, 'headers', None)
+    if status is None:
+        # requests.HTTPError carries the response
+        response = getattr(exc, 'response', None)
+        if response is not None:
+            status = getattr(response, 'status_code', None)
+            headers = getattr(response, 'headers', None)
+    if status is None and exc.args and isinstance(exc.args[0], int):
+        # lyricsgenius re-raises HTTPError(status_code, description) without the response
+        status = exc.args[0]
+    return status, headers or {}
+
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header value in seconds (HTTP-date values are ignored).
+
+    Returns:
+    - float or None: Delay in seconds, or None if absent or unparseable.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc):
+    """
+    Classifies an exception raised by a provider call.
+
+    Parameters:
+    - exc (Exception): The raised exception.
+
+    Returns:
+    - tuple: (error class, retry_after seconds or None).
+    """
+    if isinstance(exc, CircuitOpenError):
+        return TRANSIENT, max(0.0, exc.retry_at - time.monotonic())
+
+    status, headers = _status_and_headers(exc)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMITED, parse_retry_after(headers.get('Retry-After') or headers.get('retry-after'))
+        if status in (408, 425) or status >= 500:
+            return TRANSIENT, None
+        if status == 404:
+            return NOT_FOUND, None
+        return FATAL, None
+
+    # Network-level failures (requests Timeout/ConnectionError, socket errors) are transient.
+    # Other requests exceptions (InvalidURL, MissingSchema, InvalidHeader, ...) are OSErrors
+    # too, but they are configuration errors that fail the same way on every attempt.
+    try:
+        from requests import exceptions as requests_exceptions
+    except ImportError:
+        requests_exceptions = None
+    if requests_exceptions is not None and isinstance(exc, requests_exceptions.RequestException):
+        if isinstance(exc, (requests_exceptions.ConnectionError, requests_exceptions.Timeout,
+                            requests_exceptions.ChunkedEncodingError)):
+            return TRANSIENT, None
+        return FATAL, None
+    if isinstance(exc, (TimeoutError, ConnectionError, socket.gaierror, http.client.IncompleteRead)) \
+            or type(exc).__name__ in TRANSIENT_ERROR_NAMES:
+        return TRANSIENT, None
+    return FATAL, None
+
+# -------------------- Retry Policy --------------------
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff with Retry-After support.
+
+    Parameters:
+    - max_attempts (int): Total attempts including the first one.
+    - base_delay (float): Backoff base in seconds.
+    - max_delay (float): Upper bound on a single backoff delay.
+    - max_retry_after (float): Longest Retry-After the caller is willing to wait; longer
+      waits give up immediately so the item can be rescheduled instead of blocking a worker.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, max_retry_after=120.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Returns the delay before the next attempt (attempt is 1-based), or None to give up.
+        """
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            # A little jitter on top keeps workers that were throttled together from retrying in lockstep
+            return retry_after + random.uniform(0, min(1.0, self.base_delay))
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+# -------------------- Circuit Breaker --------------------
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    Opens after `failure_threshold` consecutive retryable failures (or immediately for
+    the Retry-After window of a 429), rejects calls while open, then lets a single probe
+    through (half-open) after `recovery_timeout` seconds.
+    """
+
+    def __init__(self, host, failure_threshold=5, recovery_timeout=30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.throttled = False
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError if the call must not be made.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self.open_until:
+                    raise CircuitOpenError(self.host, self.open_until, self.throttled)
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN:
+                if self.probe_in_flight:
+                    raise CircuitOpenError(self.host, now + 1.0, self.throttled)
+                self.probe_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                logging.info("Circuit for %s closed.", self.host)
+            self.state = CLOSED
+            self.failures = 0
+            self.throttled = False
+            self.probe_in_flight = False
+
+    def record_failure(self, error_class, retry_after=None):
+        """
+        Counts a failed call. Only rate limiting and transient errors trip the breaker.
+        """
+        if error_class not in RETRYABLE:
+            # The host answered, so it is up: this counts as a health signal, not a failure
+            with self.lock:
+                self.probe_in_flight = False
+                self.failures = 0
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.failures += 1
+            self.probe_in_flight = False
+            if error_class == RATE_LIMITED and retry_after:
+                # The provider told us exactly how long to stay away
+                self._open(now + retry_after, throttled=True)
+            elif self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open(now + self.recovery_timeout, throttled=False)
+
+    def _open(self, until, throttled):
+        if self.state != OPEN:
+            logging.warning("Circuit for %s opened after %s failures.", self.host, self.failures)
+        # Once a real outage has opened the circuit, a later 429 must not downgrade it to a throttle
+        self.throttled = throttled and (self.state != OPEN or self.throttled)
+        self.state = OPEN
+        self.open_until = max(self.open_until, until)
+
+    def snapshot(self):
+        with self.lock:
+            return {'state': self.state, 'failures': self.failures, 'throttled': self.throttled,
+                    'open_for': max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host, **kwargs):
+    """
+    Returns the process-wide circuit breaker for a host, creating it on first use.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host, **kwargs)
+        return breaker
+
+
+def breaker_states():
+    """
+    Returns a snapshot of every known breaker, keyed by host.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.snapshot() for breaker in breakers}
+
+# -------------------- Calling --------------------
+
+def call_with_retry(host, fn, *args, policy=None, **kwargs):
+    """
+    Calls fn(*args, **kwargs) under the host's circuit breaker and retry policy.
+
+    Parameters:
+    - host (str): Provider host, used to select the circuit breaker.
+    - fn (callable): The provider call.
+    - policy (RetryPolicy): Retry policy; defaults to DEFAULT_POLICY.
+
+    Returns:
+    - The return value of fn.
+
+    Raises:
+    - CircuitOpenError: If the host's breaker is open because the provider is failing (fail fast).
+      A breaker held open only by a Retry-After window is waited out when the policy allows it.
+    - Exception: The last provider exception once it is non-retryable or attempts are exhausted.
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = get_circuit_breaker(host)
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            wait = e.retry_at - time.monotonic()
+            if not e.throttled or attempt >= policy.max_attempts or wait > policy.max_retry_after:
+                raise
+            time.sleep(max(0.0, wait) + random.uniform(0, min(1.0, policy.base_delay)))
+            continue
+        build_status.request_started(host)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error_class, retry_after = classify_error(e)
+            build_status.request_finished(host, time.monotonic() - started,
+                                          error_class if error_class != NOT_FOUND else None)
+            breaker.record_failure(error_class, retry_after)
+            if error_class not in RETRYABLE or attempt >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt, retry_after)
+            if delay is None:
+                logging.warning("%s asked to wait %ss, longer than allowed; giving up.", host, retry_after)
+                raise
+            logging.warning("%s error from %s on attempt %s: %s. Retrying in %.1fs...", error_class, host, attempt, e, delay)
+            time.sleep(delay)
+            continue
+        build_status.request_finished(host, time.monotonic() - started)
+        breaker.record_success()
+        return result
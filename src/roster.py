@@ -0,0 +1,56 @@
+"""
+Artist roster loading.
+
+The roster maps artist names to Spotify artist IDs. Supported formats:
+- artist.txt style: a Python dict literal assigned to a name (artists_with_ids = {...})
+- JSON: {"Artist": "spotify_id", ...} or [{"name": "Artist", "id": "spotify_id"}, ...]
+- CSV/TSV: one "Artist,spotify_id" (or tab-separated) row per artist, optional header
+"""
+import ast
+import csv
+import json
+import os
+
+# -------------------- Configuration --------------------
+
+ARTIST_ROSTER = os.getenv('ARTIST_ROSTER', 'artist.txt')
+
+# -------------------- Functions --------------------
+
+def _rows_to_roster(rows):
+    roster = {}
+    for row in rows:
+        if len(row) < 2 or not row[0].strip():
+            continue
+        name, artist_id = row[0].strip(), row[1].strip()
+        if (name.lower(), artist_id.lower()) in (('name', 'id'), ('artist', 'artist_id'), ('artist', 'id')):
+            continue  # Header row
+        roster[name] = artist_id
+    return roster
+
+
+def load_roster(path=ARTIST_ROSTER):
+    """
+    Loads an artist roster from a file.
+
+    Parameters:
+    - path (str): Path to the roster file.
+
+    Returns:
+    - dict: Artist name -> Spotify artist ID, in file order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return dict(data)
+        return {item['name']: item['id'] for item in data}
+    if ext in ('.csv', '.tsv'):
+        return _rows_to_roster(csv.reader(text.splitlines(), delimiter='\t' if ext == '.tsv' else ','))
+
+    # artist.txt style: "artists_with_ids = { ... }" or a bare dict literal
+    literal = text.split('=', 1)[1] if '=' in text.split('{', 1)[0] else text
+    return dict(ast.literal_eval(literal.strip()))
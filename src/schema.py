@@ -0,0 +1,206 @@
+"""
+Typed, validated columns for the columnar exports.
+
+The JSON dataset keeps `song_length` as "M:SS", `release_date` as a year, month or full
+date (or 'Unknown Release Date'), and `popularity` as whatever number Spotify returned, so
+every consumer re-parsed them row by row. At Parquet export the records are normalized a
+record batch at a time with Arrow compute kernels into:
+
+    duration_seconds        int32    song_length in seconds
+    release_date_start      date32   first day of the release year, month or day
+    release_date_precision  string   'year', 'month' or 'day'
+    popularity              uint8    0-100
+
+The original string columns are kept for compatibility. Every rule in RULES is checked
+over whole columns at once; a value failing one is null in its typed column and counted,
+so a bad record never stops an export.
+
+    python schema.py poplyric-1k.parquet            # per-rule failure counts of a dataset file
+"""
+import argparse
+import logging
+
+# -------------------- Configuration --------------------
+
+UNKNOWN_RELEASE_DATE = 'Unknown Release Date'
+
+SONG_LENGTH_RE = r'^(?P<minutes>\d+):(?P<seconds>[0-5]\d)$'
+
+# Release date formats by precision, and the suffix that makes each a full date
+RELEASE_DATE_FORMATS = [
+    ('day', r'^\d{4}-\d{2}-\d{2}$', ''),
+    ('month', r'^\d{4}-\d{2}$', '-01'),
+    ('year', r'^\d{4}$', '-01-01'),
+]
+
+MAX_POPULARITY = 100
+
+# Validation rules, named after the condition a failing value meets
+RULES = (
+    'track_name_missing',       # null or empty title
+    'artist_missing',           # null or empty artist
+    'song_length_format',       # not M:SS
+    'song_length_zero',         # 0:00, Spotify's default for a missing duration
+    'release_date_unknown',     # null or 'Unknown Release Date'
+    'release_date_format',      # not YYYY, YYYY-MM or YYYY-MM-DD, or not a calendar date
+    'popularity_range',         # not an integer from 0 to 100
+)
+
+# -------------------- Schema --------------------
+
+def source_schema():
+    """
+    Arrow schema of dataset records as they are stored and published.
+    """
+    import pyarrow as pa
+    return pa.schema([
+        ('track_name', pa.string()), ('album', pa.string()), ('release_date', pa.string()),
+        ('song_length', pa.string()), ('popularity', pa.float64()),
+        ('songwriters', pa.list_(pa.string())), ('artist', pa.string()),
+        ('lyrics', pa.string()), ('genre', pa.list_(pa.string())), ('language', pa.string()),
+        ('spotify_track_id', pa.string()), ('spotify_album_id', pa.string()),
+        ('spotify_artist_ids', pa.list_(pa.string())), ('isrc', pa.string()),
+    ])
+
+
+def export_schema():
+    """
+    Arrow schema of the columnar exports: the source fields with a uint8 popularity,
+    followed by the typed columns.
+    """
+    import pyarrow as pa
+    fields = [pa.field('popularity', pa.uint8()) if field.name == 'popularity' else field
+              for field in source_schema()]
+    return pa.schema(fields + [
+        ('duration_seconds', pa.int32()),
+        ('release_date_start', pa.date32()),
+        ('release_date_precision', pa.string()),
+    ])
+
+# -------------------- Normalization --------------------
+
+def _count(mask):
+    import pyarrow.compute as pc
+    return pc.sum(pc.fill_null(mask, False)).as_py() or 0
+
+
+def _missing(column):
+    import pyarrow.compute as pc
+    return pc.or_kleene(pc.is_null(column), pc.equal(pc.utf8_trim_whitespace(column), ''))
+
+
+def normalize_batch(batch):
+    """
+    Normalizes and validates one record batch.
+
+    Parameters:
+    - batch (pyarrow.RecordBatch): Records with the source_schema() fields.
+
+    Returns:
+    - tuple: (pyarrow.RecordBatch with export_schema(), dict of rule -> failure count).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    counts = {}
+    counts['track_name_missing'] = _count(_missing(batch.column('track_name')))
+    counts['artist_missing'] = _count(_missing(batch.column('artist')))
+
+    # song_length "M:SS" -> seconds
+    song_length = batch.column('song_length')
+    parts = pc.extract_regex(song_length, SONG_LENGTH_RE)
+    minutes = pc.cast(pc.struct_field(parts, 'minutes'), pa.int32())
+    seconds = pc.cast(pc.struct_field(parts, 'seconds'), pa.int32())
+    duration = pc.add(pc.multiply(minutes, 60), seconds)
+    counts['song_length_format'] = _count(pc.and_kleene(pc.is_valid(song_length), pc.is_null(parts)))
+    zero = pc.equal(duration, 0)
+    counts['song_length_zero'] = _count(zero)
+    duration = pc.if_else(zero, pa.scalar(None, pa.int32()), duration)
+
+    # release_date -> first day of the period and its precision
+    release_date = batch.column('release_date')
+    unknown = pc.or_kleene(pc.is_null(release_date), pc.equal(release_date, UNKNOWN_RELEASE_DATE))
+    counts['release_date_unknown'] = _count(unknown)
+    precision = pa.nulls(len(batch), pa.string())
+    full_date = pa.nulls(len(batch), pa.string())
+    for name, pattern, suffix in RELEASE_DATE_FORMATS:
+        matches = pc.fill_null(pc.match_substring_regex(release_date, pattern), False)
+        precision = pc.if_else(matches, pa.scalar(name), precision)
+        full_date = pc.if_else(matches, pc.binary_join_element_wise(release_date, suffix, ''), full_date)
+    start = pc.cast(pc.strptime(full_date, format='%Y-%m-%d', unit='s', error_is_null=True), pa.date32())
+    invalid = pc.and_kleene(pc.invert(unknown), pc.is_null(start))
+    counts['release_date_format'] = _count(invalid)
+    precision = pc.if_else(pc.is_null(start), pa.scalar(None, pa.string()), precision)
+
+    # popularity -> uint8
+    popularity = batch.column('popularity')
+    out_of_range = pc.or_kleene(pc.or_kleene(pc.less(popularity, 0), pc.greater(popularity, MAX_POPULARITY)),
+                          pc.not_equal(popularity, pc.floor(popularity)))
+    counts['popularity_range'] = _count(out_of_range)
+    popularity = pc.cast(pc.if_else(pc.fill_null(out_of_range, False), pa.scalar(None, pa.float64()), popularity),
+                         pa.uint8())
+
+    columns = [popularity if name == 'popularity' else batch.column(name) for name in batch.schema.names]
+    columns += [duration, start, precision]
+    return pa.RecordBatch.from_arrays(columns, schema=export_schema()), counts
+
+
+def normalize_records(records, batch_size=10000, counts=None):
+    """
+    Streams dataset records as normalized record batches.
+
+    Parameters:
+    - records (iterable of dict): Dataset records, consumed once.
+    - batch_size (int): Records per batch.
+    - counts (dict): Accumulates rule -> failure count across batches, if given.
+
+    Yields:
+    - pyarrow.RecordBatch: Batches with export_schema().
+    """
+    import pyarrow as pa
+
+    schema = source_schema()
+    names = schema.names
+    batch = []
+
+    def flush():
+        normalized, batch_counts = normalize_batch(
+            pa.RecordBatch.from_pylist([{name: record.get(name) for name in names} for record in batch], schema=schema))
+        if counts is not None:
+            for rule, failures in batch_counts.items():
+                counts[rule] = counts.get(rule, 0) + failures
+        return normalized
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield flush()
+            batch = []
+    if batch:
+        yield flush()
+
+
+def log_failures(counts, source):
+    """
+    Logs a warning per rule with failures.
+    """
+    for rule in RULES:
+        if counts.get(rule):
+            logging.warning("%s: %s records failed %s.", source, counts[rule], rule)
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-rule validation counts of a dataset file.")
+    parser.add_argument('path', help="JSON, JSON Lines or Parquet dataset file")
+    args = parser.parse_args()
+
+    from track_io import iter_tracks
+    counts = {}
+    total = sum(batch.num_rows for batch in normalize_records(iter_tracks(args.path), counts=counts))
+    print(f"{total} records")
+    for rule in RULES:
+        print(f"{rule:<22} {counts.get(rule, 0)}")
+
+if __name__ == "__main__":
+    main()
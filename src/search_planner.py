@@ -0,0 +1,258 @@
+"""
+Genius search planning: deduplicated query plans and persistent search caches.
+
+A song that does not exist on Genius used to cost every query variant on every run.
+plan_search_queries() collapses equivalent variants, and NegativeResultCache remembers
+definitive misses (with a TTL) so reruns skip them without touching the network.
+
+SearchResultCache is the positive counterpart: the ranked candidates, chosen song and raw
+lyrics of every resolved (artist, title), shared by main.py, fix.py and test.py through
+the same database file, so a song is searched and scraped once across all entry points.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# -------------------- Configuration --------------------
+
+NEGATIVE_CACHE_DB = os.getenv('GENIUS_CACHE_DB', 'genius_cache.db')
+NEGATIVE_CACHE_TTL_DAYS = float(os.getenv('GENIUS_NEGATIVE_TTL_DAYS', '30'))
+
+# Reasons recorded for a miss
+MISS_NO_RESULTS = 'no_results'
+MISS_MISMATCH = 'mismatch'
+MISS_NON_SONG = 'non_song'
+
+# -------------------- Query Planning --------------------
+
+def normalize_text(text):
+    """
+    Normalizes text for equivalence checks: NFKC, casefolded, punctuation-insensitive,
+    whitespace collapsed.
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def plan_search_queries(queries):
+    """
+    Removes empty and equivalent queries while preserving order.
+
+    Parameters:
+    - queries (list of str): Candidate queries, broadest first.
+
+    Returns:
+    - list of str: Queries to run, at most one per normalized form.
+    """
+    planned = []
+    seen = set()
+    for query in queries:
+        key = normalize_text(query)
+        if key and key not in seen:
+            seen.add(key)
+            planned.append(query)
+    return planned
+
+# -------------------- Negative Result Cache --------------------
+
+class NegativeResultCache:
+    """
+    SQLite-backed record of (artist, title) pairs that Genius definitively does not have.
+
+    Entries expire after ttl_days so that songs added to Genius later are picked up again.
+    Safe to share between threads.
+    """
+
+    def __init__(self, db_path=NEGATIVE_CACHE_DB, ttl_days=NEGATIVE_CACHE_TTL_DAYS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS genius_misses (
+                    key TEXT PRIMARY KEY,
+                    artist TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+            """)
+
+    @staticmethod
+    def make_key(artist, title):
+        return f"{normalize_text(artist)}\x1f{normalize_text(title)}"
+
+    def is_known_miss(self, artist, title):
+        """
+        Returns True if (artist, title) was recorded as a miss within the TTL.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM genius_misses WHERE key = ? AND recorded_at >= ?",
+                (self.make_key(artist, title), cutoff)
+            ).fetchone()
+        return row is not None
+
+    def record_miss(self, artist, title, reason):
+        """
+        Records a definitive miss. Transient failures must not be recorded here.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO genius_misses (key, artist, title, reason, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(artist, title), artist, title, reason, time.time())
+            )
+        logging.info("Recorded Genius miss for '%s - %s' (%s).", artist, title, reason)
+
+    def forget(self, artist, title):
+        """
+        Drops a recorded miss, e.g. after the song was found by other means.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM genius_misses WHERE key = ?", (self.make_key(artist, title),))
+
+    def purge_expired(self):
+        """
+        Deletes entries older than the TTL.
+
+        Returns:
+        - int: Number of deleted entries.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM genius_misses WHERE recorded_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def entries(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT artist, title, reason, recorded_at FROM genius_misses ORDER BY artist, title"
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# -------------------- Search Result Cache --------------------
+
+class SearchResultCache:
+    """
+    SQLite-backed record of resolved Genius searches, keyed by normalized (artist, title).
+
+    Each entry holds the ranked candidate list, the chosen Genius song ID and URL, the raw
+    (uncleaned) lyrics and, once scraped, the songwriters. Lyrics won by another provider
+    are stored with no candidates or song ID and that provider's URL. Lives next to the negative cache
+    in the same database file. Safe to share between threads.
+    """
+
+    def __init__(self, db_path=NEGATIVE_CACHE_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS genius_hits (
+                    key TEXT PRIMARY KEY,
+                    artist TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    candidates TEXT NOT NULL,
+                    song_id INTEGER,
+                    url TEXT,
+                    lyrics TEXT,
+                    songwriters TEXT,
+                    resolved_at REAL NOT NULL
+                )
+            """)
+
+    make_key = staticmethod(NegativeResultCache.make_key)
+
+    def get(self, artist, title):
+        """
+        Returns the cached resolution of (artist, title), or None.
+
+        Returns:
+        - dict: candidates (list of dict), song_id, url, lyrics, songwriters (list or None).
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT candidates, song_id, url, lyrics, songwriters FROM genius_hits WHERE key = ?",
+                (self.make_key(artist, title),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'candidates': json.loads(row[0]), 'song_id': row[1], 'url': row[2], 'lyrics': row[3],
+                'songwriters': json.loads(row[4]) if row[4] is not None else None}
+
+    def put(self, artist, title, candidates, song_id, url, lyrics, songwriters=None):
+        """
+        Stores a resolved search. An existing entry for the same key is replaced.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO genius_hits (key, artist, title, candidates, song_id, url, lyrics, "
+                "songwriters, resolved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(artist, title), artist, title, json.dumps(candidates, ensure_ascii=False),
+                 song_id, url, lyrics, json.dumps(songwriters, ensure_ascii=False) if songwriters is not None else None,
+                 time.time())
+            )
+
+    def set_songwriters(self, artist, title, songwriters):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE genius_hits SET songwriters = ? WHERE key = ?",
+                              (json.dumps(songwriters, ensure_ascii=False), self.make_key(artist, title)))
+
+    def forget(self, artist, title):
+        """
+        Drops an entry so the song is searched again (e.g. a wrong match was cached).
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM genius_hits WHERE key = ?", (self.make_key(artist, title),))
+
+    def entries(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT artist, title, url, resolved_at FROM genius_hits ORDER BY artist, title"
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or maintain the Genius search caches.")
+    parser.add_argument('command', choices=['list', 'purge', 'forget'])
+    parser.add_argument('track', nargs='?', help="'Artist - Title' for the forget command")
+    parser.add_argument('--db', default=NEGATIVE_CACHE_DB)
+    parser.add_argument('--hits', action='store_true', help="Operate on resolved searches instead of misses")
+    args = parser.parse_args()
+
+    cache = SearchResultCache(args.db) if args.hits else NegativeResultCache(args.db)
+    if args.command == 'list':
+        for artist, title, detail, recorded_at in cache.entries():
+            print(f"{artist} - {title}\t{detail}\t{time.strftime('%Y-%m-%d', time.localtime(recorded_at))}")
+    elif args.command == 'purge':
+        if args.hits:
+            parser.error("resolved searches do not expire; use forget")
+        print(f"Purged {cache.purge_expired()} expired entries.")
+    else:
+        if not args.track or ' - ' not in args.track:
+            parser.error("forget needs an 'Artist - Title' argument")
+        artist, title = args.track.split(' - ', 1)
+        cache.forget(artist.strip(), title.strip())
+    cache.close()
+
+if __name__ == "__main__":
+    main()
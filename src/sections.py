@@ -0,0 +1,166 @@
+"""
+Structured parsing of Genius section headers in lyrics.
+
+The lyrics keep headers such as [Intro: Bruno Mars], [Verse 1: Lady Gaga] and [Chorus].
+parse_sections() turns them into typed sections with character offsets into the lyrics
+text, once, so that "all choruses" or "lines by a featured artist" become index lookups
+on the side table instead of regex scans over the whole corpus.
+"""
+import re
+from collections import namedtuple
+
+from track_io import write_atomic_path
+
+# -------------------- Configuration --------------------
+
+HEADER_RE = re.compile(r'^\[([^\[\]\n]+)\][ \t]*$', re.MULTILINE)
+
+# Canonical section types, matched against the start of the header label (Spanish labels included)
+SECTION_TYPES = [
+    ('pre-chorus', re.compile(r'^pre[- ]?(chorus|coro|estribillo)', re.IGNORECASE)),
+    ('post-chorus', re.compile(r'^post[- ]?(chorus|coro|estribillo)', re.IGNORECASE)),
+    ('chorus', re.compile(r'^(chorus|coro|estribillo)', re.IGNORECASE)),
+    ('verse', re.compile(r'^(verse|verso)', re.IGNORECASE)),
+    ('intro', re.compile(r'^intro', re.IGNORECASE)),
+    ('outro', re.compile(r'^outro', re.IGNORECASE)),
+    ('bridge', re.compile(r'^(bridge|puente)', re.IGNORECASE)),
+    ('hook', re.compile(r'^hook', re.IGNORECASE)),
+    ('refrain', re.compile(r'^refrain', re.IGNORECASE)),
+    ('interlude', re.compile(r'^interlud', re.IGNORECASE)),
+    ('breakdown', re.compile(r'^(breakdown|break\b)', re.IGNORECASE)),
+    ('drop', re.compile(r'^(drop|build)', re.IGNORECASE)),
+    ('instrumental', re.compile(r'^(instrumental|guitar solo|solo)', re.IGNORECASE)),
+    ('credits', re.compile(r'^(produced|written|mixed) by', re.IGNORECASE)),
+]
+OTHER = 'other'
+
+PERFORMER_SPLIT_RE = re.compile(r'\s*(?:&|,|\band\b|\bwith\b|\+)\s*', re.IGNORECASE)
+ORDINAL_RE = re.compile(r'\b(\d+)\b')
+
+Section = namedtuple('Section', [
+    'index',         # Position of the section within the song (0-based)
+    'section_type',  # Canonical type, e.g. 'chorus'
+    'ordinal',       # Explicit number (Verse 2) or occurrence count of the type (1-based)
+    'performers',    # Tuple of performer names from the header, possibly empty
+    'label',         # Raw header label
+    'start',         # Offset of the '[' that opens the header
+    'body_start',    # Offset just after the header line
+    'end',           # Offset where the next header starts (or len(lyrics))
+])
+
+# Columns of the side table, in order
+SECTION_COLUMNS = ['track_key', 'section_index', 'section_type', 'ordinal', 'performers',
+                   'label', 'start_offset', 'body_offset', 'end_offset']
+
+# -------------------- Parsing --------------------
+
+def classify_label(label):
+    """
+    Returns the canonical section type for a header label.
+    """
+    for section_type, pattern in SECTION_TYPES:
+        if pattern.match(label.strip()):
+            return section_type
+    return OTHER
+
+
+def parse_sections(lyrics):
+    """
+    Splits lyrics into sections at header lines.
+
+    Parameters:
+    - lyrics (str): Lyrics text with Genius section headers.
+
+    Returns:
+    - list of Section: Sections in order; empty if the lyrics have no headers.
+    """
+    if not lyrics:
+        return []
+    matches = list(HEADER_RE.finditer(lyrics))
+    sections = []
+    counts = {}
+    for i, match in enumerate(matches):
+        label = match.group(1).strip()
+        name, _, performer_text = label.partition(':')
+        section_type = classify_label(name)
+        counts[section_type] = counts.get(section_type, 0) + 1
+        number = ORDINAL_RE.search(name)
+        performers = tuple(p for p in PERFORMER_SPLIT_RE.split(performer_text.strip()) if p) if performer_text else ()
+        body_start = match.end()
+        if body_start < len(lyrics) and lyrics[body_start] == '\n':
+            body_start += 1
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(lyrics)
+        sections.append(Section(
+            index=i,
+            section_type=section_type,
+            ordinal=int(number.group(1)) if number else counts[section_type],
+            performers=performers,
+            label=label,
+            start=match.start(),
+            body_start=body_start,
+            end=end,
+        ))
+    return sections
+
+
+def section_text(lyrics, section, include_header=False):
+    """
+    Slices a section's text out of the lyrics using its offsets.
+    """
+    return lyrics[section.start if include_header else section.body_start:section.end].strip('\n')
+
+# -------------------- Side Table --------------------
+
+def section_rows(track_key, lyrics):
+    """
+    Yields side-table rows (dicts keyed by SECTION_COLUMNS) for one track.
+    """
+    for section in parse_sections(lyrics):
+        yield {
+            'track_key': track_key,
+            'section_index': section.index,
+            'section_type': section.section_type,
+            'ordinal': section.ordinal,
+            'performers': list(section.performers),
+            'label': section.label,
+            'start_offset': section.start,
+            'body_offset': section.body_start,
+            'end_offset': section.end,
+        }
+
+
+def write_section_table(rows, path, batch_size=50000):
+    """
+    Writes section rows to a Parquet file, one column per SECTION_COLUMNS entry.
+
+    Parameters:
+    - rows (iterable of dict): Rows as produced by section_rows().
+    - path (str): Output Parquet path.
+    - batch_size (int): Rows per row group.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('track_key', pa.string()), ('section_index', pa.int32()), ('section_type', pa.string()),
+        ('ordinal', pa.int32()), ('performers', pa.list_(pa.string())), ('label', pa.string()),
+        ('start_offset', pa.int32()), ('body_offset', pa.int32()), ('end_offset', pa.int32()),
+    ])
+    def write(tmp_path):
+        count = 0
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    count += len(batch)
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+        return count
+    return write_atomic_path(path, write)
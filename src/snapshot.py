@@ -0,0 +1,253 @@
+"""
+Content-addressed snapshot manifests of the dataset, and linear-time diffs between them.
+
+Each build records a manifest: one JSON line per track, sorted by the track's natural key
+(normalized artist and title, as in dataset_store.py), carrying a hash of every field and
+of the whole record, but not the data itself.
+
+    {"key": "lady gaga\\u001fdie with a smile", "artist": "Lady Gaga", "track_name": "Die With A Smile",
+     "spotify_track_id": "2plbrEY59IikOBgBGLjaoe", "hash": "9f2c...", "fields": {"track_name": "51aa...", ...}}
+
+The manifest is stored under the SHA-256 of its content (snapshots/<id>.jsonl), so two
+builds with the same data share one file, and snapshots/index.jsonl lists the builds in
+order. Because manifests are sorted, a diff is one merge pass over the two files: memory
+stays constant and time is linear in the number of tracks.
+
+    python snapshot.py create                              # from the dataset store
+    python snapshot.py create --from poplyric-1k.parquet
+    python snapshot.py list
+    python snapshot.py diff previous latest --output changes.jsonl
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+from dataset_store import FIELDS, make_track_key
+from track_io import write_atomic
+
+# -------------------- Configuration --------------------
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')
+INDEX_FILE = 'index.jsonl'
+
+# Bytes of each field and record hash (hex digests are twice as long)
+HASH_BYTES = 8
+
+# Kinds of change reported by diff_manifests
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+
+# -------------------- Hashing --------------------
+
+def _canonical(value):
+    # Parquet stores popularity as a float; 71.0 and 71 are the same value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def field_hash(value):
+    """
+    Hash of one field value, independent of the file format it was read from.
+    """
+    text = json.dumps(_canonical(value), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=HASH_BYTES).hexdigest()
+
+
+def manifest_entry(record, fields=FIELDS):
+    """
+    Returns the manifest line of a dataset record.
+    """
+    hashes = {field: field_hash(record.get(field)) for field in fields}
+    record_digest = hashlib.blake2b(''.join(hashes.values()).encode('ascii'), digest_size=HASH_BYTES).hexdigest()
+    return {
+        'key': make_track_key(record.get('artist') or '', record.get('track_name') or ''),
+        'artist': record.get('artist'),
+        'track_name': record.get('track_name'),
+        'spotify_track_id': record.get('spotify_track_id'),
+        'hash': record_digest,
+        'fields': hashes,
+    }
+
+# -------------------- Manifests --------------------
+
+def write_manifest(records, snapshot_dir=SNAPSHOT_DIR, source=None):
+    """
+    Records a snapshot of a build.
+
+    Only the per-track hashes are held in memory while they are sorted. Records with the
+    same key keep the last one, as an import into the dataset store would.
+
+    Parameters:
+    - records (iterable of dict): Dataset records, consumed once.
+    - snapshot_dir (str): Directory of manifests and the snapshot index.
+    - source (str): Where the records came from, noted in the index.
+
+    Returns:
+    - dict: The index entry {'id', 'created', 'source', 'records', 'path'}.
+    """
+    entries = {}
+    for record in records:
+        entry = manifest_entry(record)
+        entries[entry['key']] = entry
+
+    # The manifest is named by its content, so it is hashed before it is written
+    lines = [json.dumps(entries[key], ensure_ascii=False, separators=(',', ':')) + '\n' for key in sorted(entries)]
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+    snapshot_id = digest.hexdigest()
+    path = os.path.join(snapshot_dir, f"{snapshot_id}.jsonl")
+    os.makedirs(snapshot_dir, exist_ok=True)
+    write_atomic(path, lambda f: f.writelines(lines), newline='\n',
+                 tmp_path=os.path.join(snapshot_dir, f".manifest-{os.getpid()}.tmp"))
+
+    info = {'id': snapshot_id, 'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'source': source,
+            'records': len(entries)}
+    history = list_snapshots(snapshot_dir)
+    if history and history[-1]['id'] == snapshot_id:
+        logging.info("Snapshot %s unchanged since the last build.", snapshot_id[:12])
+    else:
+        with open(os.path.join(snapshot_dir, INDEX_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(info, ensure_ascii=False) + '\n')
+        logging.info("Recorded snapshot %s of %s tracks.", snapshot_id[:12], len(entries))
+    return {**info, 'path': path}
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Returns the index entries of recorded snapshots, oldest first.
+    """
+    path = os.path.join(snapshot_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def resolve_manifest(ref, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Returns the manifest path of a reference: a file path, 'latest', 'previous', or a
+    snapshot ID or unique ID prefix.
+    """
+    if os.path.isfile(ref):
+        return ref
+    history = list_snapshots(snapshot_dir)
+    if ref in ('latest', 'previous'):
+        index = -1 if ref == 'latest' else -2
+        if len(history) < -index:
+            raise ValueError(f"No {ref} snapshot in {snapshot_dir}")
+        ref = history[index]['id']
+    matches = sorted({name[:-len('.jsonl')] for name in os.listdir(snapshot_dir)
+                      if name.startswith(ref) and name.endswith('.jsonl') and name != INDEX_FILE}) \
+        if os.path.isdir(snapshot_dir) else []
+    if len(matches) != 1:
+        raise ValueError(f"{'Ambiguous' if matches else 'Unknown'} snapshot: {ref}")
+    return os.path.join(snapshot_dir, f"{matches[0]}.jsonl")
+
+
+def iter_manifest(path):
+    """
+    Streams the entries of a manifest, checking that they are sorted by key.
+    """
+    previous = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if previous is not None and entry['key'] <= previous:
+                raise ValueError(f"Manifest {path} is not sorted at {entry['key']!r}")
+            previous = entry['key']
+            yield entry
+
+# -------------------- Diff --------------------
+
+def _change(kind, entry, fields=None):
+    change = {'change': kind, 'key': entry['key'], 'artist': entry['artist'],
+              'track_name': entry['track_name'], 'spotify_track_id': entry['spotify_track_id']}
+    if fields is not None:
+        change['fields'] = fields
+    return change
+
+
+def diff_manifests(old_path, new_path):
+    """
+    Merges two manifests in one pass and yields the tracks that differ.
+
+    Yields:
+    - dict: {'change': 'added' | 'removed' | 'modified', 'key', 'artist', 'track_name',
+      'spotify_track_id'}, plus the changed 'fields' of modified tracks, in key order.
+    """
+    old_entries, new_entries = iter_manifest(old_path), iter_manifest(new_path)
+    old, new = next(old_entries, None), next(new_entries, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old['key'] < new['key']):
+            yield _change(REMOVED, old)
+            old = next(old_entries, None)
+        elif old is None or new['key'] < old['key']:
+            yield _change(ADDED, new)
+            new = next(new_entries, None)
+        else:
+            if old['hash'] != new['hash']:
+                fields = [field for field, value in new['fields'].items() if old['fields'].get(field) != value]
+                fields += [field for field in old['fields'] if field not in new['fields']]
+                yield _change(MODIFIED, new, fields)
+            old, new = next(old_entries, None), next(new_entries, None)
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Record dataset snapshots and diff them.")
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help="Snapshot directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    create = sub.add_parser('create', help="Record a snapshot of the dataset store or a dataset file")
+    create.add_argument('--from', dest='source', help="JSON, JSON Lines or Parquet file instead of the store")
+    create.add_argument('--db', help="Dataset store (default: DATASET_DB)")
+
+    sub.add_parser('list', help="List recorded snapshots")
+
+    diff = sub.add_parser('diff', help="List tracks added, removed or modified between two snapshots")
+    diff.add_argument('old', help="Snapshot ID or prefix, manifest path, 'previous' or 'latest'")
+    diff.add_argument('new', help="Snapshot ID or prefix, manifest path, 'previous' or 'latest'")
+    diff.add_argument('--output', help="Write the changes as JSON Lines here")
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        if args.source:
+            from track_io import iter_tracks
+            info = write_manifest(iter_tracks(args.source), args.dir, source=args.source)
+        else:
+            from dataset_store import DatasetStore, DATASET_DB
+            store = DatasetStore(args.db or DATASET_DB)
+            info = write_manifest(store.query(), args.dir, source=store.db_path)
+            store.close()
+        print(f"Snapshot {info['id']} ({info['records']} tracks) at {info['path']}")
+    elif args.command == 'list':
+        for info in list_snapshots(args.dir):
+            print(f"{info['id'][:12]}  {info['created']}  {info['records']:>7} tracks  {info.get('source') or ''}")
+    else:
+        try:
+            old_path, new_path = resolve_manifest(args.old, args.dir), resolve_manifest(args.new, args.dir)
+        except ValueError as e:
+            parser.error(str(e))
+        counts = {ADDED: 0, REMOVED: 0, MODIFIED: 0}
+        out = open(args.output, 'w', encoding='utf-8') if args.output else None
+        try:
+            for change in diff_manifests(old_path, new_path):
+                counts[change['change']] += 1
+                if out:
+                    out.write(json.dumps(change, ensure_ascii=False) + '\n')
+                else:
+                    fields = f" ({', '.join(change['fields'])})" if 'fields' in change else ''
+                    print(f"{change['change']:<9} {change['artist']} - {change['track_name']}{fields}")
+        finally:
+            if out:
+                out.close()
+        print(f"{counts[ADDED]} added, {counts[REMOVED]} removed, {counts[MODIFIED]} modified.")
+
+if __name__ == "__main__":
+    main()
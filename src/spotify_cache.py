@@ -0,0 +1,186 @@
+"""
+Persistent, process-wide cache of Spotify catalogue objects with request coalescing.
+
+Collaborations put the same albums and tracks under several artists, and every run used
+to fetch them again. SpotifyCache keeps album lists, album track lists and full track
+objects in SQLite, keyed by Spotify ID, across runs and across main.py, fix.py and the
+queue workers. Concurrent callers asking for the same object share one in-flight request
+instead of each calling Spotify.
+
+    python spotify_cache.py                 # entry counts per kind
+    python spotify_cache.py --purge         # drop expired entries
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# -------------------- Configuration --------------------
+
+SPOTIFY_CACHE_DB = os.getenv('SPOTIFY_CACHE_DB', 'spotify_cache.db')
+
+# Kinds of cached objects and how long they stay fresh. Released albums and tracks do not
+# change; an artist's album list grows with new releases.
+ARTIST_ALBUMS = 'artist_albums'   # artist ID -> simplified albums
+ALBUM_TRACKS = 'album_tracks'     # album ID -> simplified tracks, each with its 'album'
+TRACK = 'track'                   # track ID -> full track object
+TTL_DAYS = {
+    ARTIST_ALBUMS: float(os.getenv('SPOTIFY_ARTIST_TTL_DAYS', '7')),
+    ALBUM_TRACKS: float(os.getenv('SPOTIFY_ALBUM_TTL_DAYS', '90')),
+    TRACK: float(os.getenv('SPOTIFY_TRACK_TTL_DAYS', '30')),
+}
+
+# -------------------- Request Coalescing --------------------
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers for the same key wait for
+    that call and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+# -------------------- Cache --------------------
+
+class SpotifyCache:
+    """
+    SQLite-backed Spotify objects keyed by (kind, Spotify ID). Safe to share between threads.
+    """
+
+    def __init__(self, db_path=SPOTIFY_CACHE_DB, ttl_days=None):
+        self.db_path = db_path
+        self.ttl_seconds = {kind: days * 86400 for kind, days in {**TTL_DAYS, **(ttl_days or {})}.items()}
+        self.lock = threading.Lock()
+        self.flight = SingleFlight()
+        self.hits = self.misses = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS spotify_objects (
+                    kind TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (kind, id)
+                )
+            """)
+
+    def get(self, kind, object_id):
+        """
+        Returns the cached object, or None if it is missing or expired.
+        """
+        cutoff = time.time() - self.ttl_seconds[kind]
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body FROM spotify_objects WHERE kind = ? AND id = ? AND fetched_at >= ?",
+                (kind, object_id, cutoff)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, kind, items):
+        """
+        Stores (Spotify ID, object) pairs, replacing existing entries.
+        """
+        now = time.time()
+        rows = [(kind, object_id, json.dumps(body, ensure_ascii=False), now) for object_id, body in items if object_id]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO spotify_objects (kind, id, body, fetched_at) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def put(self, kind, object_id, body):
+        self.put_many(kind, [(object_id, body)])
+
+    def fetch(self, kind, object_id, fn):
+        """
+        Returns the cached object, calling fn() once on a miss however many threads ask
+        for it concurrently. None results are not cached.
+        """
+        body = self.get(kind, object_id)
+        if body is not None:
+            with self.lock:
+                self.hits += 1
+            return body
+
+        def load():
+            # Another caller may have stored it while this one waited for the lock
+            cached = self.get(kind, object_id)
+            if cached is not None:
+                return cached
+            with self.lock:
+                self.misses += 1
+            fetched = fn()
+            if fetched is not None:
+                self.put(kind, object_id, fetched)
+            return fetched
+
+        return self.flight.do((kind, object_id), load)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT kind, COUNT(*) FROM spotify_objects GROUP BY kind").fetchall())
+            return {'hits': self.hits, 'misses': self.misses, 'entries': counts}
+
+    def purge_expired(self):
+        """
+        Deletes expired entries.
+
+        Returns:
+        - int: Number of deleted entries.
+        """
+        now = time.time()
+        deleted = 0
+        with self.lock, self.conn:
+            for kind, ttl in self.ttl_seconds.items():
+                deleted += self.conn.execute("DELETE FROM spotify_objects WHERE kind = ? AND fetched_at < ?",
+                                             (kind, now - ttl)).rowcount
+        return deleted
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or purge the Spotify object cache.")
+    parser.add_argument('--db', default=SPOTIFY_CACHE_DB)
+    parser.add_argument('--purge', action='store_true', help="Delete expired entries")
+    args = parser.parse_args()
+
+    cache = SpotifyCache(args.db)
+    if args.purge:
+        print(f"Deleted {cache.purge_expired()} expired entries.")
+    for kind, count in sorted(cache.stats()['entries'].items()):
+        print(f"{kind}: {count}")
+    cache.close()
+
+if __name__ == "__main__":
+    main()
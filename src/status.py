@@ -0,0 +1,230 @@
+"""
+Live status of a running build, served over local HTTP.
+
+The pipeline records progress into the process-wide `build_status`:
+
+- stages: tracks queued, done and failed, throughput over a moving window and an ETA,
+- providers: requests per second, in-flight requests, latency, errors and 429s per host
+  (every outbound call goes through resilience.call_with_retry, which records them),
+- sources: gauges read at request time, e.g. work queue depths, circuit breakers and
+  lyrics provider wins.
+
+Recording is a few counter updates under a lock, so it stays on when no server runs.
+Start the server with STATUS_PORT=8766 (main.py) or --status-port (fix.py, worker.py):
+
+    curl -s http://127.0.0.1:8766/status
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------- Configuration --------------------
+
+# Seconds of completions the throughput moving average covers
+RATE_WINDOW = 60.0
+
+# Completion timestamps kept per stage or provider
+MAX_EVENTS = 10000
+
+# -------------------- Counters --------------------
+
+class Throughput:
+    """
+    Completion timestamps over a sliding window.
+    """
+
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.started = time.monotonic()
+
+    def add(self, n=1, now=None):
+        now = now or time.monotonic()
+        self.events.extend([now] * n)
+
+    def rate(self, now=None):
+        """
+        Completions per second over the window (or since the start, if that is shorter).
+        """
+        now = now or time.monotonic()
+        while self.events and self.events[0] < now - self.window:
+            self.events.popleft()
+        # At least a second, so the first few completions don't read as a burst
+        span = max(1.0, min(self.window, now - self.started))
+        return len(self.events) / span
+
+
+class BuildStatus:
+    """
+    Thread-safe progress counters of one pipeline process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+        self.providers = {}
+        self.sources = {}
+
+    # ---- stages ----
+
+    def _stage(self, stage):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {'total': None, 'backlog': None, 'queued': 0, 'done': 0, 'failed': 0,
+                                          'throughput': Throughput()}
+        return entry
+
+    def set_total(self, stage, total):
+        """
+        Sets the number of items a stage will process, for its ETA.
+        """
+        with self.lock:
+            self._stage(stage)['total'] = total
+
+    def set_backlog(self, stage, fn):
+        """
+        For stages fed by an external queue: fn() returns the items still to process.
+        """
+        with self.lock:
+            self._stage(stage)['backlog'] = fn
+
+    def queued(self, stage, n=1):
+        with self.lock:
+            self._stage(stage)['queued'] += n
+
+    def done(self, stage, n=1, failed=False):
+        with self.lock:
+            entry = self._stage(stage)
+            entry['failed' if failed else 'done'] += n
+            entry['throughput'].add(n)
+
+    # ---- providers ----
+
+    def _provider(self, host):
+        entry = self.providers.get(host)
+        if entry is None:
+            entry = self.providers[host] = {'requests': 0, 'in_flight': 0, 'errors': 0, 'rate_limited': 0,
+                                            'latency_ms': None, 'throughput': Throughput()}
+        return entry
+
+    def request_started(self, host):
+        with self.lock:
+            self._provider(host)['in_flight'] += 1
+
+    def request_finished(self, host, elapsed, error_class=None):
+        """
+        Records one provider call; error_class is a resilience error class or None.
+        """
+        with self.lock:
+            entry = self._provider(host)
+            entry['in_flight'] -= 1
+            entry['requests'] += 1
+            entry['throughput'].add()
+            if error_class == 'rate_limited':
+                entry['rate_limited'] += 1
+            elif error_class:
+                entry['errors'] += 1
+            ms = elapsed * 1000
+            # Exponential moving average
+            entry['latency_ms'] = ms if entry['latency_ms'] is None else 0.9 * entry['latency_ms'] + 0.1 * ms
+
+    # ---- sources ----
+
+    def add_source(self, name, fn):
+        """
+        Registers a gauge: fn() is called for each status request and its result reported under name.
+        """
+        with self.lock:
+            self.sources[name] = fn
+
+    # ---- snapshot ----
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            stages = {}
+            backlogs = {}
+            for stage, entry in self.stages.items():
+                rate = entry['throughput'].rate(now)
+                finished = entry['done'] + entry['failed']
+                expected = entry['total'] if entry['total'] is not None else entry['queued'] or None
+                remaining = max(0, expected - finished) if expected is not None else None
+                if entry['backlog'] is not None:
+                    backlogs[stage] = (entry['backlog'], rate)
+                stages[stage] = {
+                    'total': entry['total'], 'queued': entry['queued'], 'done': entry['done'],
+                    'failed': entry['failed'], 'remaining': remaining,
+                    'per_second': round(rate, 3),
+                    'eta_seconds': round(remaining / rate) if remaining is not None and rate > 0 else None,
+                }
+            providers = {host: {'requests': entry['requests'], 'in_flight': entry['in_flight'],
+                                'errors': entry['errors'], 'rate_limited': entry['rate_limited'],
+                                'per_second': round(entry['throughput'].rate(now), 3),
+                                'latency_ms': round(entry['latency_ms'], 1) if entry['latency_ms'] is not None else None}
+                         for host, entry in self.providers.items()}
+            sources = dict(self.sources)
+        # Gauges are read outside the lock; they may query a database
+        for stage, (fn, rate) in backlogs.items():
+            try:
+                remaining = fn()
+            except Exception as e:
+                logging.warning("Backlog of stage %s unavailable: %s", stage, e)
+                continue
+            stages[stage]['remaining'] = remaining
+            stages[stage]['eta_seconds'] = round(remaining / rate) if rate > 0 else None
+        status = {'uptime_seconds': round(time.time() - self.started), 'stages': stages, 'providers': providers}
+        for name, fn in sources.items():
+            try:
+                status[name] = fn()
+            except Exception as e:
+                status[name] = {'error': str(e)}
+        return status
+
+
+build_status = BuildStatus()
+
+# -------------------- HTTP Server --------------------
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'PopLyricsStatus/1.0'
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/status'):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.status.snapshot(), indent=2, default=str).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_status_server(port, host='127.0.0.1', status=None):
+    """
+    Serves the build status as JSON at /status on a background thread.
+
+    Parameters:
+    - port (int): Port, or 0 to pick a free one.
+    - host (str): Bind address; local only by default.
+    - status (BuildStatus): Status to serve; defaults to build_status.
+
+    Returns:
+    - ThreadingHTTPServer: Running server; stopped with server.shutdown().
+    """
+    from resilience import breaker_states
+    status = status or build_status
+    status.add_source('circuit_breakers', breaker_states)
+    server = ThreadingHTTPServer((host, port), StatusRequestHandler)
+    server.daemon_threads = True
+    server.status = status
+    threading.Thread(target=server.serve_forever, daemon=True, name='status').start()
+    logging.info("Build status at http://%s:%s/status", *server.server_address[:2])
+    return server
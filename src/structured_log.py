@@ -0,0 +1,217 @@
+"""
+Non-blocking JSON Lines logging for the pipeline.
+
+configure_logging() puts a QueueHandler on the root logger and moves formatting and file
+I/O to a QueueListener thread, so a log call on the hot path costs one queue put.
+Messages use lazy %-style arguments (logging.info("Saved %s", name)): nothing is
+formatted for disabled levels, and enabled records are rendered on the listener thread.
+
+Every line of the log file is one JSON object:
+
+    {"ts": "2025-01-31T12:00:00.000+00:00", "level": "INFO", "logger": "root", "thread": "lyrics_0",
+     "msg": "Processing track: Die With A Smile by Lady Gaga",
+     "stage": "repair", "event": "attempt", "artist": "Lady Gaga", "track": "Die With A Smile"}
+
+Track and stage fields come from log_context(), which is set once per track and inherited
+by every call beneath it, or from extra={...} on a single call.
+
+    python structured_log.py fix_tracks.jsonl --stage repair --level WARNING
+"""
+import argparse
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+# -------------------- Configuration --------------------
+
+# Structured fields copied from the log context or extra={...} into each JSON record
+FIELDS = ('stage', 'event', 'artist', 'track', 'spotify_track_id', 'artist_id', 'provider', 'job')
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Lines of the plain-text logs written before this module
+LEGACY_LINE_RE = re.compile(r'^(\d{4}-\d\d-\d\d [\d:,]+) - ([A-Z]+) - (.*)$')
+
+# Messages of plain-text logs that correspond to an event of the JSON logs
+LEGACY_EVENTS = {
+    'attempt': re.compile(r'Processing track: (?P<track>.*) by (?P<artist>.*)$'),
+}
+
+_context = contextvars.ContextVar('log_context', default={})
+_listener = None
+
+# -------------------- Context --------------------
+
+@contextmanager
+def log_context(**fields):
+    """
+    Adds structured fields (see FIELDS) to every record logged inside the block.
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+# -------------------- Handlers --------------------
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Renders a record as one JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Queues records without formatting them.
+
+    The stock QueueHandler formats in the calling thread so that records can cross process
+    boundaries; the listener here is in-process, so only the log context is stamped on and
+    mutable arguments are copied, and the record is rendered on the listener thread.
+    """
+
+    def prepare(self, record):
+        for field, value in _context.get().items():
+            if getattr(record, field, None) is None:
+                setattr(record, field, value)
+        if isinstance(record.args, tuple):
+            record.args = tuple(copy.copy(arg) if isinstance(arg, (dict, list, set)) else arg for arg in record.args)
+        elif isinstance(record.args, dict):
+            # A single mapping argument is stored as the args themselves
+            record.args = copy.copy(record.args)
+        return record
+
+
+def configure_logging(path, level=logging.INFO, console=False):
+    """
+    Routes the root logger through a queue to a JSON Lines file (and optionally the console).
+
+    Replaces any handlers configured before, flushing an earlier listener, so a script that
+    imports main can configure its own log file.
+
+    Parameters:
+    - path (str): JSON Lines log file, appended to.
+    - level (int): Root logger level.
+    - console (bool): Also print plain-text records to stderr.
+
+    Returns:
+    - QueueListener: The running listener; stopped automatically at exit.
+    """
+    global _listener
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    if _listener is not None:
+        _listener.stop()
+
+    file_handler = logging.FileHandler(path, encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+
+    queue = SimpleQueue()
+    _listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    root.addHandler(ContextQueueHandler(queue))
+    root.setLevel(level)
+    return _listener
+
+
+def stop_logging():
+    """
+    Flushes queued records and stops the listener.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+# -------------------- Reading Logs --------------------
+
+def iter_log_records(path):
+    """
+    Yields the records of a log file as dicts.
+
+    JSON Lines records are returned as written. Lines of the older plain-text logs become
+    {'ts', 'level', 'msg', 'legacy': True}, and continuation lines are skipped.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('{'):
+                try:
+                    yield json.loads(line)
+                    continue
+                except json.JSONDecodeError:
+                    pass
+            match = LEGACY_LINE_RE.match(line)
+            if match:
+                yield {'ts': match.group(1), 'level': match.group(2), 'msg': match.group(3), 'legacy': True}
+
+
+def iter_events(path, event):
+    """
+    Yields the records of one event (e.g. 'attempt'), recovering the event and its fields
+    from the message of plain-text log lines.
+    """
+    pattern = LEGACY_EVENTS.get(event)
+    for record in iter_log_records(path):
+        if record.get('event') == event:
+            yield record
+        elif record.get('legacy') and pattern:
+            match = pattern.search(record['msg'])
+            if match:
+                fields = {k: (None if v == 'None' else v) for k, v in match.groupdict().items()}
+                yield {**record, **fields, 'event': event}
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter a pipeline log by its structured fields.")
+    parser.add_argument('path', help="JSON Lines (or older plain-text) log file")
+    parser.add_argument('--level', help="Minimum level, e.g. WARNING")
+    for field in FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field)
+    args = parser.parse_args()
+
+    minimum = logging.getLevelName(args.level.upper()) if args.level else 0
+    wanted = {field: getattr(args, field) for field in FIELDS if getattr(args, field)}
+    for record in iter_log_records(args.path):
+        if logging.getLevelName(record.get('level', 'INFO')) < minimum:
+            continue
+        if any(str(record.get(field)) != value for field, value in wanted.items()):
+            continue
+        print(json.dumps(record, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
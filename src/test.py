@@ -1,29 +1,22 @@
 import os
 import time
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    NoSuchElementException, TimeoutException, ElementClickInterceptedException
-)
+from types import SimpleNamespace
+import requests
 import lyricsgenius
 from dotenv import load_dotenv
+from credits import extract_preloaded_state, credits_from_state, credits_from_api
+from endpoints import genius_web_url
+from main import rank_candidates, GENIUS_MATCH_THRESHOLD
+from search_planner import SearchResultCache
 # Load environment variables from .env file
 load_dotenv()
 
 # Configuration from environment variables
 GENIUS_API_TOKEN = os.getenv('GENIUS_API_TOKEN')
-GENIUS_EMAIL = os.getenv('GENIUS_EMAIL')
-GENIUS_PASSWORD = os.getenv('GENIUS_PASSWORD')
-CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH')  # e.g., '/path/to/chromedriver'
 
 # Validate environment variables
-if not all([GENIUS_API_TOKEN, GENIUS_EMAIL, GENIUS_PASSWORD, CHROMEDRIVER_PATH]):
-    raise EnvironmentError("Please ensure all required environment variables are set in the .env file.")
+if not GENIUS_API_TOKEN:
+    raise EnvironmentError("Please ensure GENIUS_API_TOKEN is set in the .env file.")
 
 # Initialize Genius API client
 genius = lyricsgenius.Genius(
@@ -34,14 +27,33 @@ genius = lyricsgenius.Genius(
     retries=3
 )
 
+# Resolved searches shared with main.py and fix.py
+search_cache = SearchResultCache()
+
 def search_song_genius(song_name, artist_name=None):
     """
     Search for a song using lyricsgenius and return the song object.
+    Songs already resolved by any entry point are served from the shared search cache;
+    a new hit is only cached when it matches the requested title and artist.
     """
+    cached = search_cache.get(artist_name, song_name) if artist_name else None
+    # Entries without a song ID hold another provider's lyrics, not a Genius song
+    if cached and cached.get('lyrics') and cached['song_id'] is not None:
+        print(f"Found cached song: {cached['url']}")
+        return SimpleNamespace(id=cached['song_id'], url=cached['url'], lyrics=cached['lyrics'],
+                               full_title=f"{song_name} by {artist_name}")
     try:
         song = genius.search_song(title=song_name, artist=artist_name)
         if song:
             print(f"Found song: {song.full_title}")
+            hit = {'id': song.id, 'title': song.title, 'url': song.url, 'primary_artist': {'name': song.artist}}
+            candidates = rank_candidates([hit], song_name, artist_name or '')
+            best = candidates[0] if candidates else None
+            if artist_name and song.lyrics and best \
+                    and min(best['title_score'], best['artist_score']) >= GENIUS_MATCH_THRESHOLD:
+                search_cache.put(artist_name, song_name, candidates, song.id, song.url, song.lyrics)
+            else:
+                print("Top hit not cached: no artist given, no lyrics, or not a close match.")
             return song
         else:
             print("Song not found using lyricsgenius.")
@@ -50,112 +62,32 @@ def search_song_genius(song_name, artist_name=None):
         print(f"Error searching for song: {e}")
         return None
 
-def setup_selenium_driver():
+def get_song_writers(song_url, song_id=None):
     """
-    Setup Selenium WebDriver with headless Chrome.
+    Reads the writers of a song from the page state embedded in its Genius page,
+    falling back to the song API payload. No browser or login is needed.
     """
-    chrome_options = Options()
-    #chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-dev-shm-usage")  # Overcome limited resource problems
-    service = Service(executable_path=CHROMEDRIVER_PATH)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-def login_to_genius(driver, email, password):
     try:
-        driver.get("https://genius.com/J-cole-she-knows-lyrics/")
-
-        # Use WebDriverWait for more robust element detection
-        try:  # Check if already logged in (e.g., profile icon)
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//a[@class='UserAvatar__BaseUserAvatar-sc-1jly10v-0 ...]")) # Replace ... with the actual class(es)
-            )
-            print("Already logged in.")
-            return True
-        except TimeoutException:
-            pass  # Not logged in, proceed with login
-
-        # Check for the "Sign Up" element and initiate the process. Wait up to 10 seconds.
-        signup_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Sign Up')]"))
-        )
-        signup_button.click()
-
-        signin_link = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Sign in here')]"))
-        )
-        signin_link.click()
-
-
-        email_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.NAME, "email")) # Or By.ID
-        )
-
-        password_field = driver.find_element(By.NAME, "password")  # Or By.ID
-
-        email_field.send_keys(email)
-        password_field.send_keys(password)
-
-
-        submit_button = WebDriverWait(driver, 10).until(
-           EC.element_to_be_clickable((By.XPATH, "//button[@type='submit' and contains(., 'Sign in')]")) # More flexible text match
-        )
-        submit_button.click()
-
-
-        # Verify login more robustly (e.g., checking a profile element that only appears when logged in)
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//a[@class='UserAvatar__BaseUserAvatar-sc-1jly10v-0 ...]")) # Replace ... with actual class name(s)
-            )
-            print("Logged in successfully!")
-            return True
-        except TimeoutException:
-            print("Login failed. Could not find logged-in element.")
-            return False
-
-    except (NoSuchElementException, TimeoutException, ElementClickInterceptedException) as e: # Catch specific exceptions
-        print(f"Login error: {e}")
-        return False
+        start = time.monotonic()
+        response = requests.get(genius_web_url(song_url), timeout=10)
+        response.raise_for_status()
+        state = extract_preloaded_state(response.text)
+        credits = credits_from_state(state) if state else None
+        if credits is None and song_id:
+            credits = credits_from_api(genius.song(song_id))
+        print(f"Read credits in {time.monotonic() - start:.2f}s")
+        if credits is None:
+            print("No credits found on the song page.")
+            return []
+        if credits['producers']:
+            print("Producers of the song:", ', '.join(credits['producers']))
+        return credits['writers']
 
-
-def get_song_writers(driver, song_url):
-    try:
-        driver.get(song_url)
-
-        # Wait for the writers section to load (more robust)
-        writers_div = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//div[contains(@class,'ContributorsCreditMetadataItem__Artists')]")) # Correct class
-        )
-
-
-        writer_links = writers_div.find_elements(By.TAG_NAME, "a")  # More direct
-        writers = [link.text for link in writer_links if link.text]  # Handle potential empty links
-
-        if writers:
-            return writers
-        else:
-            print("No writers found or writer links have no text content.")
-            return []  # Return empty list rather than None to avoid issues later
-
-    except Exception as e: # Include TimeoutException if WebDriverWait is used
-         print(f"Error getting writers: {e}")
-         return None
+    except Exception as e:
+        print(f"Error getting writers: {e}")
+        return None
 
 def main():
-    # Initialize Selenium WebDriver
-    driver = setup_selenium_driver()
-
-    # Log into Genius
-    logged_in = login_to_genius(driver, GENIUS_EMAIL, GENIUS_PASSWORD)
-    if not logged_in:
-        print("Failed to log in to Genius. Exiting script.")
-        driver.quit()
-        return
-
     # Search for the song using lyricsgenius
     song_name = "Just Dance"
     artist_name = "Lady Gaga"  # Optional: specify the artist for more accurate results
@@ -164,17 +96,15 @@ def main():
     if song:
         print(f"Song URL: {song.url}")
 
-        # Scrape the song page to find the writers
-        writers = get_song_writers(driver, song.url)
+        # Read the writers from the song page
+        writers = get_song_writers(song.url, song.id)
         if writers:
+            search_cache.set_songwriters(artist_name, song_name, writers)
             print("Writers of the song:", ', '.join(writers))
         else:
             print("Could not retrieve the writers.")
     else:
         print("Song not found.")
 
-    # Close the Selenium WebDriver
-    driver.quit()
-
 if __name__ == "__main__":
     main()
@@ -1,9 +1,11 @@
+import os
 import requests
 import json
+from endpoints import MUSIXMATCH_API_ROOT
 
-# Replace with your actual Musixmatch API key
-API_KEY = 'YOUR_MUSIXMATCH_API_KEY'
-BASE_URL = 'https://api.musixmatch.com/ws/1.1/'
+# Musixmatch API key from environment variables
+API_KEY = os.getenv('MUSIXMATCH_API_KEY', 'YOUR_MUSIXMATCH_API_KEY')
+BASE_URL = MUSIXMATCH_API_ROOT
 
 def search_track(track_title, artist_name=None, page=1, page_size=10):
     """
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import time
 from tqdm import tqdm
 import logging
+from endpoints import configure_spotify_client
 
 load_dotenv()
 
@@ -39,6 +40,7 @@ client_credentials_manager = SpotifyClientCredentials(
     client_secret=SPOTIFY_CLIENT_SECRET
 )
 sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+configure_spotify_client(sp, client_credentials_manager)
 
 """
 #Done
@@ -0,0 +1,176 @@
+"""
+Tokenized lyrics and per-track text statistics for NLP users.
+
+Lyrics are tokenized once (section headers removed, lowercased word tokens) into a shared
+vocabulary and a sparse CSR document-term matrix. Per-track statistics are then computed
+from the matrix and from line hashes with array operations rather than per-song loops:
+
+    line_count         non-empty lyric lines
+    word_count         tokens
+    unique_words       distinct tokens
+    unique_word_ratio  unique_words / word_count
+    repetition_rate    share of lines that repeat an earlier line of the same song
+
+    python text_stats.py --output-prefix poplyrics
+    -> poplyrics_dtm.npz, poplyrics_vocab.json, poplyrics_stats.npz
+"""
+import argparse
+import json
+import logging
+import re
+from array import array
+
+import numpy as np
+import scipy.sparse as sparse
+
+from dataset_store import DatasetStore, DATASET_DB
+from sections import HEADER_RE
+from track_io import NO_LYRICS
+
+# -------------------- Configuration --------------------
+
+TOKEN_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+STAT_COLUMNS = ['line_count', 'word_count', 'unique_words', 'unique_word_ratio', 'repetition_rate']
+
+# -------------------- Tokenization --------------------
+
+def lyric_lines(lyrics):
+    """
+    Returns the non-empty lines of lyrics with section headers removed.
+    """
+    if not lyrics or lyrics == NO_LYRICS:
+        return []
+    return [line.strip() for line in HEADER_RE.sub('', lyrics).split('\n') if line.strip()]
+
+
+def tokenize(line):
+    return TOKEN_RE.findall(line.lower())
+
+
+class CorpusBuilder:
+    """
+    Accumulates documents into flat CSR index arrays and a vocabulary.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.keys = []
+        self.indices = array('i')
+        self.indptr = array('q', [0])
+        self.line_docs = array('i')
+        self.line_hashes = array('q')
+
+    def add(self, key, lyrics):
+        doc = len(self.keys)
+        self.keys.append(key)
+        vocabulary = self.vocabulary
+        for line in lyric_lines(lyrics):
+            tokens = tokenize(line)
+            self.indices.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            self.line_docs.append(doc)
+            self.line_hashes.append(hash(' '.join(tokens) or line))
+        self.indptr.append(len(self.indices))
+
+    def matrix(self):
+        """
+        Returns the document-term count matrix (documents x vocabulary).
+        """
+        indices = np.asarray(self.indices, dtype=np.int32)
+        indptr = np.asarray(self.indptr, dtype=np.int64)
+        data = np.ones(len(indices), dtype=np.int32)
+        dtm = sparse.csr_matrix((data, indices, indptr), shape=(len(self.keys), len(self.vocabulary)))
+        dtm.sum_duplicates()
+        return dtm
+
+    def statistics(self, dtm):
+        """
+        Computes STAT_COLUMNS for every document as arrays.
+        """
+        n_docs = len(self.keys)
+        word_count = np.diff(np.asarray(self.indptr, dtype=np.int64))
+        unique_words = np.diff(dtm.indptr)
+
+        line_docs = np.asarray(self.line_docs, dtype=np.int32)
+        line_count = np.bincount(line_docs, minlength=n_docs)
+        distinct_lines = np.zeros(n_docs, dtype=np.int64)
+        if len(line_docs):
+            pairs = np.stack([line_docs.astype(np.int64), np.asarray(self.line_hashes, dtype=np.int64)])
+            distinct_lines = np.bincount(np.unique(pairs, axis=1)[0], minlength=n_docs)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            unique_word_ratio = np.where(word_count > 0, unique_words / word_count, np.nan)
+            repetition_rate = np.where(line_count > 0, 1 - distinct_lines / line_count, np.nan)
+        return {
+            'line_count': line_count.astype(np.int32),
+            'word_count': word_count.astype(np.int32),
+            'unique_words': unique_words.astype(np.int32),
+            'unique_word_ratio': unique_word_ratio.astype(np.float32),
+            'repetition_rate': repetition_rate.astype(np.float32),
+        }
+
+
+def prune_vocabulary(dtm, vocabulary, min_df):
+    """
+    Drops terms that occur in fewer than min_df documents and renumbers the rest.
+
+    Returns:
+    - tuple: (pruned matrix, list of terms indexed by column)
+    """
+    terms = sorted(vocabulary, key=vocabulary.get)
+    if min_df <= 1:
+        return dtm, terms
+    keep = np.flatnonzero(np.bincount(dtm.indices, minlength=dtm.shape[1]) >= min_df)
+    return dtm[:, keep].tocsr(), [terms[i] for i in keep]
+
+# -------------------- Export Stage --------------------
+
+def build_text_stats(records, output_prefix, min_df=1):
+    """
+    Tokenizes lyrics and writes the matrix, vocabulary and statistics.
+
+    Parameters:
+    - records (iterable of dict): Records with 'track_key' and 'lyrics'.
+    - output_prefix (str): Prefix of the output files.
+    - min_df (int): Minimum document frequency for a term to stay in the vocabulary.
+
+    Returns:
+    - dict: Output paths and corpus sizes.
+    """
+    builder = CorpusBuilder()
+    for record in records:
+        builder.add(record['track_key'], record.get('lyrics'))
+
+    dtm = builder.matrix()
+    stats = builder.statistics(dtm)
+    dtm, terms = prune_vocabulary(dtm, builder.vocabulary, min_df)
+
+    paths = {'matrix': f"{output_prefix}_dtm.npz",
+             'vocabulary': f"{output_prefix}_vocab.json",
+             'statistics': f"{output_prefix}_stats.npz"}
+    sparse.save_npz(paths['matrix'], dtm)
+    with open(paths['vocabulary'], 'w', encoding='utf-8') as f:
+        json.dump(terms, f, ensure_ascii=False)
+    np.savez(paths['statistics'], track_key=np.array(builder.keys), **stats)
+
+    logging.info("Tokenized %s tracks: %s tokens, %s terms.", dtm.shape[0], len(builder.indices), len(terms))
+    return {**paths, 'tracks': dtm.shape[0], 'terms': len(terms)}
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenize lyrics into a CSR matrix with per-track statistics.")
+    parser.add_argument('--store', default=DATASET_DB)
+    parser.add_argument('--output-prefix', default='poplyrics')
+    parser.add_argument('--min-df', type=int, default=1, help="Minimum document frequency of kept terms")
+    args = parser.parse_args()
+
+    store = DatasetStore(args.store)
+    result = build_text_stats(store.query(has_lyrics=True, columns=['track_key', 'lyrics']),
+                              args.output_prefix, args.min_df)
+    store.close()
+    print(f"Wrote {result['tracks']} tracks x {result['terms']} terms to {result['matrix']}; "
+          f"statistics in {result['statistics']}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Persistent SQLite work queue with leases and visibility timeouts.
+
+Workers claim jobs by taking a time-limited lease. A worker that crashes simply stops
+renewing its lease and the job becomes visible to other workers once the lease expires.
+Completion is fenced on the lease owner, so a worker whose lease was taken over cannot
+overwrite the new owner's result.
+
+Local runs use WAL mode. For workers on several hosts sharing one filesystem, open the
+queue with shared_fs=True: WAL needs shared memory and does not work over network
+filesystems, so the rollback journal (and the filesystem's byte-range locks) is used.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+# -------------------- Configuration --------------------
+
+QUEUE_DB = os.getenv('WORK_QUEUE_DB', 'work_queue.db')
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Job statuses
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def default_worker_id():
+    """
+    Returns a worker ID unique across hosts and processes.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# -------------------- Queue --------------------
+
+class WorkQueue:
+    """
+    Job queue over a single SQLite file. One instance may be shared by threads of a process.
+
+    Parameters:
+    - db_path (str): SQLite database path.
+    - shared_fs (bool): Use the rollback journal instead of WAL (multi-host shared filesystem).
+    """
+
+    def __init__(self, db_path=QUEUE_DB, shared_fs=False):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA busy_timeout=60000")
+        self.conn.execute(f"PRAGMA journal_mode={'DELETE' if shared_fs else 'WAL'}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                stage TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                visible_at REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                UNIQUE (stage, key)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (stage, status, visible_at)")
+
+    def _transaction(self, fn):
+        """
+        Runs fn(conn) inside BEGIN IMMEDIATE so concurrent claimers serialize on the write lock.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # ---- producers ----
+
+    def enqueue(self, stage, key, payload):
+        """
+        Adds a job unless (stage, key) already exists.
+
+        Returns:
+        - bool: True if the job was added.
+        """
+        return self.enqueue_many(stage, [(key, payload)]) == 1
+
+    def enqueue_many(self, stage, items):
+        """
+        Adds jobs from an iterable of (key, payload); existing keys are left untouched.
+
+        Returns:
+        - int: Number of jobs added.
+        """
+        now = time.time()
+        rows = [(stage, key, json.dumps(payload, ensure_ascii=False), now) for key, payload in items]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (stage, key, payload, updated_at) VALUES (?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    # ---- consumers ----
+
+    def claim(self, stage, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, limit=1,
+              max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Leases up to `limit` visible jobs of a stage. Expired leases are reclaimed, unless the
+        job has used up max_attempts: a job whose worker keeps dying (OOM, kill, hang) is
+        then marked failed instead of being leased again.
+
+        Returns:
+        - list of dict: Claimed jobs with id, key, payload and attempts.
+        """
+        def take(conn):
+            now = time.time()
+            exhausted = conn.execute("""
+                UPDATE jobs SET status = 'failed', error = 'Lease expired on every attempt',
+                                lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE stage = ? AND status = 'leased' AND lease_expires <= ? AND attempts >= ?
+            """, (now, stage, now, max_attempts)).rowcount
+            if exhausted:
+                logging.warning("Marked %s %s jobs failed after %s expired leases.", exhausted, stage, max_attempts)
+            rows = conn.execute("""
+                SELECT id, key, payload, attempts FROM jobs
+                WHERE stage = ? AND (
+                    (status = 'pending' AND visible_at <= ?) OR
+                    (status = 'leased' AND lease_expires <= ?)
+                )
+                ORDER BY visible_at, id
+                LIMIT ?
+            """, (stage, now, now, limit)).fetchall()
+            conn.executemany("""
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                                attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            """, [(worker_id, now + lease_seconds, now, row[0]) for row in rows])
+            return [{'id': row[0], 'key': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1}
+                    for row in rows]
+        return self._transaction(take)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Extends a lease. Returns False if the lease was lost to another worker.
+        """
+        def extend(conn):
+            cursor = conn.execute("""
+                UPDATE jobs SET lease_expires = ?, updated_at = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """, (time.time() + lease_seconds, time.time(), job_id, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(extend)
+
+    def complete(self, job_id, worker_id, result=None):
+        """
+        Marks a leased job done with its result. Returns False if the lease was lost.
+        """
+        def finish(conn):
+            cursor = conn.execute("""
+                UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL,
+                                lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """, (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(finish)
+
+    def fail(self, job_id, worker_id, error, retry_delay=60.0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Returns a leased job to the queue after retry_delay, or marks it failed once
+        max_attempts is reached.
+        """
+        def give_back(conn):
+            now = time.time()
+            cursor = conn.execute("""
+                UPDATE jobs SET
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    visible_at = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """, (max_attempts, now + retry_delay, str(error), now, job_id, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(give_back)
+
+    def release(self, job_id, worker_id, delay=0.0):
+        """
+        Gives a job back without counting the attempt (e.g. the provider is unavailable).
+        """
+        def give_back(conn):
+            now = time.time()
+            cursor = conn.execute("""
+                UPDATE jobs SET status = 'pending', attempts = MAX(attempts - 1, 0), visible_at = ?,
+                                lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """, (now + delay, now, job_id, worker_id))
+            return cursor.rowcount == 1
+        return self._transaction(give_back)
+
+    # ---- inspection ----
+
+    def stats(self, stage=None):
+        """
+        Returns job counts per stage and status.
+        """
+        with self.lock:
+            query = "SELECT stage, status, COUNT(*) FROM jobs"
+            params = ()
+            if stage:
+                query += " WHERE stage = ?"
+                params = (stage,)
+            rows = self.conn.execute(query + " GROUP BY stage, status", params).fetchall()
+        stats = {}
+        for row_stage, status, count in rows:
+            stats.setdefault(row_stage, {})[status] = count
+        return stats
+
+    def iter_results(self, stage, batch_size=500):
+        """
+        Streams (key, result) for completed jobs of a stage in insertion order.
+        """
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute("""
+                    SELECT id, key, result FROM jobs
+                    WHERE stage = ? AND status = 'done' AND id > ?
+                    ORDER BY id LIMIT ?
+                """, (stage, last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for job_id, key, result in rows:
+                yield key, json.loads(result) if result is not None else None
+            last_id = rows[-1][0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
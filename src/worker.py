@@ -0,0 +1,214 @@
+"""
+Distributed build over the SQLite work queue.
+
+    python worker.py enqueue --roster artist.txt     # one 'artists' job per roster entry
+    python worker.py run --threads 4                 # claim and process artists, then tracks
+    python worker.py status
+    python worker.py export --output pop_lyrics_dataset.json
+
+Start as many `run` processes as needed, on one machine or on several hosts that share
+the queue file (pass --shared-fs there). Artist jobs fetch top tracks from Spotify and
+fan out into 'tracks' jobs; track jobs run the main enrichment path.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+from dataset_store import DatasetStore, DATASET_DB
+from main import get_artist_top_tracks_by_id, enrich_track, sp
+from resilience import CircuitOpenError, get_circuit_breaker, SPOTIFY_HOST, GENIUS_HOST
+from roster import load_roster, ARTIST_ROSTER
+from search_planner import normalize_text
+from structured_log import log_context
+from status import build_status, start_status_server
+from work_queue import (
+    WorkQueue, default_worker_id, QUEUE_DB, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, PENDING, LEASED
+)
+
+# -------------------- Configuration --------------------
+
+STAGE_ARTISTS = 'artists'
+STAGE_TRACKS = 'tracks'
+STAGE_HOSTS = {STAGE_ARTISTS: SPOTIFY_HOST, STAGE_TRACKS: GENIUS_HOST}
+
+TOP_N = 10
+IDLE_SLEEP = 5.0        # Seconds to wait when no job is visible
+RETRY_DELAY = 60.0      # Base visibility delay after a failed attempt
+
+# -------------------- Job Handlers --------------------
+
+def track_job_key(artist, track_name):
+    return f"{normalize_text(artist)}\x1f{normalize_text(track_name)}"
+
+
+def process_artist(queue, payload):
+    """
+    Fetches an artist's top tracks and enqueues one track job per track.
+    """
+    tracks = get_artist_top_tracks_by_id(payload['artist_id'], sp, top_n=TOP_N, raise_on_error=True)
+    for track in tracks:
+        track['artist'] = payload['artist']
+    added = queue.enqueue_many(STAGE_TRACKS, ((track_job_key(t['artist'], t['track_name']), t) for t in tracks))
+    logging.info("Queued %s new tracks for artist '%s'.", added, payload['artist'])
+    return tracks
+
+
+def process_track(queue, payload):
+    """
+    Enriches one track with lyrics, songwriters and genres. Provider failures are raised,
+    so the job is released or retried instead of completing without lyrics.
+    """
+    return enrich_track(payload, raise_on_error=True)
+
+
+HANDLERS = {STAGE_ARTISTS: process_artist, STAGE_TRACKS: process_track}
+
+# -------------------- Worker Loop --------------------
+
+class LeaseKeeper:
+    """
+    Renews a job's lease in the background while it is being processed.
+    """
+
+    def __init__(self, queue, job_id, worker_id, lease_seconds):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(self.job_id, self.worker_id, self.lease_seconds):
+                logging.warning("Lost lease on job %s.", self.job_id)
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+
+
+def run_worker(queue, stages, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS,
+               max_attempts=DEFAULT_MAX_ATTEMPTS, exit_when_idle=True):
+    """
+    Claims and processes jobs until the given stages are drained.
+
+    Stages are polled in order, so artists are expanded into tracks before tracks are
+    enriched. A stage whose provider circuit is open is skipped until it recovers, and
+    jobs interrupted by an open circuit are released without using up an attempt.
+    """
+    processed = 0
+    while True:
+        job, stage = None, None
+        wait_for = IDLE_SLEEP
+        for candidate in stages:
+            breaker = get_circuit_breaker(STAGE_HOSTS[candidate]).snapshot()
+            if breaker['state'] == 'open':
+                wait_for = min(wait_for, max(breaker['open_for'], 0.5))
+                continue
+            claimed = queue.claim(candidate, worker_id, lease_seconds, max_attempts=max_attempts)
+            if claimed:
+                job, stage = claimed[0], candidate
+                break
+
+        if job is None:
+            stats = queue.stats()
+            busy = any(stats.get(s, {}).get('pending', 0) or stats.get(s, {}).get('leased', 0) for s in stages)
+            if exit_when_idle and not busy:
+                logging.info("Worker %s finished after %s jobs.", worker_id, processed)
+                return processed
+            time.sleep(wait_for)
+            continue
+
+        try:
+            with log_context(job=f"{stage}/{job['id']}"), LeaseKeeper(queue, job['id'], worker_id, lease_seconds):
+                result = HANDLERS[stage](queue, job['payload'])
+        except CircuitOpenError as e:
+            queue.release(job['id'], worker_id, delay=max(0.0, e.retry_at - time.monotonic()))
+            continue
+        except Exception as e:
+            logging.error("Job %s/%s failed on attempt %s: %s", stage, job['key'], job['attempts'], e)
+            queue.fail(job['id'], worker_id, e, retry_delay=RETRY_DELAY * job['attempts'], max_attempts=max_attempts)
+            build_status.done(stage, failed=True)
+            continue
+        build_status.done(stage)
+
+        if not queue.complete(job['id'], worker_id, result):
+            logging.warning("Result for job %s/%s discarded: lease was lost.", stage, job['key'])
+        processed += 1
+
+# -------------------- Main Execution --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue-based distributed dataset build.")
+    parser.add_argument('--db', default=QUEUE_DB, help="Queue database path")
+    parser.add_argument('--shared-fs', action='store_true',
+                        help="Queue file lives on a filesystem shared between hosts")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help="Queue one artist job per roster entry")
+    enqueue.add_argument('--roster', default=ARTIST_ROSTER)
+
+    run = sub.add_parser('run', help="Process jobs")
+    run.add_argument('--stage', choices=[STAGE_ARTISTS, STAGE_TRACKS, 'all'], default='all')
+    run.add_argument('--threads', type=int, default=1)
+    run.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help="Lease (visibility timeout) in seconds")
+    run.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS)
+    run.add_argument('--forever', action='store_true', help="Keep polling when the queue is empty")
+    run.add_argument('--status-port', type=int, default=int(os.getenv('STATUS_PORT', 0)) or None,
+                     help="Serve live progress at http://127.0.0.1:<port>/status")
+
+    sub.add_parser('status', help="Show job counts per stage and status")
+
+    export = sub.add_parser('export', help="Upsert enriched tracks into the dataset store and export JSON")
+    export.add_argument('--store', default=DATASET_DB)
+    export.add_argument('--output', default='pop_lyrics_dataset.json')
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.db, shared_fs=args.shared_fs)
+
+    if args.command == 'enqueue':
+        roster = load_roster(args.roster)
+        added = queue.enqueue_many(STAGE_ARTISTS, ((artist_id, {'artist': artist, 'artist_id': artist_id})
+                                                   for artist, artist_id in roster.items()))
+        print(f"Queued {added} of {len(roster)} artists.")
+
+    elif args.command == 'run':
+        stages = [STAGE_ARTISTS, STAGE_TRACKS] if args.stage == 'all' else [args.stage]
+        if args.status_port:
+            # Queue depths are shared by every worker on the queue, so the ETA is for all of them
+            for stage in stages:
+                build_status.set_backlog(stage, lambda stage=stage: sum(
+                    count for status, count in queue.stats(stage).get(stage, {}).items() if status in (PENDING, LEASED)))
+            build_status.add_source('queue', queue.stats)
+            start_status_server(args.status_port)
+        threads = [threading.Thread(target=run_worker,
+                                    args=(queue, stages, default_worker_id(), args.lease, args.max_attempts,
+                                          not args.forever))
+                   for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    elif args.command == 'status':
+        for stage, counts in sorted(queue.stats().items()):
+            print(f"{stage}: " + ', '.join(f"{status}={count}" for status, count in sorted(counts.items())))
+
+    elif args.command == 'export':
+        store = DatasetStore(args.store)
+        upserted = store.upsert_many(record for _, record in queue.iter_results(STAGE_TRACKS) if record is not None)
+        count = store.export_json(args.output)
+        store.close()
+        print(f"Upserted {upserted} tracks; exported {count} tracks to {args.output}.")
+
+    queue.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from credits import credits_from_api, credits_from_state, extract_preloaded_state, songwriters_from_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'credits')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_mock_server_page():
+    assert songwriters_from_html(fixture('mock_song_page.html')) == ['Lady Gaga', 'RedOne']
+
+
+def test_json_parse_page_with_js_escapes():
+    song_credits = credits_from_state(extract_preloaded_state(fixture('escaped_song_page.html')))
+    assert song_credits == {
+        'song_id': 5311,
+        'writers': ['Beyoncé', 'Ryan Tedder', 'Evan "Kidd" Bogart'],
+        'producers': ['Ryan Tedder'],
+        'performances': {'Recorded At': ["Mark's Studio 🎵"], 'Vocal Producer': ['Beyoncé']},
+    }
+
+
+def test_object_literal_page_with_bare_and_inline_artist_refs():
+    song_credits = credits_from_state(extract_preloaded_state(fixture('object_literal_song_page.html')))
+    assert song_credits['song_id'] == 3124006
+    assert song_credits['writers'] == ['Ed Sheeran']
+    assert song_credits['producers'] == ['Ed Sheeran', 'Will Hicks']
+
+
+def test_page_without_state():
+    assert songwriters_from_html('<html><body>Page not found</body></html>') is None
+
+
+def test_truncated_state_is_an_error():
+    page = fixture('mock_song_page.html')
+    with pytest.raises(ValueError):
+        extract_preloaded_state(page[:page.index("');</script>")])
+
+
+def test_api_payload_matches_page_credits():
+    payload = json.loads(fixture('api_song.json'))
+    song_credits = credits_from_api(payload)
+    assert song_credits == {
+        'song_id': 5311,
+        'writers': ['Beyoncé', 'Ryan Tedder', 'Evan "Kidd" Bogart'],
+        'producers': ['Ryan Tedder'],
+        'performances': {'Recorded At': ["Mark's Studio 🎵"]},
+    }
+    assert credits_from_api(payload['song']) == song_credits
@@ -0,0 +1,16 @@
+from dataset_store import DatasetStore
+from track_io import NO_LYRICS
+
+
+def test_has_lyrics_treats_placeholder_as_missing(tmp_path):
+    store = DatasetStore(str(tmp_path / 'dataset.db'))
+    store.upsert_many([
+        {'artist': 'Adele', 'track_name': 'Hello', 'lyrics': 'Hello, it\'s me'},
+        {'artist': 'Adele', 'track_name': 'Skyfall', 'lyrics': NO_LYRICS},
+        {'artist': 'Adele', 'track_name': 'Easy On Me', 'lyrics': None},
+    ])
+    with_lyrics = [record['track_name'] for record in store.query(has_lyrics=True)]
+    without_lyrics = [record['track_name'] for record in store.query(has_lyrics=False)]
+    store.close()
+    assert with_lyrics == ['Hello']
+    assert without_lyrics == ['Skyfall', 'Easy On Me']
@@ -0,0 +1,108 @@
+import json
+
+from merge import (PatchIndex, merge_records, merge_files, KEY_ID, KEY_NAME,
+                   PATCH_DUPLICATE, ID_MISMATCH, BASE_DUPLICATE, LYRICS_REGRESSION)
+from track_io import NO_LYRICS
+
+
+def track(artist, title, track_id=None, lyrics='la la la', **fields):
+    return {'artist': artist, 'track_name': title, 'spotify_track_id': track_id, 'lyrics': lyrics, **fields}
+
+
+def merge(base, patches, **kwargs):
+    index = PatchIndex(**kwargs)
+    for patch in patches:
+        index.add(patch, 'patch.json')
+    stats = {}
+    return list(merge_records(base, index, stats=stats)), stats, index.conflicts
+
+
+def conflict_types(conflicts):
+    return [conflict['type'] for conflict in conflicts]
+
+
+def test_patch_matches_by_spotify_id_despite_respelled_title():
+    base = [track('Lady Gaga', 'Poker Face', 'id1', lyrics=None)]
+    merged, stats, conflicts = merge(base, [track('Lady Gaga', 'Poker Face (Remastered)', 'id1')])
+    assert [record['track_name'] for record in merged] == ['Poker Face (Remastered)']
+    assert merged[0]['lyrics'] == 'la la la'
+    assert stats['replaced'] == 1 and stats['inserted'] == 0
+    assert conflicts == []
+
+
+def test_patch_matches_by_normalized_name_without_ids():
+    base = [track('Beyoncé', 'Halo', lyrics=None)]
+    merged, stats, _ = merge(base, [track('BEYONCÉ', '  halo ')])
+    assert len(merged) == 1 and merged[0]['lyrics'] == 'la la la'
+    assert stats['replaced'] == 1
+
+
+def test_name_match_with_different_ids_is_a_conflict_not_a_merge():
+    base = [track('Adele', 'Hello', 'base-id', lyrics=None)]
+    merged, stats, conflicts = merge(base, [track('Adele', 'Hello', 'patch-id')])
+    assert merged[0]['lyrics'] is None
+    assert stats['replaced'] == 0 and stats['inserted'] == 1
+    assert conflict_types(conflicts) == [ID_MISMATCH]
+    assert conflicts[0]['base_id'] == 'base-id' and conflicts[0]['patch_id'] == 'patch-id'
+
+
+def test_later_patch_wins_and_is_reported():
+    base = [track('Adele', 'Hello', 'id1', lyrics=None)]
+    merged, _, conflicts = merge(base, [track('Adele', 'Hello', 'id1', lyrics='first'),
+                                        track('Adele', 'Hello', 'id1', lyrics='second')])
+    assert [record['lyrics'] for record in merged] == ['second']
+    assert conflict_types(conflicts) == [PATCH_DUPLICATE]
+
+
+def test_same_name_different_ids_in_patches_are_both_kept():
+    merged, stats, conflicts = merge([], [track('Adele', 'Hello', 'id1'), track('Adele', 'Hello', 'id2')])
+    assert [record['spotify_track_id'] for record in merged] == ['id1', 'id2']
+    assert stats['inserted'] == 2 and conflicts == []
+
+
+def test_patch_matching_two_base_records_replaces_both():
+    base = [track('Adele', 'Hello', lyrics=None), track('Adele', 'Hello', lyrics=None)]
+    merged, stats, conflicts = merge(base, [track('Adele', 'Hello')])
+    assert [record['lyrics'] for record in merged] == ['la la la', 'la la la']
+    assert stats['replaced'] == 2
+    assert conflict_types(conflicts) == [BASE_DUPLICATE]
+
+
+def test_patch_without_lyrics_keeps_base_lyrics():
+    base = [track('Adele', 'Hello', 'id1', lyrics='hello from the other side', language='en')]
+    for missing in (None, NO_LYRICS):
+        merged, _, conflicts = merge(base, [track('Adele', 'Hello', 'id1', lyrics=missing, popularity=90)])
+        assert merged[0]['lyrics'] == 'hello from the other side'
+        assert merged[0]['popularity'] == 90
+        assert conflict_types(conflicts) == [LYRICS_REGRESSION]
+
+
+def test_id_mode_skips_records_without_ids_and_ignores_names():
+    base = [track('Adele', 'Hello', lyrics=None)]
+    merged, stats, _ = merge(base, [track('Adele', 'Hello'), track('Adele', 'Skyfall', 'id2')], key_mode=KEY_ID)
+    assert merged[0]['lyrics'] is None
+    assert stats['replaced'] == 0 and stats['inserted'] == 1
+
+
+def test_name_mode_ignores_differing_ids():
+    base = [track('Adele', 'Hello', 'base-id', lyrics=None)]
+    merged, stats, conflicts = merge(base, [track('Adele', 'Hello', 'patch-id')], key_mode=KEY_NAME)
+    assert merged[0]['lyrics'] == 'la la la'
+    assert stats['replaced'] == 1 and conflicts == []
+
+
+def test_merge_files_writes_output_and_conflicts(tmp_path):
+    base_path, patch_path = tmp_path / 'base.json', tmp_path / 'patch.json'
+    output_path, conflicts_path = tmp_path / 'merged.json', tmp_path / 'conflicts.jsonl'
+    base_path.write_text(json.dumps([track('Adele', 'Hello', 'id1', lyrics=None),
+                                     track('Adele', 'Skyfall', 'id2', lyrics='let the sky fall')]))
+    patch_path.write_text(json.dumps([track('Adele', 'Hello', 'id1'),
+                                      track('Adele', 'Skyfall', 'id2', lyrics=None)]))
+
+    stats = merge_files(str(base_path), [str(patch_path)], str(output_path), str(conflicts_path))
+
+    merged = json.loads(output_path.read_text())
+    assert [record['lyrics'] for record in merged] == ['la la la', 'let the sky fall']
+    assert stats['written'] == 2 and stats['conflicts'] == 1
+    assert [json.loads(line)['type'] for line in conflicts_path.read_text().splitlines()] == [LYRICS_REGRESSION]
+    assert not list(tmp_path.glob('*.tmp'))
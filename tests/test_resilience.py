@@ -0,0 +1,29 @@
+import socket
+
+import pytest
+import requests
+
+from resilience import classify_error, FATAL, TRANSIENT
+
+
+@pytest.mark.parametrize('exc', [
+    requests.exceptions.ConnectionError('refused'),
+    requests.exceptions.ReadTimeout('slow'),
+    requests.exceptions.ChunkedEncodingError('cut off'),
+    socket.timeout('slow'),
+    socket.gaierror('dns'),
+    ConnectionResetError('reset'),
+])
+def test_network_failures_are_transient(exc):
+    assert classify_error(exc) == (TRANSIENT, None)
+
+
+@pytest.mark.parametrize('exc', [
+    requests.exceptions.InvalidURL('bad url'),
+    requests.exceptions.MissingSchema('no scheme'),
+    requests.exceptions.InvalidHeader('bad header'),
+    FileNotFoundError('missing'),
+    ValueError('bug'),
+])
+def test_configuration_errors_fail_fast(exc):
+    assert classify_error(exc) == (FATAL, None)
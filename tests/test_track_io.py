@@ -0,0 +1,30 @@
+import pytest
+
+from track_io import write_atomic, write_atomic_path
+
+
+def test_write_atomic_replaces_file(tmp_path):
+    path = tmp_path / 'out.json'
+    path.write_text('old')
+    assert write_atomic(str(path), lambda f: f.write('new')) == 3
+    assert path.read_text() == 'new'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.json']
+
+
+@pytest.mark.parametrize('writer', [write_atomic, write_atomic_path])
+def test_failed_write_keeps_original_and_removes_temp_file(tmp_path, writer):
+    path = tmp_path / 'out.json'
+    path.write_text('old')
+
+    def write(target):
+        if isinstance(target, str):
+            with open(target, 'w') as f:
+                f.write('partial')
+        else:
+            target.write('partial')
+        raise RuntimeError('disk full')
+
+    with pytest.raises(RuntimeError):
+        writer(str(path), write)
+    assert path.read_text() == 'old'
+    assert [p.name for p in tmp_path.iterdir()] == ['out.json']